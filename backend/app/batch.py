@@ -0,0 +1,108 @@
+"""
+Optimización por lotes: una ejecución hija por sede o departamento
+
+Los empleados y turnos activos se agrupan por `site` o `department` y cada
+grupo se resuelve como un modelo CP-SAT independiente. Las ejecuciones hijas
+corren en un pool de hilos compartido por todos los lotes (BATCH_MAX_WORKERS
+modelos a la vez, con BATCH_SOLVER_WORKERS hilos de CP-SAT cada uno); la
+ejecución padre agrega el estado y el resultado de sus hijas al terminar la última.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import func
+
+from app import dashboard
+from app.database import SessionLocal
+from app.models import SolverRun
+from app.refdata import ReferenceData
+
+logger = structlog.get_logger()
+
+_CPU_COUNT = os.cpu_count() or 1
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", str(min(4, _CPU_COUNT))))
+# Hilos de CP-SAT por modelo: repartir los núcleos entre los modelos simultáneos
+BATCH_SOLVER_WORKERS = int(os.getenv("BATCH_SOLVER_WORKERS", str(max(1, _CPU_COUNT // BATCH_MAX_WORKERS))))
+
+PENDING_STATUSES = ("pending", "running")
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ThreadPoolExecutor:
+    """Pool compartido de ejecuciones hijas (se crea en el primer lote)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(BATCH_MAX_WORKERS, thread_name_prefix="solver-batch")
+    return _pool
+
+def group_members(items: Iterable[Dict[str, Any]], group_by: str, group_key: Optional[str]) -> List[Dict[str, Any]]:
+    return [item for item in items if item.get(group_by) == group_key]
+
+def partition(reference: ReferenceData, group_by: str) -> Dict[Optional[str], Tuple[list, list]]:
+    """Empleados y turnos activos por valor del grupo (None = sin grupo asignado)"""
+    groups: Dict[Optional[str], Tuple[list, list]] = {}
+    for employee in reference.employees:
+        groups.setdefault(employee.get(group_by), ([], []))[0].append(employee)
+    for shift in reference.shifts:
+        groups.setdefault(shift.get(group_by), ([], []))[1].append(shift)
+    return groups
+
+def progress(children: Iterable[SolverRun]) -> Dict[str, Any]:
+    """Conteo de ejecuciones hijas por estado y porcentaje terminado"""
+    counts = {"pending": 0, "running": 0, "completed": 0, "failed": 0}
+    for child in children:
+        counts[child.status] = counts.get(child.status, 0) + 1
+    total = sum(counts.values())
+    finished = counts["completed"] + counts["failed"]
+    return {"total": total, **counts, "percent": round(finished / total * 100, 2) if total else 100.0}
+
+def submit_batch(parent_run_id: str, child_run_ids: List[str], task: Callable[[str], None]):
+    """Encolar las ejecuciones hijas en el pool; cada una actualiza al padre al terminar"""
+    started = time.perf_counter()
+    pool = get_pool()
+    for child_run_id in child_run_ids:
+        future = pool.submit(task, child_run_id)
+        future.add_done_callback(lambda _: update_batch(parent_run_id, started))
+    logger.info(f"Lote {parent_run_id}: {len(child_run_ids)} ejecuciones en cola")
+
+def update_batch(parent_run_id: str, started: float):
+    """
+    Cerrar el lote cuando no quedan hijas pendientes: completado si todas
+    terminaron bien, fallido si alguna falló; totales sumados de las hijas.
+    """
+    db = SessionLocal()
+    try:
+        children = SolverRun.parent_run_id == parent_run_id
+        pending = db.query(func.count(SolverRun.id)).filter(children, SolverRun.status.in_(PENDING_STATUSES)).scalar()
+        if pending:
+            return
+
+        parent = db.query(SolverRun).filter(SolverRun.run_id == parent_run_id).first()
+        if not parent or parent.status not in PENDING_STATUSES:
+            return
+        failed, assignments, objective = db.query(
+            func.count(SolverRun.id).filter(SolverRun.status == "failed"),
+            func.coalesce(func.sum(SolverRun.assignments_count), 0),
+            func.sum(SolverRun.objective_value),
+        ).filter(children).one()
+
+        parent.status = "failed" if failed else "completed"
+        parent.assignments_count = assignments
+        parent.objective_value = objective
+        parent.phase_timings = json.dumps({"batch": time.perf_counter() - started})
+        db.commit()
+        dashboard.invalidate()
+        logger.info(f"Lote {parent_run_id} terminado: {parent.status} ({failed} fallidas)")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error actualizando lote {parent_run_id}: {e}")
+    finally:
+        db.close()
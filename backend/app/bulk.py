@@ -0,0 +1,170 @@
+"""
+Operaciones masivas: inserciones por lotes (executemany o COPY en PostgreSQL)
+e importación de filas JSON/CSV con validación por fila
+"""
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Set, Tuple, Type
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models import Assignment
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "5000"))
+# Máximo de filas por petición de importación o actualización masiva
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "10000"))
+
+# Separador de listas dentro de una celda CSV (p. ej. skills "cocina;caja")
+CSV_LIST_SEPARATOR = ";"
+
+ASSIGNMENT_COLUMNS = ("solver_run_id", "employee_id", "shift_id", "date", "status", "created_at")
+
+def chunked(items: Iterable[Any], size: int = BULK_CHUNK_SIZE) -> Iterator[List[Any]]:
+    """Dividir un iterable en listas de tamaño fijo"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def as_datetime(value) -> datetime:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value
+
+def _uses_copy(db: Session) -> bool:
+    bind = db.get_bind()
+    return bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2"
+
+def bulk_insert_assignments(
+    db: Session,
+    solver_run_id: int,
+    assignments: Iterable[Dict[str, Any]],
+    status: str = "assigned"
+) -> int:
+    """
+    Insertar asignaciones del solver sin pasar por el unit-of-work del ORM.
+    No hace commit: las filas quedan en la transacción actual de la sesión.
+    """
+    now = datetime.now()
+    rows = (
+        {
+            "solver_run_id": solver_run_id,
+            "employee_id": a["employee_id"],
+            "shift_id": a["shift_id"],
+            "date": as_datetime(a["date"]),
+            "status": status,
+            "created_at": now,
+        }
+        for a in assignments
+    )
+
+    if _uses_copy(db):
+        return _copy_rows(db, Assignment.__tablename__, ASSIGNMENT_COLUMNS, rows)
+
+    inserted = 0
+    for chunk in chunked(rows):
+        db.execute(insert(Assignment), chunk)
+        inserted += len(chunk)
+    return inserted
+
+def _copy_rows(db: Session, table: str, columns, rows: Iterable[Dict[str, Any]]) -> int:
+    """COPY ... FROM STDIN por lotes sobre la conexión de la transacción actual"""
+    cursor = db.connection().connection.cursor()
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    copied = 0
+    try:
+        for chunk in chunked(rows):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in chunk:
+                writer.writerow([row[c] for c in columns])
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            copied += len(chunk)
+    finally:
+        cursor.close()
+    return copied
+
+async def read_bulk_rows(
+    request: Request,
+    list_fields: Sequence[str] = (),
+    dict_fields: Sequence[str] = ()
+) -> List[Dict[str, Any]]:
+    """
+    Leer las filas de una petición masiva: arreglo JSON en el cuerpo o archivo CSV
+    (multipart, campo `file`). En CSV las celdas vacías se omiten, las listas se
+    separan con ";" y los diccionarios se escriben como JSON.
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Falta el archivo CSV (campo 'file')")
+        text = (await upload.read()).decode("utf-8-sig")
+        rows = []
+        for row in csv.DictReader(io.StringIO(text)):
+            values = {k.strip(): v.strip() for k, v in row.items() if k and v is not None and v.strip() != ""}
+            for name in list_fields:
+                if name in values:
+                    values[name] = [item.strip() for item in values[name].split(CSV_LIST_SEPARATOR) if item.strip()]
+            for name in dict_fields:
+                if name in values:
+                    try:
+                        values[name] = json.loads(values[name])
+                    except ValueError:
+                        pass  # Lo informa la validación de la fila
+            rows.append(values)
+    else:
+        try:
+            rows = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cuerpo JSON inválido")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Se esperaba un arreglo JSON de filas")
+
+    if len(rows) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Máximo {BULK_MAX_ROWS} filas por petición")
+    return rows
+
+def row_error(row: int, message: str, field: str = None) -> Dict[str, Any]:
+    return {"row": row, "field": field, "message": message}
+
+def validate_rows(rows: List[Any], schema: Type[BaseModel]) -> Tuple[List[Tuple[int, BaseModel]], List[Dict[str, Any]]]:
+    """
+    Validar cada fila con el esquema. Devuelve (filas válidas, errores); las filas
+    se numeran desde 1 en el orden recibido.
+    """
+    valid, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        try:
+            valid.append((number, schema.model_validate(row)))
+        except ValidationError as e:
+            for error in e.errors():
+                field = ".".join(str(part) for part in error["loc"]) or None
+                errors.append(row_error(number, error["msg"], field))
+    return valid, errors
+
+def existing_values(db: Session, column, values: Iterable[Any]) -> Set[Any]:
+    """Valores que ya existen en la columna (una consulta IN por lote)"""
+    found = set()
+    for chunk in chunked(set(values)):
+        found.update(db.scalars(select(column).where(column.in_(chunk))))
+    return found
+
+def bulk_insert_rows(db: Session, model, rows: Iterable[Dict[str, Any]]) -> List[int]:
+    """Insertar filas por lotes con executemany (sin commit); ids en el orden de las filas"""
+    ids: List[int] = []
+    for chunk in chunked(rows):
+        ids.extend(db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), chunk))
+    return ids
@@ -0,0 +1,104 @@
+"""
+Resumen del dashboard: agregados de empleados, turnos y ejecuciones en caché
+
+Los agregados se calculan con unas pocas consultas sobre una sola conexión y se
+guardan DASHBOARD_CACHE_TTL segundos. Las escrituras de empleados y turnos
+(refdata.commit_reference_change) y los cambios de estado de las ejecuciones
+invalidan la caché del proceso; en otros workers la copia expira con el TTL.
+"""
+import os
+from datetime import datetime
+from typing import Any, Dict
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models import Employee, ReportSummary, Shift, SolverRun
+from app.schemas import DashboardSummary
+from app.ttl_cache import TTLCache
+
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "15"))
+
+# Ejecuciones recientes y puntos de la tendencia de cobertura
+DEFAULT_RECENT_RUNS = 5
+MAX_RECENT_RUNS = 50
+DEFAULT_TREND_RUNS = 10
+MAX_TREND_RUNS = 100
+
+# Una entrada por combinación de parámetros
+summary_cache = TTLCache(32, DASHBOARD_CACHE_TTL)
+
+def invalidate():
+    """Descartar los resúmenes en caché (tras una escritura)"""
+    summary_cache.clear()
+
+def _active_count(model):
+    return select(func.count()).select_from(model).where(model.is_active == True).scalar_subquery()
+
+def build_summary(db: Session, recent: int = DEFAULT_RECENT_RUNS, trend: int = DEFAULT_TREND_RUNS) -> Dict[str, Any]:
+    """Agregados del dashboard (sin caché)"""
+    completed = SolverRun.status == "completed"
+    totals = db.execute(select(
+        _active_count(Employee).label("active_employees"),
+        _active_count(Shift).label("active_shifts"),
+        select(func.avg(SolverRun.solve_time)).where(completed).scalar_subquery().label("average_solve_time"),
+        select(func.coalesce(func.sum(ReportSummary.total_cost), 0.0))
+        .join(SolverRun, SolverRun.id == ReportSummary.solver_run_id)
+        .where(completed)
+        .scalar_subquery()
+        .label("total_scheduled_cost"),
+    )).one()
+
+    # Historial de primer nivel: un lote cuenta una vez (sus hijas aportan tiempos y costos)
+    top_level = SolverRun.parent_run_id.is_(None)
+    runs_by_status = dict(db.execute(
+        select(SolverRun.status, func.count()).where(top_level).group_by(SolverRun.status)
+    ).all())
+    finished = runs_by_status.get("completed", 0) + runs_by_status.get("failed", 0)
+
+    newest_first = (SolverRun.created_at.desc(), SolverRun.id.desc())
+    recent_runs = db.execute(
+        select(
+            SolverRun.run_id, SolverRun.status, SolverRun.created_at, SolverRun.solve_time,
+            SolverRun.assignments_count, SolverRun.objective_value,
+            ReportSummary.total_cost, ReportSummary.coverage_percentage,
+        )
+        .outerjoin(ReportSummary, ReportSummary.solver_run_id == SolverRun.id)
+        .where(top_level)
+        .order_by(*newest_first)
+        .limit(recent)
+    ).all()
+
+    coverage_trend = db.execute(
+        select(
+            SolverRun.run_id, SolverRun.created_at, ReportSummary.coverage_percentage,
+            ReportSummary.understaffed_shifts, ReportSummary.total_cost,
+        )
+        .join(ReportSummary, ReportSummary.solver_run_id == SolverRun.id)
+        .where(completed)
+        .order_by(*newest_first)
+        .limit(trend)
+    ).all()
+
+    return DashboardSummary(
+        active_employees=totals.active_employees,
+        active_shifts=totals.active_shifts,
+        runs_by_status=runs_by_status,
+        total_runs=sum(runs_by_status.values()),
+        success_rate=round(runs_by_status.get("completed", 0) / finished * 100, 2) if finished else None,
+        average_solve_time=round(totals.average_solve_time, 3) if totals.average_solve_time is not None else None,
+        total_scheduled_cost=round(totals.total_scheduled_cost, 2),
+        recent_runs=[row._asdict() for row in recent_runs],
+        # Cronológica: de la más antigua a la más reciente
+        coverage_trend=[row._asdict() for row in reversed(coverage_trend)],
+        generated_at=datetime.now(),
+    ).model_dump()
+
+def get_summary(db: Session, recent: int = DEFAULT_RECENT_RUNS, trend: int = DEFAULT_TREND_RUNS) -> Dict[str, Any]:
+    """Resumen del dashboard desde la caché, calculado si expiró o fue invalidado"""
+    key = (recent, trend)
+    summary = summary_cache.get(key)
+    if summary is None:
+        summary = build_summary(db, recent, trend)
+        summary_cache.put(key, summary)
+    return summary
@@ -2,13 +2,19 @@
 Configuración de base de datos con Supabase
 """
 import os
+import threading
+from typing import TYPE_CHECKING, Optional
 from dotenv import load_dotenv
-from supabase import create_client, Client
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, event, MetaData
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import structlog
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -18,53 +24,103 @@ logger = structlog.get_logger()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-# Cliente Supabase (solo si las variables están configuradas)
-supabase: Client = None
-if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
-    supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+# Cliente Supabase: se crea en el primer uso (el paquete tarda en importarse)
+_supabase: Optional["Client"] = None
+_supabase_lock = threading.Lock()
+
+def get_supabase() -> Optional["Client"]:
+    """Cliente Supabase, o None si las variables no están configuradas"""
+    global _supabase
+    if _supabase is None and SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
+        with _supabase_lock:
+            if _supabase is None:
+                from supabase import create_client
+                _supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+    return _supabase
 
 # Configuración SQLAlchemy
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sistema_turnos.db")
 
-engine = create_engine(DATABASE_URL)
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Crear el esquema al arrancar (solo desarrollo local); en producción lo crean las
+# migraciones (`alembic upgrade head`, release_command en fly.toml)
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "true" if IS_SQLITE else "false").lower() == "true"
+
+# Pragmas de SQLite: WAL permite lecturas concurrentes mientras el solver escribe
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_KB', '20000'))}",
+    "PRAGMA temp_store=MEMORY",
+    f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))}",
+)
+
+def _async_database_url(url: str) -> str:
+    """Traducir DATABASE_URL al driver asíncrono (asyncpg / aiosqlite)"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+        # asyncpg usa "ssl" en lugar de "sslmode"
+        if "sslmode" in parsed.query:
+            query = dict(parsed.query)
+            query["ssl"] = query.pop("sslmode")
+            parsed = parsed.set(query=query)
+    elif parsed.get_backend_name() == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(DATABASE_URL)
+
+# Configuración del pool (no aplica a SQLite)
+POOL_OPTIONS = {} if IS_SQLITE else {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+}
+
+# Motor síncrono: solver en segundo plano, inserciones masivas y migraciones
+engine = create_engine(
+    DATABASE_URL,
+    # El solver se ejecuta fuera del hilo que creó la conexión
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    **POOL_OPTIONS
+)
+
+# Motor asíncrono: handlers de la API
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **POOL_OPTIONS)
+
+if IS_SQLITE:
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+    
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 # Dependencia para obtener sesión de DB
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # Inicializar base de datos
 async def init_db():
-    """Crear tablas si no existen"""
+    """Crear tablas si no existen (con DB_CREATE_ALL; si no, las migraciones se encargan)"""
+    if not DB_CREATE_ALL:
+        return
     try:
         # Crear tablas
-        Base.metadata.create_all(bind=engine)
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
         logger.info("Base de datos inicializada correctamente")
     except Exception as e:
         logger.error(f"Error inicializando base de datos: {e}")
         raise
-
-# Función para log de errores
-def log_error(run_id: str, user_id: str, message: str, stack: str = None):
-    """Guardar error en tabla error_logs"""
-    try:
-        if supabase:
-            error_data = {
-                "run_id": run_id,
-                "user_id": user_id,
-                "message": message,
-                "stack": stack,
-                "created_at": "now()"
-            }
-            
-            result = supabase.table("error_logs").insert(error_data).execute()
-            logger.info(f"Error logueado: {run_id}")
-        else:
-            logger.info(f"Error (sin Supabase): {run_id} - {message}")
-    except Exception as e:
-        logger.error(f"Error guardando log: {e}")
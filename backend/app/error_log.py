@@ -0,0 +1,134 @@
+"""
+Registro de errores sin bloqueo: cola en proceso + hilo que inserta por lotes
+
+`log_error` solo encola el registro. Un hilo de fondo vacía la cola cada
+ERROR_LOG_FLUSH_INTERVAL segundos (o al llegar a ERROR_LOG_BATCH_SIZE) con un
+INSERT por lotes en la tabla local `error_logs` y, si ERROR_LOG_MIRROR_SUPABASE
+está activo y Supabase configurado, replica el lote en la tabla remota.
+"""
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import structlog
+from sqlalchemy import insert
+
+from app.database import SessionLocal, get_supabase
+from app.metrics import error_logs_total
+from app.models import ErrorLog
+
+logger = structlog.get_logger()
+
+ERROR_LOG_BATCH_SIZE = int(os.getenv("ERROR_LOG_BATCH_SIZE", "100"))
+ERROR_LOG_FLUSH_INTERVAL = float(os.getenv("ERROR_LOG_FLUSH_INTERVAL", "1"))
+ERROR_LOG_QUEUE_SIZE = int(os.getenv("ERROR_LOG_QUEUE_SIZE", "10000"))
+ERROR_LOG_MIRROR_SUPABASE = os.getenv("ERROR_LOG_MIRROR_SUPABASE", "false").lower() == "true"
+
+class ErrorLogWriter:
+    """Cola acotada de registros de error y su hilo de escritura"""
+
+    def __init__(self, batch_size: int = ERROR_LOG_BATCH_SIZE, flush_interval: float = ERROR_LOG_FLUSH_INTERVAL,
+                 max_queue: int = ERROR_LOG_QUEUE_SIZE, mirror: bool = ERROR_LOG_MIRROR_SUPABASE):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.mirror = mirror
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # Un solo vaciado a la vez (hilo de fondo, lecturas y cierre)
+        self._flush_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="error-log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Detener el hilo y escribir lo pendiente"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def submit(self, record: Dict[str, Any]):
+        """Encolar un registro; si la cola está llena se descarta (nunca bloquea)"""
+        self.start()
+        try:
+            self._queue.put_nowait(record)
+            error_logs_total.inc(result="queued")
+        except queue.Full:
+            error_logs_total.inc(result="dropped")
+            logger.warning(f"Cola de errores llena, registro descartado: {record.get('run_id')}")
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._stop.wait(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error escribiendo registros de error: {e}")
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self) -> int:
+        """Escribir todos los registros encolados por lotes; devuelve cuántos"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._drain()
+                if not batch:
+                    return written
+                self._write(batch)
+                written += len(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        db = SessionLocal()
+        try:
+            db.execute(insert(ErrorLog), batch)
+            db.commit()
+            error_logs_total.inc(len(batch), result="written")
+        except Exception as e:
+            db.rollback()
+            error_logs_total.inc(len(batch), result="failed")
+            logger.error(f"Error guardando {len(batch)} registros de error: {e}")
+        finally:
+            db.close()
+
+        supabase = get_supabase() if self.mirror else None
+        if supabase:
+            try:
+                supabase.table("error_logs").insert([
+                    {**record, "created_at": record["created_at"].isoformat()} for record in batch
+                ]).execute()
+            except Exception as e:
+                logger.error(f"Error replicando registros de error en Supabase: {e}")
+
+writer = ErrorLogWriter()
+
+def log_error(run_id: str, user_id: Optional[str], message: str, stack: Optional[str] = None):
+    """Registrar un error en error_logs sin bloquear al llamador"""
+    logger.info(f"Error registrado: {run_id} - {message}")
+    writer.submit({
+        "run_id": run_id,
+        "user_id": user_id,
+        "message": message,
+        "stack": stack,
+        "created_at": datetime.now(),
+    })
@@ -0,0 +1,157 @@
+"""
+Caché HTTP de ejecuciones terminadas: ETag/Last-Modified, 304 y LRU de respuestas serializadas
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.models import SolverRun
+from app.responses import APIResponse, wants_msgpack
+
+# Estados en los que la ejecución y sus asignaciones ya no cambian
+TERMINAL_STATUSES = ("completed", "failed")
+
+RUN_CACHE_MAX_ENTRIES = int(os.getenv("RUN_CACHE_MAX_ENTRIES", "256"))
+RUN_CACHE_MAX_AGE = int(os.getenv("RUN_CACHE_MAX_AGE", "86400"))  # segundos (Cache-Control)
+
+CacheKey = Tuple[str, str, bool]
+
+@dataclass
+class CachedResponse:
+    run_id: str
+    body: bytes
+    media_type: str
+    headers: Dict[str, str]
+
+def is_terminal(run: SolverRun) -> bool:
+    return run.status in TERMINAL_STATUSES
+
+def _request_key(request: Request) -> CacheKey:
+    """Ruta, parámetros y formato negociado (JSON o MessagePack)"""
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return request.url.path, query, wants_msgpack()
+
+def _last_modified(run: SolverRun) -> Optional[datetime]:
+    if not run.updated_at:
+        return None
+    return run.updated_at.replace(tzinfo=timezone.utc, microsecond=0)
+
+def validators(request: Request, run: SolverRun) -> Dict[str, str]:
+    """
+    Cabeceras ETag, Last-Modified y Cache-Control de una ejecución terminada.
+    El ETag cambia con updated_at (materialización y compactación lo actualizan).
+    """
+    path, query, msgpack = _request_key(request)
+    source = f"{run.run_id}:{run.updated_at.isoformat() if run.updated_at else ''}:{run.storage_mode}:{path}?{query}:{msgpack}"
+    headers = {
+        "ETag": f'"{hashlib.sha256(source.encode("utf-8")).hexdigest()[:32]}"',
+        "Cache-Control": f"private, max-age={RUN_CACHE_MAX_AGE}",
+    }
+    last_modified = _last_modified(run)
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+def _not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return if_none_match.strip() == "*" or headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")]
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            return parsedate_to_datetime(headers["Last-Modified"]) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+class RunResponseCache:
+    """LRU en memoria de respuestas serializadas de ejecuciones terminadas"""
+
+    def __init__(self, max_entries: int = RUN_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: CacheKey, entry: CachedResponse):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, run_id: str):
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.run_id == run_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+cache = RunResponseCache()
+
+def _response(request: Request, entry: CachedResponse) -> Response:
+    if _not_modified(request, entry.headers):
+        return Response(status_code=304, headers=entry.headers)
+    response = Response(content=entry.body, media_type=entry.media_type, headers=entry.headers)
+    response.headers.add_vary_header("Accept")
+    return response
+
+def cached_response(request: Request) -> Optional[Response]:
+    """Respuesta desde el LRU (o 304) sin tocar la base de datos"""
+    entry = cache.get(_request_key(request))
+    if entry is None:
+        return None
+    return _response(request, entry)
+
+def not_modified_response(request: Request, run: SolverRun) -> Optional[Response]:
+    """304 si el cliente ya tiene la versión actual (antes de cargar asignaciones)"""
+    if not is_terminal(run):
+        return None
+    headers = validators(request, run)
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    return None
+
+def cache_run_response(
+    request: Request,
+    run: SolverRun,
+    content: Any,
+    adapter: TypeAdapter,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serializar una vez la respuesta de una ejecución terminada, guardarla en el LRU
+    y devolverla con sus validadores
+    """
+    rendered = APIResponse(adapter.dump_python(adapter.validate_python(content, from_attributes=True), mode="json"))
+    entry = CachedResponse(
+        run_id=run.run_id,
+        body=rendered.body,
+        media_type=rendered.media_type,
+        headers={**validators(request, run), **(headers or {})},
+    )
+    cache.put(_request_key(request), entry)
+    return _response(request, entry)
+
+def invalidate_run(run_id: str):
+    """Descartar las respuestas en caché de una ejecución (materialización, compactación)"""
+    cache.invalidate(run_id)
@@ -0,0 +1,438 @@
+"""
+Prueba de carga de la API con clientes concurrentes (httpx asíncrono)
+
+Ejecuta la aplicación en el mismo proceso (ASGI, sin red) o contra un servidor
+uvicorn local, sobre una base SQLite o PostgreSQL local con datos sembrados.
+Cada cliente elige escenarios según los pesos de --mix hasta agotar la duración
+o el número de peticiones, y el resultado es un JSON con latencias p50/p95/p99,
+rendimiento y tasa de errores por endpoint, comparable entre versiones.
+
+Uso (desde backend/):
+    python -m app.loadtest --database-url sqlite:///./loadtest.db --seed-employees 200 --seed-shifts 21
+    python -m app.loadtest --base-url http://127.0.0.1:8000 --concurrency 32 --duration 60 --output actual.json
+    python -m app.loadtest --mix employees=5,report=2,poll=3 --baseline anterior.json
+
+La prueba escribe en la base de datos (empleados, turnos y ejecuciones del
+solver): usar una base dedicada, nunca la de producción.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import deque
+from contextlib import AsyncExitStack
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+import structlog
+
+# Escenarios: nombre -> endpoint medido (plantilla de la ruta)
+SCENARIOS = {
+    "employees": "GET /api/employees/",
+    "report": "GET /api/reports/{run_id}",
+    "solve": "POST /api/solver/solve",
+    "poll": "GET /api/solver/runs/{run_id}",
+}
+DEFAULT_MIX = "employees=4,report=2,solve=1,poll=3"
+
+PERCENTILES = (50, 95, 99)
+# Respuestas de error guardadas por endpoint (para diagnosticar)
+ERROR_SAMPLES = 3
+TERMINAL_STATUSES = ("completed", "failed")
+SEED_BATCH_SIZE = 500
+
+class SetupError(Exception):
+    """No se pudieron preparar los datos de la prueba"""
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Pesos de los escenarios: "employees=4,solve=1" (sin peso = 1)"""
+    mix = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(
+                f"Escenario desconocido: {name} (disponibles: {', '.join(SCENARIOS)})"
+            )
+        mix[name] = float(weight) if weight else 1.0
+    if not mix or not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError("La mezcla de escenarios está vacía")
+    return mix
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil con interpolación lineal sobre valores ordenados"""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+class Recorder:
+    """Latencias y códigos de estado por endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+        self.errors: Dict[str, int] = {}
+        self.samples: Dict[str, List[str]] = {}
+
+    def record(self, endpoint: str, status: str, elapsed: float, detail: Optional[str] = None):
+        self.latencies.setdefault(endpoint, []).append(elapsed)
+        counts = self.statuses.setdefault(endpoint, {})
+        counts[status] = counts.get(status, 0) + 1
+        if detail is not None:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            samples = self.samples.setdefault(endpoint, [])
+            if len(samples) < ERROR_SAMPLES:
+                samples.append(f"{status}: {detail[:200]}")
+
+    def summary(self, endpoint: str, wall_time: float) -> Dict[str, Any]:
+        values = sorted(self.latencies.get(endpoint, []))
+        count = len(values)
+        errors = self.errors.get(endpoint, 0)
+        latency = {f"p{q}": round(percentile(values, q) * 1000, 2) for q in PERCENTILES}
+        latency.update({
+            "min": round(values[0] * 1000, 2) if values else 0.0,
+            "mean": round(sum(values) / count * 1000, 2) if values else 0.0,
+            "max": round(values[-1] * 1000, 2) if values else 0.0,
+        })
+        return {
+            "requests": count,
+            "errors": errors,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "throughput_rps": round(count / wall_time, 2) if wall_time else 0.0,
+            "latency_ms": latency,
+            "statuses": self.statuses.get(endpoint, {}),
+            "error_samples": self.samples.get(endpoint, []),
+        }
+
+class DetachedASGIApp:
+    """
+    Envoltorio ASGI para el modo en proceso: devuelve la respuesta en cuanto se
+    envía completa y deja terminar en segundo plano las BackgroundTasks (como
+    uvicorn), para que la latencia de /solve no incluya la optimización.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.pending: Set[asyncio.Task] = set()
+
+    async def __call__(self, scope, receive, send):
+        sent = asyncio.Event()
+
+        async def forward(message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                sent.set()
+
+        task = asyncio.create_task(self.app(scope, receive, forward))
+        self.pending.add(task)
+        task.add_done_callback(self._finished)
+        waiter = asyncio.create_task(sent.wait())
+        await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        if task.done():
+            task.result()
+
+    def _finished(self, task: asyncio.Task):
+        self.pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error en tarea de fondo: {task.exception()!r}", file=sys.stderr)
+
+    async def drain(self, timeout: float):
+        """Esperar las tareas de fondo pendientes (ejecuciones del solver)"""
+        if self.pending:
+            await asyncio.wait(set(self.pending), timeout=timeout)
+
+class LoadTest:
+    """Estado compartido de la prueba: cliente, ejecuciones conocidas y métricas"""
+
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace):
+        self.client = client
+        self.args = args
+        self.recorder = Recorder()
+        self.rng = random.Random(args.random_seed)
+        self.report_run_id: Optional[str] = None
+        # Ejecuciones recientes para el escenario de consulta de estado
+        self.runs: deque = deque(maxlen=100)
+        self.remaining = args.requests
+
+    async def request(self, endpoint: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        """Petición medida; los estados >= 400 y las excepciones cuentan como error"""
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.record(endpoint, f"exception:{type(e).__name__}", time.perf_counter() - start, str(e))
+            return None
+        elapsed = time.perf_counter() - start
+        status = str(response.status_code)
+        self.recorder.record(endpoint, status, elapsed, response.text if response.status_code >= 400 else None)
+        return response
+
+    def solve_payload(self) -> Dict[str, Any]:
+        # Semana que empieza el próximo lunes
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = today + timedelta(days=7 - today.weekday())
+        return {"constraints": {
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=self.args.solve_days)).isoformat(),
+        }}
+
+    # Escenarios
+
+    async def employees(self):
+        await self.request(SCENARIOS["employees"], "GET", "/api/employees/", params={"limit": self.args.page_size})
+
+    async def report(self):
+        await self.request(SCENARIOS["report"], "GET", f"/api/reports/{self.report_run_id}")
+
+    async def solve(self):
+        response = await self.request(SCENARIOS["solve"], "POST", "/api/solver/solve", json=self.solve_payload())
+        if response is not None and response.status_code == 200:
+            self.runs.append(response.json()["run_id"])
+
+    async def poll(self):
+        run_id = self.rng.choice(self.runs)
+        await self.request(SCENARIOS["poll"], "GET", f"/api/solver/runs/{run_id}")
+
+    # Preparación
+
+    async def seed(self):
+        """Sembrar empleados y turnos con las importaciones masivas"""
+        tag = uuid.uuid4().hex[:8]
+        skills = [f"skill{i}" for i in range(self.args.seed_skills)]
+        employees = [
+            {
+                "name": f"Carga {tag} {i}",
+                "email": f"carga-{tag}-{i}@example.com",
+                "position": f"puesto{i % 5}",
+                "skills": self.rng.sample(skills, k=min(2, len(skills))),
+                "hourly_rate": round(self.rng.uniform(8, 20), 2),
+            }
+            for i in range(self.args.seed_employees)
+        ]
+        shifts = [
+            {
+                "name": f"Carga {tag} {i}",
+                "start_time": ("06:00", "14:00", "22:00")[i % 3],
+                "end_time": ("14:00", "22:00", "06:00")[i % 3],
+                "day_of_week": (i // 3) % 7,
+                "required_skills": [self.rng.choice(skills)] if skills else [],
+                "min_employees": 1,
+                "max_employees": 3,
+            }
+            for i in range(self.args.seed_shifts)
+        ]
+        for path, rows in (("/api/employees/bulk", employees), ("/api/shifts/bulk", shifts)):
+            for offset in range(0, len(rows), SEED_BATCH_SIZE):
+                response = await self.client.post(path, json=rows[offset:offset + SEED_BATCH_SIZE])
+                response.raise_for_status()
+        if employees or shifts:
+            print(f"Sembrados {len(employees)} empleados y {len(shifts)} turnos", file=sys.stderr)
+
+    async def wait_for_run(self, run_id: str, timeout: float) -> str:
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            response = await self.client.get(f"/api/solver/runs/{run_id}")
+            response.raise_for_status()
+            status = response.json()["status"]
+            if status in TERMINAL_STATUSES:
+                return status
+            await asyncio.sleep(0.2)
+        return "timeout"
+
+    async def prepare(self):
+        """Datos sembrados y una ejecución terminada para los informes"""
+        await self.seed()
+        response = await self.client.post("/api/solver/solve", json=self.solve_payload())
+        response.raise_for_status()
+        run_id = response.json()["run_id"]
+        status = await self.wait_for_run(run_id, self.args.setup_timeout)
+        if status != "completed":
+            raise SetupError(f"La ejecución de preparación {run_id} terminó en estado {status}")
+        self.report_run_id = run_id
+        self.runs.append(run_id)
+
+    # Ejecución
+
+    async def worker(self, names: List[str], weights: List[float], deadline: Optional[float]):
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if self.remaining is not None:
+                if self.remaining <= 0:
+                    return
+                self.remaining -= 1
+            scenario = self.rng.choices(names, weights)[0]
+            await getattr(self, scenario)()
+            if self.args.think_time:
+                await asyncio.sleep(self.rng.uniform(0, 2 * self.args.think_time))
+
+    async def run(self) -> float:
+        names = [name for name, weight in self.args.mix.items() if weight > 0]
+        weights = [self.args.mix[name] for name in names]
+        if self.args.warmup:
+            warmup_deadline = time.perf_counter() + self.args.warmup
+            remaining, self.remaining = self.remaining, None
+            await asyncio.gather(*(
+                self.worker(names, weights, warmup_deadline) for _ in range(self.args.concurrency)
+            ))
+            # Las peticiones de calentamiento no cuentan
+            self.recorder, self.remaining = Recorder(), remaining
+
+        deadline = time.perf_counter() + self.args.duration if self.remaining is None else None
+        started = time.perf_counter()
+        await asyncio.gather(*(self.worker(names, weights, deadline) for _ in range(self.args.concurrency)))
+        return time.perf_counter() - started
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Variación porcentual de latencias, rendimiento y errores respecto a otra prueba"""
+    def change(new: float, old: float) -> Optional[float]:
+        return round((new - old) / old * 100, 2) if old else None
+
+    result = {}
+    for endpoint, stats in current["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if not previous:
+            continue
+        entry = {
+            f"{key}_change_pct": change(stats["latency_ms"][key], previous["latency_ms"][key])
+            for key in (f"p{q}" for q in PERCENTILES)
+        }
+        entry["throughput_change_pct"] = change(stats["throughput_rps"], previous["throughput_rps"])
+        entry["error_rate_delta"] = round(stats["error_rate"] - previous["error_rate"], 4)
+        result[endpoint] = entry
+    return {"baseline": baseline.get("meta", {}), "endpoints": result}
+
+async def run_load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with AsyncExitStack() as stack:
+        if args.base_url:
+            transport = httpx.AsyncHTTPTransport(retries=0, limits=limits)
+            base_url, target = args.base_url, args.base_url
+            version = database = None
+        else:
+            # Importar la app después de fijar DATABASE_URL
+            from app.database import engine
+            from app.main import app
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            asgi_app = DetachedASGIApp(app)
+            # Al salir: primero las optimizaciones pendientes, luego el cierre de la app
+            stack.push_async_callback(asgi_app.drain, args.drain_timeout)
+            transport = httpx.ASGITransport(app=asgi_app, raise_app_exceptions=False)
+            base_url, target = "http://loadtest", "asgi"
+            version = app.version
+            database = engine.dialect.name
+
+        client = await stack.enter_async_context(
+            httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout)
+        )
+        if version is None:
+            response = await client.get("/openapi.json")
+            version = response.json().get("info", {}).get("version") if response.status_code == 200 else None
+        test = LoadTest(client, args)
+        await test.prepare()
+        print(f"Carga: {args.concurrency} clientes, mezcla {args.mix}", file=sys.stderr)
+        wall_time = await test.run()
+
+    recorder = test.recorder
+    endpoints = {endpoint: recorder.summary(endpoint, wall_time) for endpoint in sorted(recorder.latencies)}
+    total_requests = sum(stats["requests"] for stats in endpoints.values())
+    total_errors = sum(stats["errors"] for stats in endpoints.values())
+    every_latency = sorted(value for values in recorder.latencies.values() for value in values)
+    return {
+        "meta": {
+            "label": args.label,
+            "app_version": version,
+            "git_revision": git_revision(),
+            "target": target,
+            "database": database,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "duration": args.duration if args.requests is None else None,
+            "requests": args.requests,
+            "mix": args.mix,
+            "random_seed": args.random_seed,
+            "seed_employees": args.seed_employees,
+            "seed_shifts": args.seed_shifts,
+        },
+        "wall_time": round(wall_time, 3),
+        "total": {
+            "requests": total_requests,
+            "errors": total_errors,
+            "error_rate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+            "throughput_rps": round(total_requests / wall_time, 2) if wall_time else 0.0,
+            "latency_ms": {f"p{q}": round(percentile(every_latency, q) * 1000, 2) for q in PERCENTILES},
+        },
+        "endpoints": endpoints,
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de turnos")
+    parser.add_argument("--base-url", default=None, help="Servidor uvicorn a probar (por defecto, la app en proceso)")
+    parser.add_argument("--database-url", default=None, help="DATABASE_URL para el modo en proceso")
+    parser.add_argument("--concurrency", type=int, default=10, help="Clientes concurrentes")
+    parser.add_argument("--duration", type=float, default=30, help="Segundos de carga medida")
+    parser.add_argument("--requests", type=int, default=None, help="Total de peticiones (en lugar de --duration)")
+    parser.add_argument("--warmup", type=float, default=0, help="Segundos de calentamiento sin medir")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Pesos de los escenarios ({', '.join(SCENARIOS)}); por defecto {DEFAULT_MIX}")
+    parser.add_argument("--think-time", type=float, default=0, help="Pausa media entre peticiones de un cliente (s)")
+    parser.add_argument("--page-size", type=int, default=50, help="limit del listado de empleados")
+    parser.add_argument("--solve-days", type=int, default=7, help="Días del horizonte de cada optimización")
+    parser.add_argument("--seed-employees", type=int, default=0, help="Empleados a sembrar antes de la carga")
+    parser.add_argument("--seed-shifts", type=int, default=0, help="Turnos a sembrar antes de la carga")
+    parser.add_argument("--seed-skills", type=int, default=5, help="Habilidades distintas de los datos sembrados")
+    parser.add_argument("--random-seed", type=int, default=42, help="Semilla de la mezcla y de los datos")
+    parser.add_argument("--timeout", type=float, default=30, help="Timeout por petición (s)")
+    parser.add_argument("--setup-timeout", type=float, default=120, help="Espera máxima de la ejecución de preparación (s)")
+    parser.add_argument("--drain-timeout", type=float, default=60, help="Espera de optimizaciones pendientes al terminar (s)")
+    parser.add_argument("--label", default=None, help="Etiqueta de la prueba (p. ej. la versión)")
+    parser.add_argument("--output", default=None, help="Guardar el resultado JSON en un archivo")
+    parser.add_argument("--baseline", default=None, help="Resultado JSON anterior con el que comparar")
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        if args.base_url:
+            parser.error("--database-url solo aplica al modo en proceso")
+        os.environ["DATABASE_URL"] = args.database_url
+    # Los logs de la app van a stderr; stdout queda para el resultado JSON
+    structlog.configure(logger_factory=structlog.PrintLoggerFactory(sys.stderr))
+
+    try:
+        result = asyncio.run(run_load_test(args))
+    except (SetupError, httpx.HTTPError) as e:
+        print(f"La prueba no pudo prepararse: {e}", file=sys.stderr)
+        return 1
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            result["comparison"] = compare(result, json.load(f))
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,13 @@
 """
 Sistema de Generación de Turnos - Backend FastAPI
 """
+import time
+
+# Inicio de la importación de la aplicación (informe de arranque)
+IMPORT_STARTED = time.perf_counter()
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
@@ -22,20 +28,38 @@ class ProxyHeadersMiddleware:
         await self.app(scope, receive, send)
 
 import os
-from app.routers import auth, employees, shifts, solver, reports
+import structlog
+from app.routers import auth, employees, shifts, solver, reports, admin, dashboard
 from app.database import init_db
+from app.error_log import writer as error_log_writer
+from app.metrics import app_startup_seconds, registry as metrics_registry
+from app.profiling import ProfilingMiddleware
+from app.responses import APIResponse, CompressionMiddleware, ContentNegotiationMiddleware
 
 load_dotenv()
 
+logger = structlog.get_logger()
+
 app = FastAPI(
     title="Sistema de Generación de Turnos",
     description="API para optimización de turnos con OR-Tools CP-SAT",
-    version="1.0.0"
+    version="1.0.0",
+    # JSON con orjson (o MessagePack con Accept: application/msgpack)
+    default_response_class=APIResponse
 )
 
 # ✅ Añade primero el middleware de proxy
 app.add_middleware(ProxyHeadersMiddleware)
 
+# Profiling opcional por petición (cabecera X-Profile: 1)
+app.add_middleware(ProfilingMiddleware)
+
+# Compresión gzip/brotli sobre COMPRESSION_MIN_SIZE
+app.add_middleware(CompressionMiddleware)
+
+# Negociación de MessagePack por cabecera Accept
+app.add_middleware(ContentNegotiationMiddleware)
+
 # ✅ CORS con orígenes exactos (sin comodines *.vercel.app)
 allowed_origins = [
     "http://localhost:3000",
@@ -49,11 +73,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cabeceras que el frontend necesita leer
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Profile-Id"],
 )
 
 @app.on_event("startup")
 async def startup_event():
+    started = time.perf_counter()
     await init_db()
+    error_log_writer.start()
+    
+    # Informe de arranque: importación de la app y eventos de inicio
+    phases = {
+        "import": IMPORT_COMPLETED - IMPORT_STARTED,
+        "startup": time.perf_counter() - started,
+    }
+    for phase, seconds in phases.items():
+        app_startup_seconds.observe(seconds, phase=phase)
+    logger.info(f"Aplicación lista en {sum(phases.values()):.3f}s", phases=phases)
+
+@app.on_event("shutdown")
+def shutdown_event():
+    # Escribir los registros de error pendientes antes de salir
+    error_log_writer.stop()
 
 # Routers
 app.include_router(auth.router,     prefix="/api/auth",     tags=["auth"])
@@ -61,6 +103,8 @@ app.include_router(employees.router, prefix="/api/employees", tags=["employees"]
 app.include_router(shifts.router,    prefix="/api/shifts",    tags=["shifts"])
 app.include_router(solver.router,    prefix="/api/solver",    tags=["solver"])
 app.include_router(reports.router,   prefix="/api/reports",   tags=["reports"])
+app.include_router(admin.router,     prefix="/api/admin",     tags=["admin"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
 
 @app.get("/")
 async def root():
@@ -70,6 +114,13 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métricas en formato de texto de Prometheus"""
+    return metrics_registry.render()
+
+IMPORT_COMPLETED = time.perf_counter()
+
 if __name__ == "__main__":
     import uvicorn
     # 👇 Imprescindible para Fly.io
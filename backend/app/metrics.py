@@ -0,0 +1,155 @@
+"""
+Métricas en memoria con exposición en formato de texto de Prometheus
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Tuple
+
+# Buckets por defecto (segundos)
+DEFAULT_TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Buckets para tamaños (variables, restricciones, conflictos...)
+DEFAULT_SIZE_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _format_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, buckets: Iterable[float] = DEFAULT_TIME_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[LabelKey, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [conteos por bucket..., suma, conteo total]
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for i, bound in enumerate(self.buckets):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {series[i]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return "\n".join(lines)
+
+class Counter:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._series: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._series.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines)
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def histogram(self, name: str, documentation: str, buckets: Iterable[float] = DEFAULT_TIME_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, documentation, buckets))
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, documentation))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+registry = MetricsRegistry()
+
+# Métricas del solver
+solver_phase_seconds = registry.histogram(
+    "solver_phase_seconds", "Duración de cada fase de una ejecución del solver"
+)
+solver_model_size = registry.histogram(
+    "solver_model_size", "Tamaño del modelo CP-SAT (variables, restricciones, tripletas elegibles)",
+    DEFAULT_SIZE_BUCKETS
+)
+solver_search_size = registry.histogram(
+    "solver_search_size", "Estadísticas de búsqueda de CP-SAT (conflictos, ramas)",
+    DEFAULT_SIZE_BUCKETS
+)
+solver_gap_ratio = registry.histogram(
+    "solver_gap_ratio", "Brecha relativa entre objetivo y mejor cota",
+    (0.0, 0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+solver_runs_total = registry.counter("solver_runs_total", "Ejecuciones del solver por estado final")
+
+# Arranque de la aplicación (importación y eventos de inicio)
+app_startup_seconds = registry.histogram(
+    "app_startup_seconds", "Duración del arranque por fase",
+    (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+)
+
+# Registro de errores (encolados, escritos, descartados, fallidos)
+error_logs_total = registry.counter("error_logs_total", "Registros de error por resultado")
+
+# Métricas de autenticación
+auth_verifications_total = registry.counter(
+    "auth_verifications_total", "Verificaciones de token por método (local, remote) y rechazos (rejected)"
+)
+
+class PhaseTimer:
+    """Acumula la duración de fases nombradas de un proceso"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+def observe_solver_run(status: str, phases: Dict[str, float], stats: Dict[str, Dict[str, float]]):
+    """
+    Registrar en las métricas globales los tiempos y estadísticas de una ejecución
+    """
+    solver_runs_total.inc(status=status)
+    for phase, seconds in phases.items():
+        solver_phase_seconds.observe(seconds, phase=phase)
+
+    for stat, value in (stats.get("model") or {}).items():
+        if value is not None:
+            solver_model_size.observe(value, stat=stat)
+
+    response = stats.get("response") or {}
+    for stat in ("conflicts", "branches"):
+        if response.get(stat) is not None:
+            solver_search_size.observe(response[stat], stat=stat)
+    if response.get("gap") is not None:
+        solver_gap_ratio.observe(response["gap"])
@@ -1,11 +1,15 @@
 """
 Modelos de datos para el sistema de turnos
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Float, ForeignKey, LargeBinary, Index, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
+# JSON nativo: JSONB en PostgreSQL, texto JSON en SQLite (None se guarda como NULL)
+JSONType = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
+
 class User(Base):
     __tablename__ = "users"
     
@@ -24,13 +28,23 @@ class Employee(Base):
     email = Column(String, unique=True, index=True)
     phone = Column(String)
     position = Column(String)
-    skills = Column(Text)  # JSON string
-    availability = Column(Text)  # JSON string
-    preferences = Column(Text)  # JSON string
+    site = Column(String)  # sede (agrupación de la optimización por lotes)
+    department = Column(String)
+    skills = Column(JSONType)  # lista de nombres (índice normalizado en employee_skills)
+    availability = Column(JSONType)
+    preferences = Column(JSONType)
     hourly_rate = Column(Float, default=0.0)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    # Índices para la paginación por cursor
+    __table_args__ = (
+        Index("ix_employees_active_id", "is_active", "id"),
+        Index("ix_employees_active_name_id", "is_active", "name", "id"),
+        # Búsqueda por puesto ordenada por nombre
+        Index("ix_employees_active_position_name_id", "is_active", "position", "name", "id"),
+    )
 
 class Shift(Base):
     __tablename__ = "shifts"
@@ -40,13 +54,50 @@ class Shift(Base):
     start_time = Column(String)  # "08:00"
     end_time = Column(String)    # "16:00"
     day_of_week = Column(Integer)  # 0-6 (lunes-domingo)
-    required_skills = Column(Text)  # JSON string
+    required_skills = Column(JSONType)  # lista de nombres (índice normalizado en shift_skills)
     min_employees = Column(Integer, default=1)
     max_employees = Column(Integer, default=1)
     cost_multiplier = Column(Float, default=1.0)
+    site = Column(String)  # sede (agrupación de la optimización por lotes)
+    department = Column(String)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    # Índices para la paginación por cursor
+    __table_args__ = (
+        Index("ix_shifts_active_id", "is_active", "id"),
+        Index("ix_shifts_active_day_id", "is_active", "day_of_week", "id"),
+        Index("ix_shifts_active_name_id", "is_active", "name", "id"),
+    )
+
+class Skill(Base):
+    __tablename__ = "skills"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+
+class EmployeeSkill(Base):
+    __tablename__ = "employee_skills"
+    
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True)
+    skill_id = Column(Integer, ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True)
+    
+    # Búsqueda inversa: empleados con una habilidad
+    __table_args__ = (
+        Index("ix_employee_skills_skill_employee", "skill_id", "employee_id"),
+    )
+
+class ShiftSkill(Base):
+    __tablename__ = "shift_skills"
+    
+    shift_id = Column(Integer, ForeignKey("shifts.id", ondelete="CASCADE"), primary_key=True)
+    skill_id = Column(Integer, ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True)
+    
+    __table_args__ = (
+        Index("ix_shift_skills_skill_shift", "skill_id", "shift_id"),
+    )
 
 class SolverRun(Base):
     __tablename__ = "solver_runs"
@@ -61,11 +112,26 @@ class SolverRun(Base):
     objective_value = Column(Float)
     solve_time = Column(Float)  # segundos
     assignments_count = Column(Integer, default=0)
+    phase_timings = Column(Text)  # JSON string: segundos por fase
+    solver_stats = Column(Text)  # JSON string: estadísticas del modelo y de CP-SAT
+    storage_mode = Column(String, default="rows")  # rows, packed, materialized
+    packed_assignments = Column(LargeBinary)  # Resultado compacto (modo packed)
+    # Optimización por lotes: el padre agrupa una ejecución hija por grupo
+    parent_run_id = Column(String, ForeignKey("solver_runs.run_id"), nullable=True)
+    group_by = Column(String)  # site, department (padre e hijas)
+    group_key = Column(String)  # valor del grupo de una ejecución hija
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relación con asignaciones
     assignments = relationship("Assignment", back_populates="solver_run")
+    
+    # Índices para la paginación por cursor
+    __table_args__ = (
+        Index("ix_solver_runs_created_id", "created_at", "id"),
+        Index("ix_solver_runs_status_created_id", "status", "created_at", "id"),
+        Index("ix_solver_runs_parent_created_id", "parent_run_id", "created_at", "id"),
+    )
 
 class Assignment(Base):
     __tablename__ = "assignments"
@@ -82,6 +148,44 @@ class Assignment(Base):
     solver_run = relationship("SolverRun", back_populates="assignments")
     employee = relationship("Employee")
     shift = relationship("Shift")
+    
+    # Índices para la paginación por cursor
+    __table_args__ = (
+        Index("ix_assignments_run_id", "solver_run_id", "id"),
+        Index("ix_assignments_run_date_id", "solver_run_id", "date", "id"),
+        # Calendario por empleado
+        Index("ix_assignments_run_employee_date", "solver_run_id", "employee_id", "date"),
+    )
+
+class ReportSummary(Base):
+    __tablename__ = "report_summaries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    solver_run_id = Column(Integer, ForeignKey("solver_runs.id"), unique=True, index=True)
+    total_assignments = Column(Integer, default=0)
+    total_hours = Column(Float, default=0.0)
+    total_cost = Column(Float, default=0.0)
+    required_slots = Column(Integer, default=0)  # suma de min_employees por turno y fecha
+    covered_slots = Column(Integer, default=0)  # puestos mínimos cubiertos
+    coverage_percentage = Column(Float, default=0.0)
+    understaffed_shifts = Column(Integer, default=0)  # turno/fecha bajo el mínimo
+    overstaffed_shifts = Column(Integer, default=0)  # turno/fecha sobre el máximo
+    slack_total = Column(Integer, default=0)  # puestos mínimos sin cubrir
+    hours_spread = Column(Float, default=0.0)  # máximo - mínimo de horas por empleado
+    hours_stddev = Column(Float, default=0.0)
+    employee_totals = Column(Text)  # JSON string: horas y costo por empleado
+    shift_coverage = Column(Text)  # JSON string: cobertura por turno y fecha
+    created_at = Column(DateTime, default=func.now())
+    
+    solver_run = relationship("SolverRun")
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+    
+    # Contador por caché; cada proceso compara su versión local con esta fila
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
 class ErrorLog(Base):
     __tablename__ = "error_logs"
@@ -92,3 +196,8 @@ class ErrorLog(Base):
     message = Column(Text)
     stack = Column(Text)
     created_at = Column(DateTime, default=func.now())
+    
+    # Errores de una ejecución, más recientes primero
+    __table_args__ = (
+        Index("ix_error_logs_run_created_id", "run_id", "created_at", "id"),
+    )
@@ -0,0 +1,109 @@
+"""
+Paginación por cursor (keyset) con orden estable
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Cursor opaco a partir de los valores de la clave de orden de la última fila"""
+    encoded = []
+    for value in values:
+        if isinstance(value, datetime):
+            encoded.append({"dt": value.isoformat()})
+        elif isinstance(value, date):
+            encoded.append({"d": value.isoformat()})
+        else:
+            encoded.append(value)
+    raw = json.dumps(encoded, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("tamaño de cursor inválido")
+        decoded = []
+        for value in values:
+            if isinstance(value, dict) and "dt" in value:
+                decoded.append(datetime.fromisoformat(value["dt"]))
+            elif isinstance(value, dict) and "d" in value:
+                decoded.append(date.fromisoformat(value["d"]))
+            else:
+                decoded.append(value)
+        return decoded
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+def parse_sort(sort: str, options: Dict[str, list]) -> Tuple[list, bool]:
+    """
+    Resolver `sort` ("campo" o "-campo") a las columnas de la clave de orden.
+    Cada opción debe terminar en una columna única (id) para que el orden sea estable.
+    """
+    descending = sort.startswith("-")
+    name = sort[1:] if descending else sort
+    if name not in options:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Orden inválido: {sort}. Opciones: {', '.join(sorted(options))}"
+        )
+    return options[name], descending
+
+def apply_keyset(stmt, options: Dict[str, list], sort: str, cursor: Optional[str], limit: Optional[int]):
+    """
+    Aplicar orden, condición de cursor y límite (+1 para detectar la página siguiente)
+    a un select() o Query. Devuelve (consulta, columnas de la clave de orden).
+    """
+    columns, descending = parse_sort(sort, options)
+
+    if cursor:
+        values = decode_cursor(cursor, len(columns))
+        key = tuple_(*columns)
+        stmt = stmt.where(key < tuple_(*values) if descending else key > tuple_(*values))
+
+    stmt = stmt.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt, columns
+
+def split_page(rows: list, columns: list, limit: Optional[int]):
+    """
+    Recortar el resultado de apply_keyset. Devuelve (filas, cursor_siguiente o None).
+    """
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], c.key) for c in columns])
+
+def keyset_paginate_list(items: List[Dict[str, Any]], key_fields: Sequence[str], descending: bool,
+                         cursor: Optional[str], limit: Optional[int]):
+    """
+    Equivalente en memoria de apply_keyset/split_page para listas de diccionarios
+    """
+    def key(item):
+        return tuple(item[f] for f in key_fields)
+
+    items = sorted(items, key=key, reverse=descending)
+    if cursor:
+        after = tuple(decode_cursor(cursor, len(key_fields)))
+        items = [i for i in items if (key(i) < after if descending else key(i) > after)]
+
+    if limit is None or len(items) <= limit:
+        return items, None
+    page = items[:limit]
+    return page, encode_cursor(key(page[-1]))
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    """Publicar el cursor de la página siguiente en la cabecera X-Next-Cursor"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,209 @@
+"""
+Vista imprimible del reporte: plantillas con streaming y caché en disco por contenido
+"""
+import hashlib
+import os
+import threading
+import uuid
+from html import escape
+from string import Template
+from typing import Iterator, List, Optional
+
+from app.schemas import ReportData
+
+PRINT_CACHE_DIR = os.getenv("PRINT_CACHE_DIR", "./print_cache")
+PRINT_CACHE_MAX_ENTRIES = int(os.getenv("PRINT_CACHE_MAX_ENTRIES", "200"))
+
+# Cambiar al modificar las plantillas para invalidar la caché
+TEMPLATE_VERSION = "1"
+
+# Estados que ya no cambian: su HTML se guarda en caché
+CACHEABLE_STATUSES = ("completed", "failed")
+
+# Filas de la tabla por bloque enviado
+ROWS_PER_CHUNK = 500
+
+HEADER_TEMPLATE = Template("""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <title>Reporte de Turnos - $run_id</title>
+        <style>
+            @media print {
+                body { margin: 0; }
+                .no-print { display: none; }
+            }
+            body { font-family: Arial, sans-serif; margin: 20px; }
+            .header { text-align: center; margin-bottom: 30px; }
+            .metrics { display: flex; justify-content: space-around; margin: 20px 0; }
+            .metric { text-align: center; }
+            .metric h3 { margin: 0; color: #2563eb; }
+            .metric p { margin: 5px 0; font-size: 18px; font-weight: bold; }
+            table { width: 100%; border-collapse: collapse; margin-top: 20px; }
+            th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+            th { background-color: #f8fafc; }
+            .status-completed { color: #059669; }
+            .status-failed { color: #dc2626; }
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h1>Sistema de Generación de Turnos</h1>
+            <h2>Reporte de Optimización</h2>
+            <p>ID de Ejecución: $run_id</p>
+            <p>Fecha: $created_at</p>
+        </div>
+
+        <div class="metrics">
+            <div class="metric">
+                <h3>Estado</h3>
+                <p class="status-$status">$status_label</p>
+            </div>
+            <div class="metric">
+                <h3>Asignaciones</h3>
+                <p>$total_assignments</p>
+            </div>
+            <div class="metric">
+                <h3>Tiempo (seg)</h3>
+                <p>$solve_time</p>
+            </div>
+            <div class="metric">
+                <h3>Cobertura</h3>
+                <p>$coverage</p>
+            </div>
+        </div>
+
+        <h3>Asignaciones de Turnos</h3>
+        <table>
+            <thead>
+                <tr>
+                    <th>Empleado</th>
+                    <th>Turno</th>
+                    <th>Fecha</th>
+                    <th>Estado</th>
+                </tr>
+            </thead>
+            <tbody>
+""")
+
+ROW_TEMPLATE = Template("""
+                <tr>
+                    <td>$employee_name</td>
+                    <td>$shift_name</td>
+                    <td>$date</td>
+                    <td>$status</td>
+                </tr>""")
+
+FOOTER_TEMPLATE = """
+            </tbody>
+        </table>
+
+        <div style="margin-top: 30px; text-align: center; color: #666;">
+            <p>Generado por Sistema de Generación de Turnos</p>
+            <p>Optimizado con Google OR-Tools CP-SAT</p>
+        </div>
+    </body>
+    </html>
+"""
+
+def _number(value, pattern: str) -> str:
+    return pattern.format(value) if value is not None else "-"
+
+def render_printable(report_data: ReportData) -> Iterator[str]:
+    """
+    Generar el HTML imprimible por bloques (encabezado, filas por lotes y pie)
+    """
+    run = report_data.solver_run
+    metrics = report_data.metrics
+    yield HEADER_TEMPLATE.substitute(
+        run_id=escape(run.run_id),
+        created_at=run.created_at.strftime('%d/%m/%Y %H:%M'),
+        status=escape(run.status),
+        status_label=escape(run.status.upper()),
+        total_assignments=metrics.get('total_assignments', 0),
+        solve_time=_number(metrics.get('solve_time'), "{:.2f}"),
+        coverage=_number(metrics.get('coverage_percentage'), "{:.1f}%"),
+    )
+
+    rows: List[str] = []
+    for assignment in report_data.assignments:
+        rows.append(ROW_TEMPLATE.substitute(
+            employee_name=escape(assignment.employee_name or 'N/A'),
+            shift_name=escape(assignment.shift_name or 'N/A'),
+            date=assignment.date.strftime('%d/%m/%Y'),
+            status=escape(assignment.status),
+        ))
+        if len(rows) >= ROWS_PER_CHUNK:
+            yield "".join(rows)
+            rows = []
+    if rows:
+        yield "".join(rows)
+
+    yield FOOTER_TEMPLATE
+
+def cache_key(run_id: str, status: str, updated_at) -> str:
+    """
+    Clave por contenido: el HTML solo depende de la ejecución, su estado, su
+    última modificación y la versión de las plantillas. Se usa también como ETag.
+    """
+    source = f"{run_id}:{status}:{updated_at.isoformat() if updated_at else ''}:{TEMPLATE_VERSION}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:32]
+
+class PrintCache:
+    """HTML renderizado en disco, un archivo por clave"""
+
+    def __init__(self, directory: str = PRINT_CACHE_DIR, max_entries: int = PRINT_CACHE_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.html")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.path(key)
+        return path if os.path.exists(path) else None
+
+    def write_through(self, key: str, chunks: Iterator[str]) -> Iterator[bytes]:
+        """
+        Reenviar los bloques codificados mientras se escriben a un archivo temporal;
+        el archivo solo pasa a la caché si el renderizado termina completo.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    data = chunk.encode("utf-8")
+                    f.write(data)
+                    yield data
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.prune()
+
+    def prune(self):
+        """Eliminar las entradas más antiguas sobre el límite"""
+        with self._lock:
+            if not os.path.isdir(self.directory):
+                return
+            entries = [
+                os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)
+                if name.endswith(".html")
+            ]
+            entries.sort(key=lambda p: os.stat(p).st_mtime, reverse=True)
+            for path in entries[self.max_entries:]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+cache = PrintCache()
+
+def encode_chunks(chunks: Iterator[str]) -> Iterator[bytes]:
+    for chunk in chunks:
+        yield chunk.encode("utf-8")
@@ -0,0 +1,176 @@
+"""
+Profiler por muestreo opcional para ejecuciones del solver y peticiones HTTP
+
+Los perfiles se guardan en formato "folded stacks" (compatible con flamegraph.pl,
+speedscope e inferno) identificados por run_id o request_id.
+"""
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Configuración de profiling
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.01"))  # segundos
+PROFILE_MAX_ENTRIES = int(os.getenv("PROFILE_MAX_ENTRIES", "50"))
+PROFILE_RETENTION_HOURS = float(os.getenv("PROFILE_RETENTION_HOURS", "24"))
+
+PROFILE_KINDS = ("solver", "request")
+_SAFE_KEY = re.compile(r"[^A-Za-z0-9_.-]")
+
+class SamplingProfiler:
+    """Muestrea periódicamente la pila de un hilo desde un hilo auxiliar"""
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples: Counter = Counter()
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started_at
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+class ProfileStore:
+    """Perfiles en disco con límite de cantidad y antigüedad"""
+
+    def __init__(self, directory: str = PROFILE_DIR, max_entries: int = PROFILE_MAX_ENTRIES,
+                 retention_hours: float = PROFILE_RETENTION_HOURS):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.retention_seconds = retention_hours * 3600
+        self._lock = threading.Lock()
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.directory, f"{kind}__{key}.folded")
+
+    def save(self, kind: str, key: str, content: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(kind, key)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        self.prune()
+        return path
+
+    def get(self, kind: str, key: str) -> Optional[str]:
+        path = self._path(kind, safe_key(key))
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def list(self) -> List[Dict]:
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".folded") or "__" not in name:
+                continue
+            kind, key = name[:-len(".folded")].split("__", 1)
+            stat = os.stat(os.path.join(self.directory, name))
+            profiles.append({
+                "kind": kind,
+                "key": key,
+                "size": stat.st_size,
+                "created_at": stat.st_mtime,
+            })
+        return sorted(profiles, key=lambda p: p["created_at"], reverse=True)
+
+    def prune(self):
+        """Eliminar perfiles vencidos y los más antiguos sobre el límite"""
+        with self._lock:
+            now = time.time()
+            for i, profile in enumerate(self.list()):
+                expired = now - profile["created_at"] > self.retention_seconds
+                if expired or i >= self.max_entries:
+                    try:
+                        os.remove(self._path(profile["kind"], profile["key"]))
+                    except FileNotFoundError:
+                        pass
+
+store = ProfileStore()
+
+def safe_key(key: str) -> str:
+    return _SAFE_KEY.sub("_", key)[:64]
+
+@contextmanager
+def profile(kind: str, key: str):
+    """
+    Perfilar el bloque y guardar el resultado en el almacén de perfiles
+    """
+    profiler = SamplingProfiler()
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        try:
+            store.save(kind, safe_key(key), profiler.folded())
+            logger.info(f"Perfil guardado: {kind}/{key} ({sum(profiler.samples.values())} muestras, {profiler.duration:.2f}s)")
+        except Exception as e:
+            logger.error(f"Error guardando perfil: {e}")
+
+class ProfilingMiddleware:
+    """
+    Perfila la petición cuando PROFILING_ENABLED=true y llega la cabecera X-Profile: 1.
+    El identificador del perfil se devuelve en la cabecera X-Profile-Id.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        if headers.get(b"x-profile", b"").lower() not in (b"1", b"true"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = safe_key(headers.get(b"x-request-id", b"").decode("latin-1") or uuid.uuid4().hex)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", f"request/{request_id}".encode("latin-1"))
+                ]
+            await send(message)
+
+        with profile("request", request_id):
+            await self.app(scope, receive, send_with_profile_id)
@@ -0,0 +1,143 @@
+"""
+Caché de datos de referencia: empleados y turnos activos ya procesados
+
+Cada proceso guarda una copia de los empleados y turnos activos lista para el
+solver y para los listados. Toda escritura incrementa un contador en la tabla
+`cache_versions` dentro de la misma transacción; los procesos comparan su versión
+local con esa fila (como máximo cada REFDATA_CHECK_INTERVAL segundos) y recargan
+si cambió, de modo que varios workers se invalidan entre sí.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import structlog
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import dashboard
+from app.models import CacheVersion, Employee, Shift
+from app.schemas import EmployeeResponse, ShiftResponse
+from app.skills import skill_masks
+
+logger = structlog.get_logger()
+
+REFERENCE_VERSION_KEY = "reference_data"
+# Segundos entre comprobaciones de la versión en la base de datos (0 = siempre)
+REFDATA_CHECK_INTERVAL = float(os.getenv("REFDATA_CHECK_INTERVAL", "2"))
+
+@dataclass
+class ReferenceData:
+    version: int
+    # Estructuras listas para el solver
+    employees: List[Dict[str, Any]] = field(default_factory=list)
+    shifts: List[Dict[str, Any]] = field(default_factory=list)
+    # Filas de respuesta de los listados (solo activos)
+    employee_records: List[Dict[str, Any]] = field(default_factory=list)
+    shift_records: List[Dict[str, Any]] = field(default_factory=list)
+
+def current_version(db: Session) -> int:
+    return db.scalar(select(CacheVersion.version).where(CacheVersion.name == REFERENCE_VERSION_KEY)) or 0
+
+def bump_version(db: Session):
+    """
+    Incrementar la versión de los datos de referencia (sin commit).
+    Se llama en la misma transacción que la escritura de empleados o turnos.
+    """
+    result = db.execute(
+        update(CacheVersion)
+        .where(CacheVersion.name == REFERENCE_VERSION_KEY)
+        .values(version=CacheVersion.version + 1)
+    )
+    if not result.rowcount:
+        db.add(CacheVersion(name=REFERENCE_VERSION_KEY, version=1))
+
+def solver_employee(employee: Employee, skill_mask: int = 0) -> Dict[str, Any]:
+    return {
+        'id': employee.id,
+        'name': employee.name,
+        'skills': employee.skills or [],
+        'skill_mask': skill_mask,
+        'availability': employee.availability or {},
+        'preferences': employee.preferences or {},
+        'hourly_rate': employee.hourly_rate,
+        'site': employee.site,
+        'department': employee.department
+    }
+
+def solver_shift(shift: Shift, skill_mask: int = 0) -> Dict[str, Any]:
+    return {
+        'id': shift.id,
+        'name': shift.name,
+        'start_time': shift.start_time,
+        'end_time': shift.end_time,
+        'day_of_week': shift.day_of_week,
+        'required_skills': shift.required_skills or [],
+        'skill_mask': skill_mask,
+        'min_employees': shift.min_employees,
+        'max_employees': shift.max_employees,
+        'cost_multiplier': shift.cost_multiplier,
+        'site': shift.site,
+        'department': shift.department
+    }
+
+def load_reference_data(db: Session, version: int) -> ReferenceData:
+    employees = db.scalars(select(Employee).where(Employee.is_active == True).order_by(Employee.id)).all()
+    shifts = db.scalars(select(Shift).where(Shift.is_active == True).order_by(Shift.id)).all()
+    # Máscaras de habilidades desde las tablas de enlace (mismos bits para ambos)
+    bits: Dict[int, int] = {}
+    employee_masks = skill_masks(db, Employee, bits)
+    shift_masks = skill_masks(db, Shift, bits)
+    return ReferenceData(
+        version=version,
+        employees=[solver_employee(e, employee_masks.get(e.id, 0)) for e in employees],
+        shifts=[solver_shift(s, shift_masks.get(s.id, 0)) for s in shifts],
+        employee_records=[EmployeeResponse.model_validate(e).model_dump() for e in employees],
+        shift_records=[ShiftResponse.model_validate(s).model_dump() for s in shifts],
+    )
+
+class ReferenceCache:
+    """Copia por proceso de los datos de referencia, recargada al cambiar la versión"""
+
+    def __init__(self, check_interval: float = REFDATA_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._data: Optional[ReferenceData] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> ReferenceData:
+        now = time.monotonic()
+        data = self._data
+        if data is not None and now - self._checked_at < self.check_interval:
+            return data
+
+        version = current_version(db)
+        if data is not None and data.version == version:
+            self._checked_at = now
+            return data
+
+        with self._lock:
+            # Otro hilo pudo recargar mientras se esperaba el lock
+            data = self._data
+            if data is None or data.version != version:
+                data = load_reference_data(db, version)
+                self._data = data
+                logger.info(f"Datos de referencia cargados (versión {version}): {len(data.employees)} empleados, {len(data.shifts)} turnos")
+            self._checked_at = now
+            return data
+
+    def invalidate(self):
+        """Descartar la copia local (tras un commit que incrementó la versión)"""
+        self._data = None
+
+cache = ReferenceCache()
+
+async def commit_reference_change(db: AsyncSession):
+    """Commit de una escritura de empleados o turnos, incrementando la versión"""
+    await db.run_sync(bump_version)
+    await db.commit()
+    cache.invalidate()
+    dashboard.invalidate()
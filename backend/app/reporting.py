@@ -0,0 +1,416 @@
+"""
+Cálculos de reportes (horas, costo y resumen por ejecución) y exportación en streaming
+"""
+import csv
+import importlib.util
+import io
+import json
+import os
+import statistics
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.bulk import as_datetime, chunked
+from app.models import Assignment, Employee, ReportSummary, Shift, SolverRun
+from app.results import Triple, day_offset, offset_date, is_packed, run_triples, unpack_triples
+
+# pyarrow es opcional y solo se importa al exportar Parquet (tarda en cargarse)
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# Filas por lote leídas del cursor del servidor y escritas por bloque de salida
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+EXPORT_COLUMNS = (
+    "assignment_id",
+    "date",
+    "employee_id",
+    "employee_name",
+    "shift_id",
+    "shift_name",
+    "start_time",
+    "end_time",
+    "hours",
+    "hourly_rate",
+    "cost_multiplier",
+    "cost",
+    "status",
+)
+
+def _minutes(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    hours, _, minutes = value.partition(":")
+    return int(hours) * 60 + int(minutes or 0)
+
+def shift_hours(start_time: Optional[str], end_time: Optional[str]) -> float:
+    """
+    Duración en horas de un turno "HH:MM"-"HH:MM". Si termina antes de empezar,
+    cruza la medianoche (turno nocturno).
+    """
+    start, end = _minutes(start_time), _minutes(end_time)
+    if start is None or end is None:
+        return 0.0
+    if end <= start:
+        end += 24 * 60
+    return (end - start) / 60
+
+def assignment_cost(hours: float, hourly_rate: Optional[float], cost_multiplier: Optional[float]) -> float:
+    """Costo de una asignación: horas × tarifa × multiplicador del turno"""
+    return hours * (hourly_rate or 0.0) * (1.0 if cost_multiplier is None else cost_multiplier)
+
+def export_row(
+    assignment_id: int,
+    date: datetime,
+    status: str,
+    employee: Tuple[int, Optional[str], Optional[float]],
+    shift: Tuple[int, Optional[str], Optional[str], Optional[str], Optional[float]]
+) -> tuple:
+    """Fila de exportación en el orden de EXPORT_COLUMNS"""
+    employee_id, employee_name, hourly_rate = employee
+    shift_id, shift_name, start_time, end_time, cost_multiplier = shift
+    hours = shift_hours(start_time, end_time)
+    return (
+        assignment_id, date, employee_id, employee_name, shift_id, shift_name,
+        start_time, end_time, hours, hourly_rate, cost_multiplier,
+        round(assignment_cost(hours, hourly_rate, cost_multiplier), 2), status,
+    )
+
+def run_dates(run: SolverRun) -> List[datetime]:
+    """Fechas del horizonte de la ejecución (según las restricciones enviadas al solver)"""
+    constraints = json.loads(run.constraints) if run.constraints else {}
+    start = as_datetime(constraints.get("start_date") or run.start_date)
+    end = as_datetime(constraints.get("end_date") or run.end_date)
+    dates = []
+    while start <= end:
+        dates.append(start)
+        start += timedelta(days=1)
+    return dates
+
+def build_run_summary(
+    run: SolverRun,
+    triples: Iterable[Triple],
+    employees: List[Dict[str, Any]],
+    shifts: List[Dict[str, Any]],
+    dates: List[datetime]
+) -> ReportSummary:
+    """
+    Resumen de una ejecución a partir de sus tripletas (día, empleado, turno):
+    horas y costo por empleado, cobertura frente a min/max por turno y fecha,
+    puestos sin cubrir y dispersión de horas entre empleados.
+    """
+    employees_by_id = {e["id"]: e for e in employees}
+    shifts_by_id = {s["id"]: s for s in shifts}
+    shift_durations = {s["id"]: shift_hours(s["start_time"], s["end_time"]) for s in shifts}
+
+    totals = {e["id"]: {"employee_id": e["id"], "employee_name": e["name"], "shifts": 0, "hours": 0.0, "cost": 0.0} for e in employees}
+    slots = Counter()
+    for day, employee_id, shift_id in triples:
+        slots[(shift_id, day)] += 1
+        employee = employees_by_id.get(employee_id, {})
+        shift = shifts_by_id.get(shift_id, {})
+        hours = shift_durations.get(shift_id, 0.0)
+        total = totals.setdefault(employee_id, {"employee_id": employee_id, "employee_name": employee.get("name"), "shifts": 0, "hours": 0.0, "cost": 0.0})
+        total["shifts"] += 1
+        total["hours"] += hours
+        total["cost"] += assignment_cost(hours, employee.get("hourly_rate"), shift.get("cost_multiplier"))
+
+    coverage = []
+    required = covered = understaffed = overstaffed = 0
+    for shift in shifts:
+        for date in dates:
+            if date.weekday() != shift["day_of_week"]:
+                continue
+            assigned = slots.get((shift["id"], day_offset(run, date)), 0)
+            minimum, maximum = shift["min_employees"] or 0, shift["max_employees"] or 0
+            required += minimum
+            covered += min(assigned, minimum)
+            understaffed += int(assigned < minimum)
+            overstaffed += int(assigned > maximum)
+            coverage.append({
+                "shift_id": shift["id"],
+                "shift_name": shift["name"],
+                "date": date.date().isoformat(),
+                "assigned": assigned,
+                "min_employees": minimum,
+                "max_employees": maximum,
+            })
+
+    for total in totals.values():
+        total["hours"] = round(total["hours"], 2)
+        total["cost"] = round(total["cost"], 2)
+    hours = [t["hours"] for t in totals.values()]
+
+    return ReportSummary(
+        solver_run_id=run.id,
+        total_assignments=sum(slots.values()),
+        total_hours=round(sum(hours), 2),
+        total_cost=round(sum(t["cost"] for t in totals.values()), 2),
+        required_slots=required,
+        covered_slots=covered,
+        coverage_percentage=round(covered / required * 100, 2) if required else 100.0,
+        understaffed_shifts=understaffed,
+        overstaffed_shifts=overstaffed,
+        slack_total=required - covered,
+        hours_spread=round(max(hours) - min(hours), 2) if hours else 0.0,
+        hours_stddev=round(statistics.pstdev(hours), 2) if hours else 0.0,
+        employee_totals=json.dumps(sorted(totals.values(), key=lambda t: t["employee_id"])),
+        shift_coverage=json.dumps(coverage),
+    )
+
+def save_run_summary(db: Session, summary: ReportSummary):
+    """Reemplazar el resumen de la ejecución (sin commit)"""
+    db.query(ReportSummary).filter(ReportSummary.solver_run_id == summary.solver_run_id).delete()
+    db.add(summary)
+
+def backfill_run_summary(db: Session, run: SolverRun) -> ReportSummary:
+    """
+    Calcular y guardar el resumen de una ejecución anterior a los resúmenes.
+    Usa los turnos y empleados actuales (activos o presentes en el resultado).
+    """
+    triples = run_triples(db, run)
+    employee_ids = {t[1] for t in triples}
+    shift_ids = {t[2] for t in triples}
+    employees = db.query(Employee.id, Employee.name, Employee.hourly_rate).filter(
+        (Employee.is_active == True) | Employee.id.in_(employee_ids)
+    ).all()
+    shifts = db.query(
+        Shift.id, Shift.name, Shift.start_time, Shift.end_time, Shift.day_of_week,
+        Shift.min_employees, Shift.max_employees, Shift.cost_multiplier
+    ).filter(
+        (Shift.is_active == True) | Shift.id.in_(shift_ids)
+    ).all()
+
+    summary = build_run_summary(
+        run, triples, [row._asdict() for row in employees], [row._asdict() for row in shifts], run_dates(run)
+    )
+    save_run_summary(db, summary)
+    db.commit()
+    return summary
+
+def diff_runs(db: Session, run_a: SolverRun, run_b: SolverRun, employee_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Diferencia entre dos ejecuciones por empleado y fecha, con operaciones de
+    conjuntos sobre las tripletas (fecha ordinal, empleado, turno):
+
+    - removed: asignaciones de A que no están en B
+    - added: asignaciones de B que no están en A
+    - moved: mismo empleado y fecha con otro turno (se emparejan en orden de turno)
+
+    El costo usa las tarifas actuales de empleados y turnos.
+    """
+    def absolute(run: SolverRun) -> set:
+        # Las ejecuciones pueden empezar en fechas distintas: día ordinal absoluto
+        base = run.start_date.date().toordinal()
+        return {
+            (base + day, emp_id, shift_id)
+            for day, emp_id, shift_id in run_triples(db, run)
+            if employee_id is None or emp_id == employee_id
+        }
+
+    before, after = absolute(run_a), absolute(run_b)
+    removed_all, added_all = before - after, after - before
+
+    removed_by: Dict[Tuple[int, int], List[int]] = {}
+    added_by: Dict[Tuple[int, int], List[int]] = {}
+    for day, emp_id, shift_id in removed_all:
+        removed_by.setdefault((day, emp_id), []).append(shift_id)
+    for day, emp_id, shift_id in added_all:
+        added_by.setdefault((day, emp_id), []).append(shift_id)
+
+    added, removed, moved = [], [], []
+    for key in removed_by.keys() | added_by.keys():
+        old, new = sorted(removed_by.get(key, ())), sorted(added_by.get(key, ()))
+        pairs = min(len(old), len(new))
+        moved.extend((*key, old[i], new[i]) for i in range(pairs))
+        removed.extend((*key, shift_id) for shift_id in old[pairs:])
+        added.extend((*key, shift_id) for shift_id in new[pairs:])
+
+    # Costo solo de lo que cambia (lo común se cancela)
+    changed = removed_all | added_all
+    employee_ids = {t[1] for t in changed}
+    shift_ids = {t[2] for t in changed}
+    rates = dict(db.query(Employee.id, Employee.hourly_rate).filter(Employee.id.in_(employee_ids)).all()) if employee_ids else {}
+    shifts = {
+        row.id: (shift_hours(row.start_time, row.end_time), row.cost_multiplier)
+        for row in db.query(Shift.id, Shift.start_time, Shift.end_time, Shift.cost_multiplier).filter(Shift.id.in_(shift_ids))
+    } if shift_ids else {}
+
+    def cost(triples: Iterable[Triple]) -> float:
+        total = 0.0
+        for _, emp_id, shift_id in triples:
+            hours, multiplier = shifts.get(shift_id, (0.0, None))
+            total += assignment_cost(hours, rates.get(emp_id), multiplier)
+        return total
+
+    def dated(rows: List[tuple]) -> List[tuple]:
+        return [(date.fromordinal(row[0]), *row[1:]) for row in sorted(rows)]
+
+    return {
+        "run_a": run_a.run_id,
+        "run_b": run_b.run_id,
+        "summary": {
+            "assignments_a": len(before),
+            "assignments_b": len(after),
+            "unchanged": len(before & after),
+            "added": len(added),
+            "removed": len(removed),
+            "moved": len(moved),
+            "employees_affected": len(employee_ids),
+            "cost_delta": round(cost(added_all) - cost(removed_all), 2),
+        },
+        "added": dated(added),
+        "removed": dated(removed),
+        "moved": dated(moved),
+    }
+
+_EMPLOYEE_COLUMNS = (Employee.id, Employee.name, Employee.hourly_rate)
+_SHIFT_COLUMNS = (Shift.id, Shift.name, Shift.start_time, Shift.end_time, Shift.cost_multiplier)
+
+async def iter_export_chunks(db: AsyncSession, run: SolverRun, chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[List[tuple]]:
+    """
+    Filas de exportación de una ejecución por lotes. En modo filas se leen con un
+    cursor del servidor (yield_per); en modo compacto se expanden las tripletas.
+    """
+    if is_packed(run):
+        triples = unpack_triples(run.packed_assignments)
+        employee_ids = {t[1] for t in triples}
+        shift_ids = {t[2] for t in triples}
+        employees = {row[0]: tuple(row) for row in await db.execute(select(*_EMPLOYEE_COLUMNS).where(Employee.id.in_(employee_ids)))} if employee_ids else {}
+        shifts = {row[0]: tuple(row) for row in await db.execute(select(*_SHIFT_COLUMNS).where(Shift.id.in_(shift_ids)))} if shift_ids else {}
+
+        for offset, chunk in enumerate(chunked(triples, chunk_size)):
+            yield [
+                export_row(
+                    offset * chunk_size + index + 1,
+                    offset_date(run, day),
+                    "assigned",
+                    employees.get(employee_id, (employee_id, None, None)),
+                    shifts.get(shift_id, (shift_id, None, None, None, None)),
+                )
+                for index, (day, employee_id, shift_id) in enumerate(chunk)
+            ]
+        return
+
+    stmt = select(
+        Assignment.id, Assignment.date, Assignment.status, Assignment.employee_id, Assignment.shift_id,
+        *_EMPLOYEE_COLUMNS[1:], *_SHIFT_COLUMNS[1:]
+    ).outerjoin(
+        Employee, Employee.id == Assignment.employee_id
+    ).outerjoin(
+        Shift, Shift.id == Assignment.shift_id
+    ).where(
+        Assignment.solver_run_id == run.id
+    ).order_by(Assignment.id).execution_options(yield_per=chunk_size)
+
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield [
+            export_row(
+                row[0], row[1], row[2],
+                (row[3], row[5], row[6]),
+                (row[4], row[7], row[8], row[9], row[10]),
+            )
+            for row in partition
+        ]
+
+def encode_csv(rows: Iterable[tuple], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow(value.isoformat() if isinstance(value, datetime) else value for value in row)
+    return buffer.getvalue().encode("utf-8")
+
+def encode_ndjson(rows: Iterable[tuple]) -> bytes:
+    return b"".join(orjson.dumps(dict(zip(EXPORT_COLUMNS, row))) + b"\n" for row in rows)
+
+class _ChunkSink:
+    """Archivo de solo escritura que acumula bytes hasta que se drenan"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.buffer += data
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+def _parquet_schema(pyarrow):
+    return pyarrow.schema([
+        ("assignment_id", pyarrow.int64()),
+        ("date", pyarrow.timestamp("us")),
+        ("employee_id", pyarrow.int64()),
+        ("employee_name", pyarrow.string()),
+        ("shift_id", pyarrow.int64()),
+        ("shift_name", pyarrow.string()),
+        ("start_time", pyarrow.string()),
+        ("end_time", pyarrow.string()),
+        ("hours", pyarrow.float64()),
+        ("hourly_rate", pyarrow.float64()),
+        ("cost_multiplier", pyarrow.float64()),
+        ("cost", pyarrow.float64()),
+        ("status", pyarrow.string()),
+    ])
+
+async def stream_export(db: AsyncSession, run: SolverRun, export_format: str) -> AsyncIterator[bytes]:
+    """
+    Bytes del archivo exportado, generados lote a lote (memoria constante).
+    En Parquet cada lote es un row group.
+    """
+    if export_format == "parquet":
+        import pyarrow
+        import pyarrow.parquet as pyarrow_parquet
+        schema = _parquet_schema(pyarrow)
+        sink = _ChunkSink()
+        writer = pyarrow_parquet.ParquetWriter(sink, schema, compression="zstd")
+        async for rows in iter_export_chunks(db, run):
+            columns = list(zip(*rows))
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+        return
+
+    header = True
+    if export_format == "csv":
+        async for rows in iter_export_chunks(db, run):
+            yield encode_csv(rows, header)
+            header = False
+        if header:
+            yield encode_csv([], header)
+        return
+
+    async for rows in iter_export_chunks(db, run):
+        yield encode_ndjson(rows)
@@ -0,0 +1,168 @@
+"""
+Respuestas de la API: JSON con orjson, MessagePack bajo demanda y compresión gzip/brotli
+"""
+import os
+from contextvars import ContextVar
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import msgpack
+import orjson
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import Response
+
+try:  # brotli es opcional: sin él se usa solo gzip
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Tamaño mínimo (bytes) para comprimir la respuesta
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+_wants_msgpack: ContextVar[bool] = ContextVar("wants_msgpack", default=False)
+
+def wants_msgpack() -> bool:
+    """Si la petición en curso negoció MessagePack"""
+    return _wants_msgpack.get()
+
+def _msgpack_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Tipo no serializable: {type(value)!r}")
+
+class APIResponse(Response):
+    """
+    Respuesta por defecto: JSON codificado con orjson, o MessagePack si el cliente
+    envió `Accept: application/msgpack`.
+    """
+    media_type = JSON_MEDIA_TYPE
+
+    def __init__(self, content=None, status_code=200, headers=None, media_type=None, background=None):
+        if media_type is None and _wants_msgpack.get():
+            media_type = MSGPACK_MEDIA_TYPE
+        super().__init__(content, status_code, headers, media_type, background)
+        self.headers.add_vary_header("Accept")
+
+    def render(self, content) -> bytes:
+        if self.media_type == MSGPACK_MEDIA_TYPE:
+            return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+class ContentNegotiationMiddleware:
+    """Registra si la petición acepta MessagePack para APIResponse"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = Headers(scope=scope).get("accept", "")
+        token = _wants_msgpack.set(MSGPACK_MEDIA_TYPE in accept)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _wants_msgpack.reset(token)
+
+class CompressionMiddleware:
+    """
+    Comprime respuestas mayores a COMPRESSION_MIN_SIZE: brotli si el cliente lo
+    acepta y está instalado, gzip en caso contrario.
+    """
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=GZIP_LEVEL)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+            if brotli is not None and "br" in accept_encoding:
+                responder = _BrotliResponder(self.app, self.minimum_size)
+                await responder(scope, receive, send)
+                return
+        await self.gzip(scope, receive, send)
+
+class _BrotliResponder:
+    def __init__(self, app, minimum_size: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.send = None
+        self.initial_message = {}
+        self.started = False
+        self.passthrough = False
+        self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_with_brotli)
+
+    def _set_encoding_headers(self, length=None):
+        headers = MutableHeaders(raw=self.initial_message["headers"])
+        headers["Content-Encoding"] = "br"
+        headers.add_vary_header("Accept-Encoding")
+        if length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(length)
+
+    async def send_with_brotli(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            # Respuestas ya codificadas o en streaming de eventos no se recomprimen
+            self.passthrough = (
+                "content-encoding" in headers
+                or headers.get("content-type", "").startswith("text/event-stream")
+            )
+            return
+
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.passthrough:
+            if not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        if not self.started:
+            self.started = True
+            if len(body) < self.minimum_size and not more_body:
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            if more_body:
+                self._set_encoding_headers()
+                message["body"] = self.compressor.process(body) + self.compressor.flush()
+            else:
+                compressed = self.compressor.process(body) + self.compressor.finish()
+                self._set_encoding_headers(len(compressed))
+                message["body"] = compressed
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        if more_body:
+            message["body"] = self.compressor.process(body) + self.compressor.flush()
+        else:
+            message["body"] = self.compressor.process(body) + self.compressor.finish()
+        await self.send(message)
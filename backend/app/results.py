@@ -0,0 +1,313 @@
+"""
+Almacenamiento de resultados del solver: filas en `assignments` o blob compacto en SolverRun
+
+En modo compacto ("packed") el resultado de una ejecución se guarda como tripletas
+ordenadas (día, empleado, turno) de enteros, en columnas y comprimidas con zlib.
+La expansión a asignaciones es transparente para los endpoints de lectura.
+"""
+import os
+import sys
+import zlib
+from bisect import bisect_left, bisect_right
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import delete, func, update
+from sqlalchemy.orm import Session
+
+from app.bulk import bulk_insert_assignments, as_datetime
+from app.http_cache import invalidate_run
+from app.models import Assignment, Employee, Shift, SolverRun
+from app.pagination import apply_keyset, keyset_paginate_list, parse_sort, split_page
+
+logger = structlog.get_logger()
+
+# rows: una fila por asignación; packed: blob compacto en SolverRun
+RESULT_STORAGE_MODE = os.getenv("RESULT_STORAGE_MODE", "rows")
+# Ejecuciones completadas con más antigüedad se compactan automáticamente (0 = nunca)
+RESULT_COMPACT_AFTER_DAYS = int(os.getenv("RESULT_COMPACT_AFTER_DAYS", "30"))
+RESULT_COMPACT_BATCH = int(os.getenv("RESULT_COMPACT_BATCH", "20"))
+
+STORAGE_ROWS = "rows"
+STORAGE_PACKED = "packed"
+STORAGE_MATERIALIZED = "materialized"  # expandida explícitamente: nunca se compacta
+
+PACK_FORMAT_VERSION = 1
+
+Triple = Tuple[int, int, int]  # (día desde start_date, employee_id, shift_id)
+
+def pack_triples(triples: Iterable[Triple]) -> bytes:
+    """
+    Serializar tripletas ordenadas en columnas (días, empleados, turnos) y comprimir
+    """
+    ordered = sorted(triples)
+    columns = array("i")
+    for i in range(3):
+        columns.extend(t[i] for t in ordered)
+    if sys.byteorder != "little":
+        columns.byteswap()
+    return bytes([PACK_FORMAT_VERSION]) + zlib.compress(columns.tobytes(), 6)
+
+def unpack_triples(blob: bytes) -> List[Triple]:
+    """Inversa de pack_triples"""
+    if not blob:
+        return []
+    if blob[0] != PACK_FORMAT_VERSION:
+        raise ValueError(f"Formato de resultado compacto no soportado: {blob[0]}")
+    columns = array("i")
+    columns.frombytes(zlib.decompress(blob[1:]))
+    if sys.byteorder != "little":
+        columns.byteswap()
+    n = len(columns) // 3
+    return list(zip(columns[:n], columns[n:2 * n], columns[2 * n:]))
+
+def day_offset(run: SolverRun, value) -> int:
+    return (as_datetime(value).date() - run.start_date.date()).days
+
+def offset_date(run: SolverRun, offset: int) -> datetime:
+    return run.start_date + timedelta(days=offset)
+
+def store_run_result(db: Session, run: SolverRun, assignments: List[Dict[str, Any]]):
+    """
+    Guardar el resultado del solver según RESULT_STORAGE_MODE (sin commit)
+    """
+    if RESULT_STORAGE_MODE == STORAGE_PACKED:
+        run.packed_assignments = pack_triples(
+            (day_offset(run, a["date"]), a["employee_id"], a["shift_id"]) for a in assignments
+        )
+        run.storage_mode = STORAGE_PACKED
+    else:
+        bulk_insert_assignments(db, run.id, assignments)
+        run.storage_mode = STORAGE_ROWS
+
+def is_packed(run: SolverRun) -> bool:
+    return run.storage_mode == STORAGE_PACKED
+
+# Claves de orden de asignaciones (terminan en id para un orden estable)
+ASSIGNMENT_SORT_FIELDS = {
+    "id": ["id"],
+    "date": ["date", "id"],
+}
+
+def _rows_query(db: Session, run: SolverRun):
+    """Consulta proyectada con los nombres (sin cargas perezosas por fila)"""
+    return db.query(
+        Assignment.id,
+        Assignment.employee_id,
+        Assignment.shift_id,
+        Assignment.date,
+        Assignment.status,
+        Employee.name.label("employee_name"),
+        Shift.name.label("shift_name"),
+    ).outerjoin(
+        Employee, Employee.id == Assignment.employee_id
+    ).outerjoin(
+        Shift, Shift.id == Assignment.shift_id
+    ).filter(
+        Assignment.solver_run_id == run.id
+    )
+
+def _packed_items(
+    db: Session,
+    run: SolverRun,
+    employee_id: Optional[int],
+    shift_id: Optional[int],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime]
+) -> List[Dict[str, Any]]:
+    """
+    Filtrar un resultado compacto antes de expandirlo. Las tripletas están ordenadas
+    por día, así que el rango de fechas se resuelve con búsqueda binaria.
+    """
+    triples = unpack_triples(run.packed_assignments)
+    lo, hi = 0, len(triples)
+    if date_from:
+        lo = bisect_left(triples, (day_offset(run, date_from),))
+    if date_to:
+        hi = bisect_right(triples, (day_offset(run, date_to), sys.maxsize, sys.maxsize))
+
+    selected = []
+    for index in range(lo, hi):
+        day, emp_id, sh_id = triples[index]
+        if employee_id is not None and emp_id != employee_id:
+            continue
+        if shift_id is not None and sh_id != shift_id:
+            continue
+        date = offset_date(run, day)
+        if (date_from and date < date_from) or (date_to and date > date_to):
+            continue
+        selected.append((index + 1, date, emp_id, sh_id))
+
+    employee_ids = {s[2] for s in selected}
+    shift_ids = {s[3] for s in selected}
+    employee_names = dict(db.query(Employee.id, Employee.name).filter(Employee.id.in_(employee_ids)).all()) if employee_ids else {}
+    shift_names = dict(db.query(Shift.id, Shift.name).filter(Shift.id.in_(shift_ids)).all()) if shift_ids else {}
+
+    return [
+        {
+            "id": position,
+            "employee_id": emp_id,
+            "shift_id": sh_id,
+            "date": date,
+            "status": "assigned",
+            "employee_name": employee_names.get(emp_id),
+            "shift_name": shift_names.get(sh_id),
+        }
+        for position, date, emp_id, sh_id in selected
+    ]
+
+def load_run_assignments(db: Session, run: SolverRun) -> List[Dict[str, Any]]:
+    """
+    Asignaciones de una ejecución con nombres de empleado y turno, sin importar el modo.
+    En modo compacto el id es la posición (1..n) dentro del resultado ordenado.
+    """
+    if not is_packed(run):
+        rows = _rows_query(db, run).order_by(Assignment.id).all()
+        return [row._asdict() for row in rows]
+
+    return _packed_items(db, run, None, None, None, None)
+
+def run_triples(db: Session, run: SolverRun) -> List[Triple]:
+    """Tripletas (día, empleado, turno) de una ejecución, sin importar el modo"""
+    if is_packed(run):
+        return unpack_triples(run.packed_assignments)
+
+    rows = db.query(Assignment.date, Assignment.employee_id, Assignment.shift_id).filter(
+        Assignment.solver_run_id == run.id
+    ).all()
+    return [(day_offset(run, date), employee_id, shift_id) for date, employee_id, shift_id in rows]
+
+def page_run_assignments(
+    db: Session,
+    run: SolverRun,
+    employee_id: Optional[int] = None,
+    shift_id: Optional[int] = None,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    sort: str = "id",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+):
+    """
+    Página filtrada de asignaciones. Devuelve (asignaciones, cursor_siguiente o None).
+    Sin `limit` devuelve todas las que cumplen los filtros.
+    """
+    fields, descending = parse_sort(sort, ASSIGNMENT_SORT_FIELDS)
+
+    if not is_packed(run):
+        query = _rows_query(db, run)
+        if employee_id is not None:
+            query = query.filter(Assignment.employee_id == employee_id)
+        if shift_id is not None:
+            query = query.filter(Assignment.shift_id == shift_id)
+        if status:
+            query = query.filter(Assignment.status == status)
+        if date_from:
+            query = query.filter(Assignment.date >= date_from)
+        if date_to:
+            query = query.filter(Assignment.date <= date_to)
+
+        columns = {"id": Assignment.id, "date": Assignment.date}
+        options = {name: [columns[f] for f in key] for name, key in ASSIGNMENT_SORT_FIELDS.items()}
+        query, columns = apply_keyset(query, options, sort, cursor, limit)
+        rows, next_cursor = split_page(query.all(), columns, limit)
+        return [row._asdict() for row in rows], next_cursor
+
+    items = _packed_items(db, run, employee_id, shift_id, date_from, date_to)
+    return keyset_paginate_list(items, fields, descending, cursor, limit)
+
+def materialize_run(db: Session, run: SolverRun) -> int:
+    """
+    Expandir un resultado compacto a filas de `assignments` (sin commit).
+    Se usa antes de editar o confirmar asignaciones; la ejecución ya no se compacta.
+    """
+    if not is_packed(run):
+        run.storage_mode = STORAGE_MATERIALIZED
+        return 0
+
+    triples = unpack_triples(run.packed_assignments)
+    inserted = bulk_insert_assignments(
+        db,
+        run.id,
+        (
+            {"employee_id": employee_id, "shift_id": shift_id, "date": offset_date(run, day)}
+            for day, employee_id, shift_id in triples
+        )
+    )
+    run.packed_assignments = None
+    run.storage_mode = STORAGE_MATERIALIZED
+    return inserted
+
+def compact_run(db: Session, run: SolverRun) -> bool:
+    """
+    Compactar las filas de una ejecución completada si ninguna fue editada (sin commit).
+
+    La ejecución se reclama primero con un UPDATE condicionado a storage_mode='rows':
+    si otro proceso ya la compactó o materializó, el UPDATE no afecta filas y no se
+    toca nada (un segundo compactador leería cero filas y pisaría el blob).
+    Una ejecución editada queda como materializada y no se vuelve a evaluar.
+    """
+    if run.status != "completed":
+        return False
+
+    claimed = db.execute(
+        update(SolverRun)
+        .where(
+            SolverRun.id == run.id,
+            SolverRun.status == "completed",
+            (SolverRun.storage_mode == STORAGE_ROWS) | (SolverRun.storage_mode.is_(None))
+        )
+        .values(storage_mode=STORAGE_PACKED)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if claimed != 1:
+        return False
+
+    edited = db.query(func.count(Assignment.id)).filter(
+        Assignment.solver_run_id == run.id,
+        Assignment.status != "assigned"
+    ).scalar()
+    if edited:
+        run.storage_mode = STORAGE_MATERIALIZED
+        return False
+
+    rows = db.query(Assignment.date, Assignment.employee_id, Assignment.shift_id).filter(
+        Assignment.solver_run_id == run.id
+    ).all()
+    run.packed_assignments = pack_triples(
+        (day_offset(run, date), employee_id, shift_id) for date, employee_id, shift_id in rows
+    )
+    run.storage_mode = STORAGE_PACKED
+    db.execute(delete(Assignment).where(Assignment.solver_run_id == run.id))
+    return True
+
+def compact_old_runs(db: Session, older_than_days: int = RESULT_COMPACT_AFTER_DAYS, limit: int = RESULT_COMPACT_BATCH) -> int:
+    """
+    Compactar en lote las ejecuciones completadas más antiguas que `older_than_days`.
+    Varios solves pueden compactar a la vez: en PostgreSQL cada uno salta las
+    candidatas bloqueadas por otro (FOR UPDATE SKIP LOCKED) y compact_run reclama
+    cada ejecución antes de leer sus filas.
+    """
+    if older_than_days <= 0:
+        return 0
+
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+    runs = db.query(SolverRun).filter(
+        SolverRun.status == "completed",
+        (SolverRun.storage_mode == STORAGE_ROWS) | (SolverRun.storage_mode.is_(None)),
+        SolverRun.created_at < cutoff
+    ).order_by(SolverRun.created_at).limit(limit).with_for_update(skip_locked=True).all()
+
+    compacted = [run.run_id for run in runs if compact_run(db, run)]
+    db.commit()
+
+    # Los ids de asignación pasan a ser posicionales: descartar respuestas en caché
+    for run_id in compacted:
+        invalidate_run(run_id)
+
+    if compacted:
+        logger.info(f"Ejecuciones compactadas: {len(compacted)}")
+    return len(compacted)
@@ -0,0 +1,46 @@
+"""
+Router de administración (perfiles de rendimiento)
+"""
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import hmac
+import os
+import structlog
+
+from app import profiling
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Validar el token de administración (X-Admin-Token)
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Administración deshabilitada")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Token de administración inválido")
+
+@router.get("/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """
+    Listar perfiles guardados
+    """
+    return {"enabled": profiling.PROFILING_ENABLED, "profiles": profiling.store.list()}
+
+@router.get("/profiles/{kind}/{key}", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def get_profile(kind: str, key: str):
+    """
+    Obtener un perfil en formato folded stacks (flamegraph)
+    """
+    if kind not in profiling.PROFILE_KINDS:
+        raise HTTPException(status_code=404, detail="Tipo de perfil no encontrado")
+
+    content = profiling.store.get(kind, key)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+
+    return content
@@ -0,0 +1,32 @@
+"""
+Router para el resumen del dashboard
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.database import get_db
+from app import dashboard
+from app.schemas import DashboardSummary
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+@router.get("/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(
+    recent: int = Query(dashboard.DEFAULT_RECENT_RUNS, ge=0, le=dashboard.MAX_RECENT_RUNS),
+    trend: int = Query(dashboard.DEFAULT_TREND_RUNS, ge=0, le=dashboard.MAX_TREND_RUNS),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtener conteos, ejecuciones recientes y tendencia de cobertura (en caché)
+    """
+    try:
+        cached = dashboard.summary_cache.get((recent, trend))
+        if cached is not None:
+            return cached
+        return await db.run_sync(dashboard.get_summary, recent, trend)
+
+    except Exception as e:
+        logger.error(f"Error obteniendo resumen del dashboard: {e}")
+        raise HTTPException(status_code=500, detail="Error obteniendo resumen del dashboard")
@@ -1,64 +1,76 @@
 """
 Router para gestión de empleados
 """
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Literal, Optional
 import structlog
 
 from app.database import get_db
+from app import refdata
+from app.bulk import bulk_insert_rows, chunked, existing_values, read_bulk_rows, row_error, validate_rows
 from app.models import Employee
-from app.schemas import EmployeeCreate, EmployeeUpdate, EmployeeResponse
+from app.search import SEARCH_MAX_PAGE_SIZE, SEARCH_PAGE_SIZE, search_employees
+from app.skills import normalize_names, sync_skill_links, with_any_skill
+from app.schemas import (
+    BulkIds, BulkResult, EmployeeBulkUpdate, EmployeeCreate, EmployeeUpdate, EmployeeResponse
+)
+from app.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, apply_keyset, decode_cursor, encode_cursor, keyset_paginate_list,
+    parse_sort, set_next_cursor, split_page
+)
 
 logger = structlog.get_logger()
 router = APIRouter()
 
+# Claves de orden (terminan en id para un orden estable)
+EMPLOYEE_SORTS = {
+    "id": [Employee.id],
+    "name": [Employee.name, Employee.id],
+    "created_at": [Employee.created_at, Employee.id],
+}
+
+# Total de resultados de la búsqueda (sin cargar las filas)
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+# Campos con listas y diccionarios en celdas CSV
+LIST_FIELDS = ("skills",)
+DICT_FIELDS = ("availability", "preferences")
+
+def employee_values(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalizar los campos de entrada (habilidades sin espacios ni duplicados)"""
+    values = dict(data)
+    if "skills" in values:
+        values["skills"] = normalize_names(values["skills"])
+    return values
+
 @router.post("/", response_model=EmployeeResponse)
 async def create_employee(
     employee: EmployeeCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Crear nuevo empleado
     """
     try:
         # Verificar si el email ya existe
-        existing = db.query(Employee).filter(Employee.email == employee.email).first()
+        existing = await db.scalar(select(Employee).where(Employee.email == employee.email))
         if existing:
             raise HTTPException(status_code=400, detail="Email ya registrado")
         
         # Crear empleado
-        db_employee = Employee(
-            name=employee.name,
-            email=employee.email,
-            phone=employee.phone,
-            position=employee.position,
-            skills=','.join(employee.skills) if employee.skills else None,
-            availability=str(employee.availability) if employee.availability else None,
-            preferences=str(employee.preferences) if employee.preferences else None,
-            hourly_rate=employee.hourly_rate
-        )
+        db_employee = Employee(**employee_values(employee.model_dump()))
         
         db.add(db_employee)
-        db.commit()
-        db.refresh(db_employee)
+        await db.flush()
+        await db.run_sync(sync_skill_links, Employee, [{"id": db_employee.id, "skills": db_employee.skills}])
+        await refdata.commit_reference_change(db)
+        await db.refresh(db_employee)
         
         logger.info(f"Empleado creado: {db_employee.id}")
         
-        return EmployeeResponse(
-            id=db_employee.id,
-            name=db_employee.name,
-            email=db_employee.email,
-            phone=db_employee.phone,
-            position=db_employee.position,
-            skills=db_employee.skills.split(',') if db_employee.skills else [],
-            availability=db_employee.availability,
-            preferences=db_employee.preferences,
-            hourly_rate=db_employee.hourly_rate,
-            is_active=db_employee.is_active,
-            created_at=db_employee.created_at,
-            updated_at=db_employee.updated_at
-        )
+        return db_employee
         
     except HTTPException:
         raise
@@ -68,72 +80,249 @@ async def create_employee(
 
 @router.get("/", response_model=List[EmployeeResponse])
 async def get_employees(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     active_only: bool = True,
-    db: Session = Depends(get_db)
+    position: Optional[str] = None,
+    skill: Optional[List[str]] = Query(None),
+    sort: str = "id",
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Obtener lista de empleados
+    Obtener lista de empleados (paginada por cursor en X-Next-Cursor)
     """
     try:
-        query = db.query(Employee)
-        
         if active_only:
-            query = query.filter(Employee.is_active == True)
-        
-        employees = query.offset(skip).limit(limit).all()
-        
-        return [
-            EmployeeResponse(
-                id=emp.id,
-                name=emp.name,
-                email=emp.email,
-                phone=emp.phone,
-                position=emp.position,
-                skills=emp.skills.split(',') if emp.skills else [],
-                availability=emp.availability,
-                preferences=emp.preferences,
-                hourly_rate=emp.hourly_rate,
-                is_active=emp.is_active,
-                created_at=emp.created_at,
-                updated_at=emp.updated_at
-            )
-            for emp in employees
-        ]
+            # Activos: desde la caché de datos de referencia
+            data = await db.run_sync(refdata.cache.get)
+            records = data.employee_records
+            if position:
+                records = [r for r in records if r["position"] == position]
+            if skill:
+                wanted = set(skill)
+                records = [r for r in records if wanted.intersection(r["skills"])]
+            columns, descending = parse_sort(sort, EMPLOYEE_SORTS)
+            employees, next_cursor = keyset_paginate_list(records, [c.key for c in columns], descending, cursor, limit)
+            set_next_cursor(response, next_cursor)
+            return employees
+        
+        query = select(Employee)
+        
+        if position:
+            query = query.where(Employee.position == position)
         
+        if skill:
+            # Con al menos una de las habilidades (tablas de enlace indexadas)
+            query = query.where(with_any_skill(Employee, skill))
+        
+        query, columns = apply_keyset(query, EMPLOYEE_SORTS, sort, cursor, limit)
+        employees, next_cursor = split_page((await db.scalars(query)).all(), columns, limit)
+        set_next_cursor(response, next_cursor)
+        
+        return employees
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error obteniendo empleados: {e}")
         raise HTTPException(status_code=500, detail="Error obteniendo empleados")
 
+@router.get("/search", response_model=List[EmployeeResponse])
+async def search_employees_endpoint(
+    response: Response,
+    q: Optional[str] = Query(None, max_length=100),
+    skill: Optional[List[str]] = Query(None),
+    skill_match: Literal["any", "all"] = "any",
+    position: Optional[str] = None,
+    active: Optional[bool] = True,
+    cursor: Optional[str] = None,
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    with_count: bool = True,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Buscar empleados por prefijo de nombre o email (sin distinguir mayúsculas),
+    habilidades (cualquiera o todas), puesto y estado. Resultados por relevancia,
+    paginados por cursor (X-Next-Cursor) y con el total en X-Total-Count.
+    """
+    try:
+        query, count_query, key = search_employees(
+            db.bind.dialect.name, q, skill, skill_match == "all", position, active
+        )
+        
+        if with_count:
+            total = await db.scalar(count_query)
+            response.headers[TOTAL_COUNT_HEADER] = str(total)
+        
+        if cursor:
+            query = query.where(tuple_(*key) > tuple_(*decode_cursor(cursor, len(key))))
+        rows = (await db.execute(query.add_columns(*key).order_by(*key).limit(limit + 1))).all()
+        
+        if len(rows) > limit:
+            rows = rows[:limit]
+            set_next_cursor(response, encode_cursor(list(rows[-1][1:])))
+        
+        return [row[0] for row in rows]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error buscando empleados: {e}")
+        raise HTTPException(status_code=500, detail="Error buscando empleados")
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_employees(
+    request: Request,
+    atomic: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Importar empleados en lote: arreglo JSON o CSV (multipart, campo `file`).
+    Las filas inválidas o con email repetido se informan por fila; con `atomic`
+    cualquier error cancela toda la importación.
+    """
+    try:
+        rows = await read_bulk_rows(request, LIST_FIELDS, DICT_FIELDS)
+        valid, errors = validate_rows(rows, EmployeeCreate)
+        
+        # Unicidad de email: una consulta por lote y duplicados dentro de la petición
+        registered = await db.run_sync(existing_values, Employee.email, [e.email for _, e in valid])
+        first_row = {}
+        accepted = []
+        for row, employee in valid:
+            if employee.email in registered:
+                errors.append(row_error(row, "Email ya registrado", "email"))
+            elif employee.email in first_row:
+                errors.append(row_error(row, f"Email repetido (fila {first_row[employee.email]})", "email"))
+            else:
+                first_row[employee.email] = row
+                accepted.append(employee_values(employee.model_dump()))
+        
+        errors.sort(key=lambda e: e["row"])
+        if atomic and errors:
+            raise HTTPException(status_code=422, detail=errors)
+        
+        ids = await db.run_sync(bulk_insert_rows, Employee, accepted)
+        await db.run_sync(sync_skill_links, Employee, [{**row, "id": row_id} for row_id, row in zip(ids, accepted)])
+        await refdata.commit_reference_change(db)
+        created = len(ids)
+        
+        logger.info(f"Empleados importados: {created} de {len(rows)}")
+        
+        return {"processed": len(rows), "succeeded": created, "errors": errors}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error importando empleados: {e}")
+        raise HTTPException(status_code=500, detail="Error importando empleados")
+
+@router.patch("/bulk", response_model=BulkResult)
+async def bulk_update_employees(
+    request: Request,
+    atomic: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Actualizar empleados en lote: cada fila lleva `id` y los campos a cambiar
+    (arreglo JSON o CSV)
+    """
+    try:
+        rows = await read_bulk_rows(request, LIST_FIELDS, DICT_FIELDS)
+        valid, errors = validate_rows(rows, EmployeeBulkUpdate)
+        
+        ids = await db.run_sync(existing_values, Employee.id, [u.id for _, u in valid])
+        
+        # Emails nuevos: no pueden pertenecer a otro empleado ni repetirse en la petición
+        emails = {u.email for _, u in valid if u.email is not None}
+        owners = {}
+        for chunk in chunked(emails):
+            owners.update((await db.execute(select(Employee.email, Employee.id).where(Employee.email.in_(chunk)))).all())
+        
+        first_row = {}
+        changes = []
+        for row, employee_update in valid:
+            if employee_update.id not in ids:
+                errors.append(row_error(row, "Empleado no encontrado", "id"))
+                continue
+            email = employee_update.email
+            if email is not None:
+                if owners.get(email, employee_update.id) != employee_update.id:
+                    errors.append(row_error(row, "Email ya registrado", "email"))
+                    continue
+                if email in first_row:
+                    errors.append(row_error(row, f"Email repetido (fila {first_row[email]})", "email"))
+                    continue
+                first_row[email] = row
+            changes.append(employee_values(employee_update.model_dump(exclude_none=True)))
+        
+        errors.sort(key=lambda e: e["row"])
+        if atomic and errors:
+            raise HTTPException(status_code=422, detail=errors)
+        
+        # UPDATE por clave primaria en lotes (executemany); filas sin cambios se omiten
+        for chunk in chunked(c for c in changes if len(c) > 1):
+            await db.execute(update(Employee), chunk)
+        await db.run_sync(sync_skill_links, Employee, changes)
+        await refdata.commit_reference_change(db)
+        
+        logger.info(f"Empleados actualizados en lote: {len(changes)} de {len(rows)}")
+        
+        return {"processed": len(rows), "succeeded": len(changes), "errors": errors}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error actualizando empleados en lote: {e}")
+        raise HTTPException(status_code=500, detail="Error actualizando empleados")
+
+@router.post("/bulk/deactivate", response_model=BulkResult)
+async def bulk_deactivate_employees(
+    payload: BulkIds,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Desactivar empleados en lote (soft delete)
+    """
+    try:
+        ids = await db.run_sync(existing_values, Employee.id, payload.ids)
+        errors = [
+            row_error(row, "Empleado no encontrado", "id")
+            for row, employee_id in enumerate(payload.ids, start=1)
+            if employee_id not in ids
+        ]
+        
+        for chunk in chunked(ids):
+            await db.execute(update(Employee).where(Employee.id.in_(chunk)).values(is_active=False))
+        await refdata.commit_reference_change(db)
+        
+        logger.info(f"Empleados desactivados: {len(ids)}")
+        
+        return {"processed": len(payload.ids), "succeeded": len(ids), "errors": errors}
+        
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error desactivando empleados: {e}")
+        raise HTTPException(status_code=500, detail="Error desactivando empleados")
+
 @router.get("/{employee_id}", response_model=EmployeeResponse)
 async def get_employee(
     employee_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Obtener empleado por ID
     """
     try:
-        employee = db.query(Employee).filter(Employee.id == employee_id).first()
+        employee = await db.get(Employee, employee_id)
         
         if not employee:
             raise HTTPException(status_code=404, detail="Empleado no encontrado")
         
-        return EmployeeResponse(
-            id=employee.id,
-            name=employee.name,
-            email=employee.email,
-            phone=employee.phone,
-            position=employee.position,
-            skills=employee.skills.split(',') if employee.skills else [],
-            availability=employee.availability,
-            preferences=employee.preferences,
-            hourly_rate=employee.hourly_rate,
-            is_active=employee.is_active,
-            created_at=employee.created_at,
-            updated_at=employee.updated_at
-        )
+        return employee
         
     except HTTPException:
         raise
@@ -145,56 +334,29 @@ async def get_employee(
 async def update_employee(
     employee_id: int,
     employee_update: EmployeeUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Actualizar empleado
     """
     try:
-        employee = db.query(Employee).filter(Employee.id == employee_id).first()
+        employee = await db.get(Employee, employee_id)
         
         if not employee:
             raise HTTPException(status_code=404, detail="Empleado no encontrado")
         
-        # Actualizar campos
-        if employee_update.name is not None:
-            employee.name = employee_update.name
-        if employee_update.email is not None:
-            employee.email = employee_update.email
-        if employee_update.phone is not None:
-            employee.phone = employee_update.phone
-        if employee_update.position is not None:
-            employee.position = employee_update.position
-        if employee_update.skills is not None:
-            employee.skills = ','.join(employee_update.skills)
-        if employee_update.availability is not None:
-            employee.availability = str(employee_update.availability)
-        if employee_update.preferences is not None:
-            employee.preferences = str(employee_update.preferences)
-        if employee_update.hourly_rate is not None:
-            employee.hourly_rate = employee_update.hourly_rate
-        if employee_update.is_active is not None:
-            employee.is_active = employee_update.is_active
-        
-        db.commit()
-        db.refresh(employee)
+        # Actualizar campos enviados
+        values = employee_values(employee_update.model_dump(exclude_none=True))
+        for field, value in values.items():
+            setattr(employee, field, value)
+        await db.run_sync(sync_skill_links, Employee, [{"id": employee.id, **values}])
+        
+        await refdata.commit_reference_change(db)
+        await db.refresh(employee)
         
         logger.info(f"Empleado actualizado: {employee_id}")
         
-        return EmployeeResponse(
-            id=employee.id,
-            name=employee.name,
-            email=employee.email,
-            phone=employee.phone,
-            position=employee.position,
-            skills=employee.skills.split(',') if employee.skills else [],
-            availability=employee.availability,
-            preferences=employee.preferences,
-            hourly_rate=employee.hourly_rate,
-            is_active=employee.is_active,
-            created_at=employee.created_at,
-            updated_at=employee.updated_at
-        )
+        return employee
         
     except HTTPException:
         raise
@@ -205,19 +367,19 @@ async def update_employee(
 @router.delete("/{employee_id}")
 async def delete_employee(
     employee_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Eliminar empleado (soft delete)
     """
     try:
-        employee = db.query(Employee).filter(Employee.id == employee_id).first()
+        employee = await db.get(Employee, employee_id)
         
         if not employee:
             raise HTTPException(status_code=404, detail="Empleado no encontrado")
         
         employee.is_active = False
-        db.commit()
+        await refdata.commit_reference_change(db)
         
         logger.info(f"Empleado eliminado: {employee_id}")
         
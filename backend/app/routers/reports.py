@@ -1,77 +1,104 @@
 """
 Router para reportes y exportación
 """
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
+from typing import Optional
 import structlog
 
-from app.database import get_db
-from app.models import SolverRun, Assignment
-from app.schemas import ReportData, AssignmentResponse, SolverRunResponse
+from app.database import get_db, AsyncSessionLocal
+from app import http_cache, printview, reporting
+from app.models import ReportSummary, SolverRun
+from app.results import load_run_assignments
+from app.schemas import ReportData, ReportSummaryResponse
 
 logger = structlog.get_logger()
 router = APIRouter()
 
+HTML_MEDIA_TYPE = "text/html; charset=utf-8"
+
+REPORT_ADAPTER = TypeAdapter(ReportData)
+
+# Campos del resumen expuestos en `metrics` del reporte
+SUMMARY_METRICS = (
+    "total_assignments",
+    "total_hours",
+    "total_cost",
+    "required_slots",
+    "covered_slots",
+    "coverage_percentage",
+    "understaffed_shifts",
+    "overstaffed_shifts",
+    "slack_total",
+    "hours_spread",
+    "hours_stddev",
+)
+
+async def get_run_summary(db: AsyncSession, run: SolverRun):
+    """
+    Resumen precalculado de la ejecución. Las ejecuciones completadas antes de
+    existir los resúmenes se calculan y guardan en la primera lectura.
+    """
+    summary = await db.scalar(select(ReportSummary).where(ReportSummary.solver_run_id == run.id))
+    if summary is None and run.status == "completed":
+        summary = await db.run_sync(reporting.backfill_run_summary, run)
+    return summary
+
+async def build_report(db: AsyncSession, run: SolverRun) -> dict:
+    """
+    Datos del reporte: ejecución, asignaciones y métricas del resumen precalculado
+    """
+    assignments = await db.run_sync(load_run_assignments, run)
+    
+    summary = await get_run_summary(db, run)
+    metrics = {
+        'solve_time': run.solve_time,
+        'objective_value': run.objective_value,
+        'status': run.status
+    }
+    for field in SUMMARY_METRICS:
+        metrics[field] = getattr(summary, field) if summary else 0
+    
+    # Se validan directamente desde la fila ORM y los diccionarios
+    return {
+        "solver_run": run,
+        "assignments": assignments,
+        "metrics": metrics
+    }
+
 @router.get("/{run_id}", response_model=ReportData)
 async def get_report(
     run_id: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Obtener reporte completo de una ejecución
+    Obtener reporte completo de una ejecución (cacheable si está terminada)
     """
     try:
+        cached = http_cache.cached_response(request)
+        if cached:
+            return cached
+        
         # Obtener ejecución
-        run = db.query(SolverRun).filter(SolverRun.run_id == run_id).first()
+        run = await db.scalar(select(SolverRun).where(SolverRun.run_id == run_id))
         
         if not run:
             raise HTTPException(status_code=404, detail="Ejecución no encontrada")
         
-        # Obtener asignaciones
-        assignments = db.query(Assignment).filter(Assignment.solver_run_id == run.id).all()
-        
-        # Calcular métricas
-        metrics = {
-            'total_assignments': len(assignments),
-            'solve_time': run.solve_time,
-            'objective_value': run.objective_value,
-            'coverage_percentage': (len(assignments) / (run.assignments_count or 1)) * 100,
-            'status': run.status
-        }
-        
-        # Convertir asignaciones
-        assignments_response = [
-            AssignmentResponse(
-                id=assignment.id,
-                employee_id=assignment.employee_id,
-                shift_id=assignment.shift_id,
-                date=assignment.date,
-                status=assignment.status,
-                employee_name=assignment.employee.name if assignment.employee else None,
-                shift_name=assignment.shift.name if assignment.shift else None
-            )
-            for assignment in assignments
-        ]
-        
-        # Convertir ejecución
-        run_response = SolverRunResponse(
-            id=run.id,
-            run_id=run.run_id,
-            status=run.status,
-            start_date=run.start_date,
-            end_date=run.end_date,
-            objective_value=run.objective_value,
-            solve_time=run.solve_time,
-            assignments_count=run.assignments_count,
-            created_at=run.created_at
-        )
+        not_modified = http_cache.not_modified_response(request, run)
+        if not_modified:
+            return not_modified
         
-        return ReportData(
-            solver_run=run_response,
-            assignments=assignments_response,
-            metrics=metrics
-        )
+        report = await build_report(db, run)
+        
+        if http_cache.is_terminal(run):
+            return http_cache.cache_run_response(request, run, report, REPORT_ADAPTER)
+        
+        return report
         
     except HTTPException:
         raise
@@ -79,22 +106,67 @@ async def get_report(
         logger.error(f"Error obteniendo reporte: {e}")
         raise HTTPException(status_code=500, detail="Error obteniendo reporte")
 
-@router.get("/{run_id}/printview")
+@router.get("/{run_id}/summary", response_model=ReportSummaryResponse)
+async def get_report_summary(
+    run_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtener el resumen de una ejecución: costo y horas por empleado, cobertura
+    por turno y fecha, puestos sin cubrir y equidad
+    """
+    try:
+        run = await db.scalar(select(SolverRun).where(SolverRun.run_id == run_id))
+        
+        if not run:
+            raise HTTPException(status_code=404, detail="Ejecución no encontrada")
+        
+        summary = await get_run_summary(db, run)
+        if summary is None:
+            raise HTTPException(status_code=409, detail="La ejecución no está completada")
+        
+        return summary
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error obteniendo resumen: {e}")
+        raise HTTPException(status_code=500, detail="Error obteniendo resumen")
+
+@router.get("/{run_id}/printview", response_class=HTMLResponse)
 async def get_print_view(
     run_id: str,
-    db: Session = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Obtener vista imprimible del reporte
+    Obtener vista imprimible del reporte (text/html). Las ejecuciones terminadas
+    se sirven desde la caché en disco con ETag.
     """
     try:
-        # Obtener datos del reporte
-        report_data = await get_report(run_id, db)
+        run = await db.scalar(select(SolverRun).where(SolverRun.run_id == run_id))
+        
+        if not run:
+            raise HTTPException(status_code=404, detail="Ejecución no encontrada")
+        
+        key = printview.cache_key(run.run_id, run.status, run.updated_at)
+        cacheable = run.status in printview.CACHEABLE_STATUSES
+        headers = {"ETag": f'"{key}"'} if cacheable else {"Cache-Control": "no-store"}
         
-        # Generar HTML imprimible
-        html_content = generate_printable_html(report_data)
+        if cacheable:
+            if if_none_match and f'"{key}"' in if_none_match:
+                return Response(status_code=304, headers=headers)
+            
+            cached_path = printview.cache.get(key)
+            if cached_path:
+                return FileResponse(cached_path, media_type=HTML_MEDIA_TYPE, headers=headers)
         
-        return {"html": html_content}
+        # Obtener datos del reporte y generar el HTML por bloques
+        report_data = ReportData.model_validate(await build_report(db, run), from_attributes=True)
+        chunks = printview.render_printable(report_data)
+        body = printview.cache.write_through(key, chunks) if cacheable else printview.encode_chunks(chunks)
+        
+        return StreamingResponse(body, media_type=HTML_MEDIA_TYPE, headers=headers)
         
     except HTTPException:
         raise
@@ -102,94 +174,40 @@ async def get_print_view(
         logger.error(f"Error generando vista imprimible: {e}")
         raise HTTPException(status_code=500, detail="Error generando vista imprimible")
 
-def generate_printable_html(report_data: ReportData) -> str:
-    """
-    Generar HTML imprimible para el reporte
-    """
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <title>Reporte de Turnos - {report_data.solver_run.run_id}</title>
-        <style>
-            @media print {{
-                body {{ margin: 0; }}
-                .no-print {{ display: none; }}
-            }}
-            body {{ font-family: Arial, sans-serif; margin: 20px; }}
-            .header {{ text-align: center; margin-bottom: 30px; }}
-            .metrics {{ display: flex; justify-content: space-around; margin: 20px 0; }}
-            .metric {{ text-align: center; }}
-            .metric h3 {{ margin: 0; color: #2563eb; }}
-            .metric p {{ margin: 5px 0; font-size: 18px; font-weight: bold; }}
-            table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
-            th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-            th {{ background-color: #f8fafc; }}
-            .status-completed {{ color: #059669; }}
-            .status-failed {{ color: #dc2626; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>Sistema de Generación de Turnos</h1>
-            <h2>Reporte de Optimización</h2>
-            <p>ID de Ejecución: {report_data.solver_run.run_id}</p>
-            <p>Fecha: {report_data.solver_run.created_at.strftime('%d/%m/%Y %H:%M')}</p>
-        </div>
-        
-        <div class="metrics">
-            <div class="metric">
-                <h3>Estado</h3>
-                <p class="status-{report_data.solver_run.status}">{report_data.solver_run.status.upper()}</p>
-            </div>
-            <div class="metric">
-                <h3>Asignaciones</h3>
-                <p>{report_data.metrics['total_assignments']}</p>
-            </div>
-            <div class="metric">
-                <h3>Tiempo (seg)</h3>
-                <p>{report_data.metrics['solve_time']:.2f}</p>
-            </div>
-            <div class="metric">
-                <h3>Cobertura</h3>
-                <p>{report_data.metrics['coverage_percentage']:.1f}%</p>
-            </div>
-        </div>
-        
-        <h3>Asignaciones de Turnos</h3>
-        <table>
-            <thead>
-                <tr>
-                    <th>Empleado</th>
-                    <th>Turno</th>
-                    <th>Fecha</th>
-                    <th>Estado</th>
-                </tr>
-            </thead>
-            <tbody>
+@router.get("/{run_id}/export")
+async def export_report(
+    run_id: str,
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet)$"),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    
-    for assignment in report_data.assignments:
-        html += f"""
-                <tr>
-                    <td>{assignment.employee_name or 'N/A'}</td>
-                    <td>{assignment.shift_name or 'N/A'}</td>
-                    <td>{assignment.date.strftime('%d/%m/%Y')}</td>
-                    <td>{assignment.status}</td>
-                </tr>
-        """
-    
-    html += """
-            </tbody>
-        </table>
-        
-        <div style="margin-top: 30px; text-align: center; color: #666;">
-            <p>Generado por Sistema de Generación de Turnos</p>
-            <p>Optimizado con Google OR-Tools CP-SAT</p>
-        </div>
-    </body>
-    </html>
+    Exportar las asignaciones de una ejecución en streaming (CSV, NDJSON o Parquet)
+    con nombres, horas y costo por fila
     """
-    
-    return html
+    try:
+        run = await db.scalar(select(SolverRun).where(SolverRun.run_id == run_id))
+        
+        if not run:
+            raise HTTPException(status_code=404, detail="Ejecución no encontrada")
+        
+        if format == "parquet" and not reporting.PARQUET_AVAILABLE:
+            raise HTTPException(status_code=400, detail="Exportación Parquet no disponible (requiere pyarrow)")
+        
+        async def body():
+            # Sesión propia: la respuesta se sigue enviando después del handler
+            async with AsyncSessionLocal() as session:
+                async for chunk in reporting.stream_export(session, run, format):
+                    yield chunk
+        
+        filename = f"turnos_{run_id}.{format}"
+        return StreamingResponse(
+            body(),
+            media_type=reporting.EXPORT_FORMATS[format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exportando reporte: {e}")
+        raise HTTPException(status_code=500, detail="Error exportando reporte")
@@ -1,59 +1,61 @@
 """
 Router para gestión de turnos
 """
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
 import structlog
 
 from app.database import get_db
+from app import refdata
+from app.bulk import bulk_insert_rows, chunked, existing_values, read_bulk_rows, row_error, validate_rows
 from app.models import Shift
-from app.schemas import ShiftCreate, ShiftUpdate, ShiftResponse
+from app.skills import normalize_names, sync_skill_links, with_any_skill
+from app.schemas import BulkIds, BulkResult, ShiftBulkUpdate, ShiftCreate, ShiftUpdate, ShiftResponse
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, apply_keyset, keyset_paginate_list, parse_sort, set_next_cursor, split_page
 
 logger = structlog.get_logger()
 router = APIRouter()
 
+# Claves de orden (terminan en id para un orden estable)
+SHIFT_SORTS = {
+    "id": [Shift.id],
+    "name": [Shift.name, Shift.id],
+    "day_of_week": [Shift.day_of_week, Shift.id],
+}
+
+# Campos con listas en celdas CSV
+LIST_FIELDS = ("required_skills",)
+
+def shift_values(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalizar los campos de entrada (habilidades sin espacios ni duplicados)"""
+    values = dict(data)
+    if "required_skills" in values:
+        values["required_skills"] = normalize_names(values["required_skills"])
+    return values
+
 @router.post("/", response_model=ShiftResponse)
 async def create_shift(
     shift: ShiftCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Crear nuevo turno
     """
     try:
         # Crear turno
-        db_shift = Shift(
-            name=shift.name,
-            start_time=shift.start_time,
-            end_time=shift.end_time,
-            day_of_week=shift.day_of_week,
-            required_skills=','.join(shift.required_skills) if shift.required_skills else None,
-            min_employees=shift.min_employees,
-            max_employees=shift.max_employees,
-            cost_multiplier=shift.cost_multiplier
-        )
+        db_shift = Shift(**shift_values(shift.model_dump()))
         
         db.add(db_shift)
-        db.commit()
-        db.refresh(db_shift)
+        await db.flush()
+        await db.run_sync(sync_skill_links, Shift, [{"id": db_shift.id, "required_skills": db_shift.required_skills}])
+        await refdata.commit_reference_change(db)
+        await db.refresh(db_shift)
         
         logger.info(f"Turno creado: {db_shift.id}")
         
-        return ShiftResponse(
-            id=db_shift.id,
-            name=db_shift.name,
-            start_time=db_shift.start_time,
-            end_time=db_shift.end_time,
-            day_of_week=db_shift.day_of_week,
-            required_skills=db_shift.required_skills.split(',') if db_shift.required_skills else [],
-            min_employees=db_shift.min_employees,
-            max_employees=db_shift.max_employees,
-            cost_multiplier=db_shift.cost_multiplier,
-            is_active=db_shift.is_active,
-            created_at=db_shift.created_at,
-            updated_at=db_shift.updated_at
-        )
+        return db_shift
         
     except Exception as e:
         logger.error(f"Error creando turno: {e}")
@@ -61,72 +63,182 @@ async def create_shift(
 
 @router.get("/", response_model=List[ShiftResponse])
 async def get_shifts(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     active_only: bool = True,
-    db: Session = Depends(get_db)
+    day_of_week: Optional[int] = Query(None, ge=0, le=6),
+    skill: Optional[List[str]] = Query(None),
+    sort: str = "id",
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Obtener lista de turnos
+    Obtener lista de turnos (paginada por cursor en X-Next-Cursor)
     """
     try:
-        query = db.query(Shift)
-        
         if active_only:
-            query = query.filter(Shift.is_active == True)
-        
-        shifts = query.offset(skip).limit(limit).all()
-        
-        return [
-            ShiftResponse(
-                id=shift.id,
-                name=shift.name,
-                start_time=shift.start_time,
-                end_time=shift.end_time,
-                day_of_week=shift.day_of_week,
-                required_skills=shift.required_skills.split(',') if shift.required_skills else [],
-                min_employees=shift.min_employees,
-                max_employees=shift.max_employees,
-                cost_multiplier=shift.cost_multiplier,
-                is_active=shift.is_active,
-                created_at=shift.created_at,
-                updated_at=shift.updated_at
-            )
-            for shift in shifts
-        ]
+            # Activos: desde la caché de datos de referencia
+            data = await db.run_sync(refdata.cache.get)
+            records = data.shift_records
+            if day_of_week is not None:
+                records = [r for r in records if r["day_of_week"] == day_of_week]
+            if skill:
+                wanted = set(skill)
+                records = [r for r in records if wanted.intersection(r["required_skills"])]
+            columns, descending = parse_sort(sort, SHIFT_SORTS)
+            shifts, next_cursor = keyset_paginate_list(records, [c.key for c in columns], descending, cursor, limit)
+            set_next_cursor(response, next_cursor)
+            return shifts
+        
+        query = select(Shift)
+        
+        if day_of_week is not None:
+            query = query.where(Shift.day_of_week == day_of_week)
         
+        if skill:
+            # Con al menos una de las habilidades (tablas de enlace indexadas)
+            query = query.where(with_any_skill(Shift, skill))
+        
+        query, columns = apply_keyset(query, SHIFT_SORTS, sort, cursor, limit)
+        shifts, next_cursor = split_page((await db.scalars(query)).all(), columns, limit)
+        set_next_cursor(response, next_cursor)
+        
+        return shifts
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error obteniendo turnos: {e}")
         raise HTTPException(status_code=500, detail="Error obteniendo turnos")
 
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_shifts(
+    request: Request,
+    atomic: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Importar turnos en lote: arreglo JSON o CSV (multipart, campo `file`).
+    Con `atomic` cualquier fila inválida cancela toda la importación.
+    """
+    try:
+        rows = await read_bulk_rows(request, LIST_FIELDS)
+        valid, errors = validate_rows(rows, ShiftCreate)
+        
+        accepted = []
+        for row, shift in valid:
+            if shift.min_employees > shift.max_employees:
+                errors.append(row_error(row, "min_employees mayor que max_employees", "min_employees"))
+            else:
+                accepted.append(shift_values(shift.model_dump()))
+        
+        errors.sort(key=lambda e: e["row"])
+        if atomic and errors:
+            raise HTTPException(status_code=422, detail=errors)
+        
+        ids = await db.run_sync(bulk_insert_rows, Shift, accepted)
+        await db.run_sync(sync_skill_links, Shift, [{**row, "id": row_id} for row_id, row in zip(ids, accepted)])
+        await refdata.commit_reference_change(db)
+        created = len(ids)
+        
+        logger.info(f"Turnos importados: {created} de {len(rows)}")
+        
+        return {"processed": len(rows), "succeeded": created, "errors": errors}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error importando turnos: {e}")
+        raise HTTPException(status_code=500, detail="Error importando turnos")
+
+@router.patch("/bulk", response_model=BulkResult)
+async def bulk_update_shifts(
+    request: Request,
+    atomic: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Actualizar turnos en lote: cada fila lleva `id` y los campos a cambiar
+    (arreglo JSON o CSV)
+    """
+    try:
+        rows = await read_bulk_rows(request, LIST_FIELDS)
+        valid, errors = validate_rows(rows, ShiftBulkUpdate)
+        
+        ids = await db.run_sync(existing_values, Shift.id, [u.id for _, u in valid])
+        changes = []
+        for row, shift_update in valid:
+            if shift_update.id not in ids:
+                errors.append(row_error(row, "Turno no encontrado", "id"))
+            else:
+                changes.append(shift_values(shift_update.model_dump(exclude_none=True)))
+        
+        errors.sort(key=lambda e: e["row"])
+        if atomic and errors:
+            raise HTTPException(status_code=422, detail=errors)
+        
+        # UPDATE por clave primaria en lotes (executemany); filas sin cambios se omiten
+        for chunk in chunked(c for c in changes if len(c) > 1):
+            await db.execute(update(Shift), chunk)
+        await db.run_sync(sync_skill_links, Shift, changes)
+        await refdata.commit_reference_change(db)
+        
+        logger.info(f"Turnos actualizados en lote: {len(changes)} de {len(rows)}")
+        
+        return {"processed": len(rows), "succeeded": len(changes), "errors": errors}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error actualizando turnos en lote: {e}")
+        raise HTTPException(status_code=500, detail="Error actualizando turnos")
+
+@router.post("/bulk/deactivate", response_model=BulkResult)
+async def bulk_deactivate_shifts(
+    payload: BulkIds,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Desactivar turnos en lote (soft delete)
+    """
+    try:
+        ids = await db.run_sync(existing_values, Shift.id, payload.ids)
+        errors = [
+            row_error(row, "Turno no encontrado", "id")
+            for row, shift_id in enumerate(payload.ids, start=1)
+            if shift_id not in ids
+        ]
+        
+        for chunk in chunked(ids):
+            await db.execute(update(Shift).where(Shift.id.in_(chunk)).values(is_active=False))
+        await refdata.commit_reference_change(db)
+        
+        logger.info(f"Turnos desactivados: {len(ids)}")
+        
+        return {"processed": len(payload.ids), "succeeded": len(ids), "errors": errors}
+        
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error desactivando turnos: {e}")
+        raise HTTPException(status_code=500, detail="Error desactivando turnos")
+
 @router.get("/{shift_id}", response_model=ShiftResponse)
 async def get_shift(
     shift_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Obtener turno por ID
     """
     try:
-        shift = db.query(Shift).filter(Shift.id == shift_id).first()
+        shift = await db.get(Shift, shift_id)
         
         if not shift:
             raise HTTPException(status_code=404, detail="Turno no encontrado")
         
-        return ShiftResponse(
-            id=shift.id,
-            name=shift.name,
-            start_time=shift.start_time,
-            end_time=shift.end_time,
-            day_of_week=shift.day_of_week,
-            required_skills=shift.required_skills.split(',') if shift.required_skills else [],
-            min_employees=shift.min_employees,
-            max_employees=shift.max_employees,
-            cost_multiplier=shift.cost_multiplier,
-            is_active=shift.is_active,
-            created_at=shift.created_at,
-            updated_at=shift.updated_at
-        )
+        return shift
         
     except HTTPException:
         raise
@@ -138,56 +250,29 @@ async def get_shift(
 async def update_shift(
     shift_id: int,
     shift_update: ShiftUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Actualizar turno
     """
     try:
-        shift = db.query(Shift).filter(Shift.id == shift_id).first()
+        shift = await db.get(Shift, shift_id)
         
         if not shift:
             raise HTTPException(status_code=404, detail="Turno no encontrado")
         
-        # Actualizar campos
-        if shift_update.name is not None:
-            shift.name = shift_update.name
-        if shift_update.start_time is not None:
-            shift.start_time = shift_update.start_time
-        if shift_update.end_time is not None:
-            shift.end_time = shift_update.end_time
-        if shift_update.day_of_week is not None:
-            shift.day_of_week = shift_update.day_of_week
-        if shift_update.required_skills is not None:
-            shift.required_skills = ','.join(shift_update.required_skills)
-        if shift_update.min_employees is not None:
-            shift.min_employees = shift_update.min_employees
-        if shift_update.max_employees is not None:
-            shift.max_employees = shift_update.max_employees
-        if shift_update.cost_multiplier is not None:
-            shift.cost_multiplier = shift_update.cost_multiplier
-        if shift_update.is_active is not None:
-            shift.is_active = shift_update.is_active
-        
-        db.commit()
-        db.refresh(shift)
+        # Actualizar campos enviados
+        values = shift_values(shift_update.model_dump(exclude_none=True))
+        for field, value in values.items():
+            setattr(shift, field, value)
+        await db.run_sync(sync_skill_links, Shift, [{"id": shift.id, **values}])
+        
+        await refdata.commit_reference_change(db)
+        await db.refresh(shift)
         
         logger.info(f"Turno actualizado: {shift_id}")
         
-        return ShiftResponse(
-            id=shift.id,
-            name=shift.name,
-            start_time=shift.start_time,
-            end_time=shift.end_time,
-            day_of_week=shift.day_of_week,
-            required_skills=shift.required_skills.split(',') if shift.required_skills else [],
-            min_employees=shift.min_employees,
-            max_employees=shift.max_employees,
-            cost_multiplier=shift.cost_multiplier,
-            is_active=shift.is_active,
-            created_at=shift.created_at,
-            updated_at=shift.updated_at
-        )
+        return shift
         
     except HTTPException:
         raise
@@ -198,19 +283,19 @@ async def update_shift(
 @router.delete("/{shift_id}")
 async def delete_shift(
     shift_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Eliminar turno (soft delete)
     """
     try:
-        shift = db.query(Shift).filter(Shift.id == shift_id).first()
+        shift = await db.get(Shift, shift_id)
         
         if not shift:
             raise HTTPException(status_code=404, detail="Turno no encontrado")
         
         shift.is_active = False
-        db.commit()
+        await refdata.commit_reference_change(db)
         
         logger.info(f"Turno eliminado: {shift_id}")
         
@@ -1,26 +1,57 @@
 """
 Router para el solver de optimización de turnos
 """
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import TYPE_CHECKING, List, Optional
+from functools import partial
+import json
+import traceback
 import uuid
 import structlog
-from datetime import datetime
+from datetime import date, datetime, time
 
-from app.database import get_db, log_error
-from app.models import SolverRun, Assignment, Employee, Shift
-from app.schemas import SolverRunCreate, SolverRunResponse, AssignmentResponse
-from app.solver.cp_sat_solver import CPSatSolver
+from app.database import get_db, SessionLocal
+from app.error_log import log_error, writer as error_log_writer
+from app.models import ErrorLog, SolverRun
+from app.schemas import SolverRunCreate, SolverRunResponse, SolverBatchCreate, BatchRunResponse, AssignmentResponse, ErrorLogList, RunDiff
+from app.solver import capture as solver_capture
+from app.results import store_run_result, page_run_assignments, materialize_run, compact_old_runs, day_offset
+from app.reporting import build_run_summary, diff_runs, run_dates, save_run_summary
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, apply_keyset, set_next_cursor, split_page
+from app import http_cache
+from app.metrics import PhaseTimer, observe_solver_run
+from app import batch, dashboard, profiling, refdata
+
+if TYPE_CHECKING:
+    from app.solver.cp_sat_solver import CPSatSolver
 
 logger = structlog.get_logger()
 router = APIRouter()
 
+# Claves de orden del historial (terminan en id para un orden estable)
+RUN_SORTS = {
+    "created_at": [SolverRun.created_at, SolverRun.id],
+    "id": [SolverRun.id],
+}
+
+# Errores de una ejecución, más recientes primero
+ERROR_SORTS = {
+    "created_at": [ErrorLog.created_at, ErrorLog.id],
+}
+
+# Serialización de respuestas cacheables de ejecuciones terminadas
+RUN_ADAPTER = TypeAdapter(SolverRunResponse)
+ASSIGNMENTS_ADAPTER = TypeAdapter(List[AssignmentResponse])
+
 @router.post("/solve", response_model=SolverRunResponse)
 async def solve_shift_scheduling(
     constraints: SolverRunCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Iniciar proceso de optimización de turnos
@@ -30,7 +61,6 @@ async def solve_shift_scheduling(
         run_id = str(uuid.uuid4())
         
         # Crear registro de ejecución
-        import json
         solver_run = SolverRun(
             run_id=run_id,
             user_id=None,  # Temporalmente sin usuario
@@ -41,62 +71,151 @@ async def solve_shift_scheduling(
         )
         
         db.add(solver_run)
-        db.commit()
-        db.refresh(solver_run)
+        await db.commit()
+        await db.refresh(solver_run)
+        dashboard.invalidate()
+        
+        # Ejecutar solver en background (perfilado si se solicita)
+        task = execute_solver
+        if constraints.profile and profiling.PROFILING_ENABLED:
+            task = execute_solver_profiled
         
-        # Ejecutar solver en background
         background_tasks.add_task(
-            execute_solver,
+            task,
             run_id,
             constraints.constraints.dict(),
-            db
+            constraints.capture
         )
         
         logger.info(f"Solver iniciado: {run_id}")
         
-        return SolverRunResponse(
-            id=solver_run.id,
-            run_id=solver_run.run_id,
-            status=solver_run.status,
-            start_date=solver_run.start_date,
-            end_date=solver_run.end_date,
-            objective_value=solver_run.objective_value,
-            solve_time=solver_run.solve_time,
-            assignments_count=solver_run.assignments_count,
-            created_at=solver_run.created_at
-        )
+        return solver_run
         
     except Exception as e:
         logger.error(f"Error iniciando solver: {e}")
         raise HTTPException(status_code=500, detail="Error iniciando optimización")
 
+@router.post("/batch", response_model=BatchRunResponse)
+async def solve_batch(
+    batch_run: SolverBatchCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Iniciar una optimización por lotes: una ejecución hija por sede o departamento,
+    resueltas en paralelo bajo una ejecución padre
+    """
+    try:
+        reference = await db.run_sync(refdata.cache.get)
+        groups = batch.partition(reference, batch_run.group_by)
+        if batch_run.groups is not None:
+            groups = {key: members for key, members in groups.items() if key in batch_run.groups}
+        # Los grupos sin turnos no tienen nada que programar
+        keys = sorted((key for key, (_, shifts) in groups.items() if shifts), key=lambda k: (k is None, k or ""))
+        if not keys:
+            raise HTTPException(status_code=400, detail="No hay grupos con turnos para optimizar")
+        
+        constraints = json.dumps(batch_run.constraints.dict(), default=str)
+        run_fields = {
+            "user_id": None,  # Temporalmente sin usuario
+            "start_date": batch_run.constraints.start_date,
+            "end_date": batch_run.constraints.end_date,
+            "constraints": constraints,
+            "group_by": batch_run.group_by,
+        }
+        parent = SolverRun(run_id=str(uuid.uuid4()), status="running", **run_fields)
+        children = [
+            SolverRun(run_id=str(uuid.uuid4()), status="pending", parent_run_id=parent.run_id, group_key=key, **run_fields)
+            for key in keys
+        ]
+        
+        db.add(parent)
+        db.add_all(children)
+        await db.commit()
+        dashboard.invalidate()
+        
+        batch.submit_batch(
+            parent.run_id,
+            [child.run_id for child in children],
+            partial(
+                execute_solver,
+                constraints=batch_run.constraints.dict(),
+                capture=batch_run.capture,
+                num_workers=batch.BATCH_SOLVER_WORKERS
+            )
+        )
+        
+        logger.info(f"Lote iniciado: {parent.run_id} ({len(children)} grupos por {batch_run.group_by})")
+        
+        return {"run": parent, "progress": batch.progress(children), "children": children}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error iniciando lote: {e}")
+        raise HTTPException(status_code=500, detail="Error iniciando optimización por lotes")
+
+@router.get("/batch/{run_id}", response_model=BatchRunResponse)
+async def get_solver_batch(
+    run_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtener estado agregado y progreso de un lote con sus ejecuciones hijas
+    """
+    try:
+        run = await db.scalar(select(SolverRun).where(SolverRun.run_id == run_id))
+        
+        if not run or not run.group_by or run.parent_run_id:
+            raise HTTPException(status_code=404, detail="Lote no encontrado")
+        
+        children = (await db.scalars(
+            select(SolverRun).where(SolverRun.parent_run_id == run_id).order_by(SolverRun.group_key, SolverRun.id)
+        )).all()
+        
+        return {"run": run, "progress": batch.progress(children), "children": children}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error obteniendo lote: {e}")
+        raise HTTPException(status_code=500, detail="Error obteniendo lote")
+
 @router.get("/runs", response_model=List[SolverRunResponse])
 async def get_solver_runs(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    parent_run_id: Optional[str] = None,
+    sort: str = "-created_at",
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Obtener historial de ejecuciones del solver
+    Obtener historial de ejecuciones del solver (paginado por cursor en X-Next-Cursor).
+    Las ejecuciones hijas de un lote solo se listan filtrando por `parent_run_id`.
     """
     try:
-        runs = db.query(SolverRun).offset(skip).limit(limit).all()
-        
-        return [
-            SolverRunResponse(
-                id=run.id,
-                run_id=run.run_id,
-                status=run.status,
-                start_date=run.start_date,
-                end_date=run.end_date,
-                objective_value=run.objective_value,
-                solve_time=run.solve_time,
-                assignments_count=run.assignments_count,
-                created_at=run.created_at
-            )
-            for run in runs
-        ]
+        query = select(SolverRun).where(
+            SolverRun.parent_run_id == parent_run_id if parent_run_id else SolverRun.parent_run_id.is_(None)
+        )
+        
+        if status:
+            query = query.where(SolverRun.status == status)
+        if created_from:
+            query = query.where(SolverRun.created_at >= created_from)
+        if created_to:
+            query = query.where(SolverRun.created_at <= created_to)
         
+        query, columns = apply_keyset(query, RUN_SORTS, sort, cursor, limit)
+        runs, next_cursor = split_page((await db.scalars(query)).all(), columns, limit)
+        set_next_cursor(response, next_cursor)
+        
+        return runs
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error obteniendo runs: {e}")
         raise HTTPException(status_code=500, detail="Error obteniendo ejecuciones")
@@ -104,28 +223,26 @@ async def get_solver_runs(
 @router.get("/runs/{run_id}", response_model=SolverRunResponse)
 async def get_solver_run(
     run_id: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Obtener detalles de una ejecución específica
+    Obtener detalles de una ejecución específica (cacheable si está terminada)
     """
     try:
-        run = db.query(SolverRun).filter(SolverRun.run_id == run_id).first()
+        cached = http_cache.cached_response(request)
+        if cached:
+            return cached
+        
+        run = await db.scalar(select(SolverRun).where(SolverRun.run_id == run_id))
         
         if not run:
             raise HTTPException(status_code=404, detail="Ejecución no encontrada")
         
-        return SolverRunResponse(
-            id=run.id,
-            run_id=run.run_id,
-            status=run.status,
-            start_date=run.start_date,
-            end_date=run.end_date,
-            objective_value=run.objective_value,
-            solve_time=run.solve_time,
-            assignments_count=run.assignments_count,
-            created_at=run.created_at
-        )
+        if http_cache.is_terminal(run):
+            return http_cache.cache_run_response(request, run, run, RUN_ADAPTER)
+        
+        return run
         
     except HTTPException:
         raise
@@ -136,31 +253,54 @@ async def get_solver_run(
 @router.get("/runs/{run_id}/assignments", response_model=List[AssignmentResponse])
 async def get_solver_assignments(
     run_id: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE * 10),
+    employee_id: Optional[int] = None,
+    shift_id: Optional[int] = None,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    sort: str = "id",
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Obtener asignaciones de una ejecución específica
+    Obtener asignaciones de una ejecución específica.
+    Con `limit` se pagina por cursor (X-Next-Cursor); sin él se devuelven todas.
     """
     try:
-        run = db.query(SolverRun).filter(SolverRun.run_id == run_id).first()
+        cached = http_cache.cached_response(request)
+        if cached:
+            return cached
+        
+        run = await db.scalar(select(SolverRun).where(SolverRun.run_id == run_id))
         
         if not run:
             raise HTTPException(status_code=404, detail="Ejecución no encontrada")
         
-        assignments = db.query(Assignment).filter(Assignment.solver_run_id == run.id).all()
-        
-        return [
-            AssignmentResponse(
-                id=assignment.id,
-                employee_id=assignment.employee_id,
-                shift_id=assignment.shift_id,
-                date=assignment.date,
-                status=assignment.status,
-                employee_name=assignment.employee.name if assignment.employee else None,
-                shift_name=assignment.shift.name if assignment.shift else None
-            )
-            for assignment in assignments
-        ]
+        not_modified = http_cache.not_modified_response(request, run)
+        if not_modified:
+            return not_modified
+        
+        assignments, next_cursor = await db.run_sync(
+            page_run_assignments, run,
+            employee_id=employee_id,
+            shift_id=shift_id,
+            status=status,
+            date_from=date_from,
+            date_to=date_to,
+            sort=sort,
+            cursor=cursor,
+            limit=limit
+        )
+        
+        if http_cache.is_terminal(run):
+            headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+            return http_cache.cache_run_response(request, run, assignments, ASSIGNMENTS_ADAPTER, headers)
+        
+        set_next_cursor(response, next_cursor)
+        return assignments
         
     except HTTPException:
         raise
@@ -168,10 +308,142 @@ async def get_solver_assignments(
         logger.error(f"Error obteniendo asignaciones: {e}")
         raise HTTPException(status_code=500, detail="Error obteniendo asignaciones")
 
-async def execute_solver(run_id: str, constraints: dict, db: Session):
+@router.get("/runs/{run_id}/calendar", response_model=List[AssignmentResponse])
+async def get_solver_calendar(
+    run_id: str,
+    employee_id: Optional[int] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Ejecutar solver en background
+    Calendario de una ejecución: asignaciones por fecha, opcionalmente de un empleado
     """
+    try:
+        run = await db.scalar(select(SolverRun).where(SolverRun.run_id == run_id))
+        
+        if not run:
+            raise HTTPException(status_code=404, detail="Ejecución no encontrada")
+        
+        assignments, _ = await db.run_sync(
+            page_run_assignments, run,
+            employee_id=employee_id,
+            date_from=datetime.combine(date_from, time.min) if date_from else None,
+            date_to=datetime.combine(date_to, time.max) if date_to else None,
+            sort="date"
+        )
+        
+        return assignments
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error obteniendo calendario: {e}")
+        raise HTTPException(status_code=500, detail="Error obteniendo calendario")
+
+@router.get("/runs/{run_id}/by-date", response_model=List[AssignmentResponse])
+async def get_solver_assignments_by_date(
+    run_id: str,
+    day: date = Query(..., alias="date"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Quién trabaja en una fecha determinada
+    """
+    try:
+        run = await db.scalar(select(SolverRun).where(SolverRun.run_id == run_id))
+        
+        if not run:
+            raise HTTPException(status_code=404, detail="Ejecución no encontrada")
+        
+        assignments, _ = await db.run_sync(
+            page_run_assignments, run,
+            date_from=datetime.combine(day, time.min),
+            date_to=datetime.combine(day, time.max),
+            sort="date"
+        )
+        
+        return assignments
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error obteniendo asignaciones por fecha: {e}")
+        raise HTTPException(status_code=500, detail="Error obteniendo asignaciones por fecha")
+
+@router.get("/runs/{run_id}/diff/{other_run_id}", response_model=RunDiff)
+async def diff_solver_runs(
+    run_id: str,
+    other_run_id: str,
+    employee_id: Optional[int] = None,
+    summary_only: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Comparar dos ejecuciones completadas: asignaciones agregadas, eliminadas y
+    movidas de `run_id` a `other_run_id`, con conteos y diferencia de costo
+    """
+    try:
+        runs = {
+            run.run_id: run
+            for run in await db.scalars(select(SolverRun).where(SolverRun.run_id.in_([run_id, other_run_id])))
+        }
+        
+        for key in (run_id, other_run_id):
+            if key not in runs:
+                raise HTTPException(status_code=404, detail="Ejecución no encontrada")
+            if runs[key].status != "completed":
+                raise HTTPException(status_code=409, detail="La ejecución no está completada")
+        
+        diff = await db.run_sync(diff_runs, runs[run_id], runs[other_run_id], employee_id)
+        if summary_only:
+            diff.update(added=[], removed=[], moved=[])
+        
+        return diff
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error comparando ejecuciones: {e}")
+        raise HTTPException(status_code=500, detail="Error comparando ejecuciones")
+
+@router.post("/runs/{run_id}/materialize")
+async def materialize_solver_assignments(
+    run_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Expandir a filas el resultado compacto de una ejecución (antes de editar o confirmar)
+    """
+    try:
+        run = await db.scalar(select(SolverRun).where(SolverRun.run_id == run_id))
+        
+        if not run:
+            raise HTTPException(status_code=404, detail="Ejecución no encontrada")
+        
+        inserted = await db.run_sync(materialize_run, run)
+        await db.commit()
+        http_cache.invalidate_run(run_id)
+        
+        logger.info(f"Ejecución materializada: {run_id} ({inserted} asignaciones)")
+        
+        return {"message": "Ejecución materializada", "assignments": inserted}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error materializando ejecución: {e}")
+        raise HTTPException(status_code=500, detail="Error materializando ejecución")
+
+def execute_solver(run_id: str, constraints: dict, capture: bool = False, num_workers: Optional[int] = None):
+    """
+    Ejecutar solver en background.
+    Corre en el threadpool (no bloquea el event loop) con su propia sesión síncrona.
+    Las ejecuciones hijas de un lote solo usan los empleados y turnos de su grupo.
+    """
+    db = SessionLocal()
+    timer = PhaseTimer()
     try:
         logger.info(f"Ejecutando solver: {run_id}")
         
@@ -180,52 +452,38 @@ async def execute_solver(run_id: str, constraints: dict, db: Session):
         if run:
             run.status = "running"
             db.commit()
+            dashboard.invalidate()
         
-        # Obtener datos necesarios
-        employees = db.query(Employee).filter(Employee.is_active == True).all()
-        shifts = db.query(Shift).filter(Shift.is_active == True).all()
-        
-        # Convertir a diccionarios
-        employees_data = [
-            {
-                'id': emp.id,
-                'name': emp.name,
-                'skills': emp.skills.split(',') if emp.skills else [],
-                'availability': json.loads(emp.availability) if emp.availability else {},
-                'preferences': json.loads(emp.preferences) if emp.preferences else {},
-                'hourly_rate': emp.hourly_rate
-            }
-            for emp in employees
-        ]
-        
-        shifts_data = [
-            {
-                'id': shift.id,
-                'name': shift.name,
-                'start_time': shift.start_time,
-                'end_time': shift.end_time,
-                'day_of_week': shift.day_of_week,
-                'required_skills': shift.required_skills.split(',') if shift.required_skills else [],
-                'min_employees': shift.min_employees,
-                'max_employees': shift.max_employees,
-                'cost_multiplier': shift.cost_multiplier
-            }
-            for shift in shifts
-        ]
+        # Empleados y turnos activos ya procesados (caché de datos de referencia)
+        with timer.phase("load"):
+            reference = refdata.cache.get(db)
+            employees_data = reference.employees
+            shifts_data = reference.shifts
+            if run and run.parent_run_id:
+                employees_data = batch.group_members(employees_data, run.group_by, run.group_key)
+                shifts_data = batch.group_members(shifts_data, run.group_by, run.group_key)
         
-        # Ejecutar solver
+        # Ejecutar solver (fases build, solve y extract); OR-Tools se importa en la primera ejecución
+        from app.solver.cp_sat_solver import CPSatSolver
         solver = CPSatSolver()
+        if num_workers:
+            solver.solver.parameters.num_workers = num_workers
         success, assignments, metrics = solver.solve_shift_scheduling(
             employees_data, shifts_data, constraints
         )
+        timer.phases.update(solver.timer.phases)
+        
+        # Capturar entradas para reproducir la ejecución offline
+        if solver_capture.capture_enabled(capture):
+            save_solver_capture(run_id, solver, employees_data, shifts_data, constraints)
         
         logger.info(f"Solver result: success={success}, assignments={len(assignments)}, metrics={metrics}")
         
-        # Actualizar resultado
+        # Actualizar resultado y guardar asignaciones en una sola transacción
         if run:
             if success:
                 run.status = "completed"
-                run.objective_value = metrics.get('objective_value', 0)
+                run.objective_value = metrics.get('objective', 0)
                 run.solve_time = metrics.get('solve_time', 0)
                 run.assignments_count = len(assignments)
             else:
@@ -236,58 +494,112 @@ async def execute_solver(run_id: str, constraints: dict, db: Session):
                 log_error(run_id, None, f"Solver failed: {error_message}")
             
             run.end_date = datetime.now()
-            db.commit()
             
-            # Guardar asignaciones
-            if success and assignments:
-                for assignment_data in assignments:
-                    assignment = Assignment(
-                        solver_run_id=run.id,
-                        employee_id=assignment_data['employee_id'],
-                        shift_id=assignment_data['shift_id'],
-                        date=assignment_data['date'],
-                        status='assigned'
-                    )
-                    db.add(assignment)
+            with timer.phase("persist"):
+                if success:
+                    store_run_result(db, run, assignments)
+                    
+                    # Resumen del reporte calculado una sola vez desde el resultado en memoria
+                    save_run_summary(db, build_run_summary(
+                        run,
+                        [(day_offset(run, a["date"]), a["employee_id"], a["shift_id"]) for a in assignments],
+                        employees_data,
+                        shifts_data,
+                        run_dates(run)
+                    ))
                 
+                run.solver_stats = json.dumps(solver.stats)
                 db.commit()
+
+            # Tiempos por fase, incluida la de persistencia (ya cerrada)
+            run.phase_timings = json.dumps(timer.phases)
+            db.commit()
+
+            observe_solver_run(run.status, timer.phases, solver.stats)
+            
+            # Compactar resultados antiguos no editados
+            try:
+                compact_old_runs(db)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error compactando ejecuciones: {e}")
         
-        logger.info(f"Solver completado: {run_id}, éxito: {success}")
+        logger.info(f"Solver completado: {run_id}, éxito: {success}", phases=timer.phases)
         
     except Exception as e:
         logger.error(f"Error ejecutando solver: {e}")
+        db.rollback()
         
         # Actualizar estado a "failed"
         run = db.query(SolverRun).filter(SolverRun.run_id == run_id).first()
         if run:
             run.status = "failed"
             run.end_date = datetime.now()
+            run.phase_timings = json.dumps(timer.phases)
             db.commit()
+            observe_solver_run(run.status, timer.phases, {})
             
             # Guardar error en logs
-            log_error(run_id, None, f"Error ejecutando solver: {str(e)}")
+            log_error(run_id, None, f"Error ejecutando solver: {str(e)}", traceback.format_exc())
+    
+    finally:
+        db.close()
+        # Estado final (completada o fallida) visible en el dashboard
+        dashboard.invalidate()
+
+def execute_solver_profiled(run_id: str, constraints: dict, capture: bool = False):
+    """
+    Ejecutar solver con el profiler por muestreo; el perfil se guarda con el run_id
+    """
+    with profiling.profile("solver", run_id):
+        execute_solver(run_id, constraints, capture)
+
+def save_solver_capture(run_id: str, solver: "CPSatSolver", employees_data: list, shifts_data: list, constraints: dict):
+    """
+    Guardar el paquete de entradas del solver; un fallo aquí no afecta la ejecución
+    """
+    try:
+        model_proto = None
+        if solver_capture.SOLVER_CAPTURE_MODEL_PROTO:
+            model_proto = solver.export_model_proto()
         
-@router.get("/runs/{run_id}/errors")
+        solver_capture.write_bundle(
+            run_id,
+            employees_data,
+            shifts_data,
+            constraints,
+            parameters=solver.parameters_text(),
+            model_proto=model_proto
+        )
+    except Exception as e:
+        logger.error(f"Error guardando captura del solver: {e}")
+
+@router.get("/runs/{run_id}/errors", response_model=ErrorLogList)
 async def get_solver_errors(
     run_id: str,
-    db: Session = Depends(get_db)
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Obtener errores de una ejecución específica
+    Obtener errores de una ejecución específica desde error_logs
+    (más recientes primero, paginados por cursor en X-Next-Cursor)
     """
     try:
-        # Obtener errores de la tabla error_logs
-        from app.database import supabase
+        # Escribir lo que aún esté en la cola para leer los errores recién registrados
+        if error_log_writer.pending():
+            await run_in_threadpool(error_log_writer.flush)
         
-        if supabase:
-            response = supabase.table('error_logs').select('*').eq('run_id', run_id).execute()
-            errors = response.data if response.data else []
-        else:
-            # Fallback: buscar en logs del sistema
-            errors = [{"message": "No se pudieron obtener los errores detallados", "created_at": datetime.now().isoformat()}]
+        query = select(ErrorLog).where(ErrorLog.run_id == run_id)
+        query, columns = apply_keyset(query, ERROR_SORTS, "-created_at", cursor, limit)
+        errors, next_cursor = split_page((await db.scalars(query)).all(), columns, limit)
+        set_next_cursor(response, next_cursor)
         
         return {"errors": errors}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error obteniendo errores: {e}")
-        return {"errors": [{"message": f"Error obteniendo logs: {str(e)}", "created_at": datetime.now().isoformat()}]}
+        raise HTTPException(status_code=500, detail="Error obteniendo errores")
@@ -1,9 +1,10 @@
 """
 Esquemas Pydantic para validación de datos
 """
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, field_validator
+from typing import Optional, List, Dict, Any, Literal, Tuple
+from datetime import date, datetime
+import json
 
 # Esquemas de Usuario
 class UserBase(BaseModel):
@@ -27,6 +28,8 @@ class EmployeeBase(BaseModel):
     email: EmailStr
     phone: Optional[str] = None
     position: Optional[str] = None
+    site: Optional[str] = None
+    department: Optional[str] = None
     skills: Optional[List[str]] = []
     availability: Optional[Dict[str, Any]] = {}
     preferences: Optional[Dict[str, Any]] = {}
@@ -40,6 +43,8 @@ class EmployeeUpdate(BaseModel):
     email: Optional[EmailStr] = None
     phone: Optional[str] = None
     position: Optional[str] = None
+    site: Optional[str] = None
+    department: Optional[str] = None
     skills: Optional[List[str]] = None
     availability: Optional[Dict[str, Any]] = None
     preferences: Optional[Dict[str, Any]] = None
@@ -54,6 +59,15 @@ class EmployeeResponse(EmployeeBase):
     
     class Config:
         from_attributes = True
+    
+    # Se valida directamente desde la fila ORM (columnas JSON, NULL -> lista vacía)
+    @field_validator("skills", mode="before")
+    @classmethod
+    def parse_skills(cls, value):
+        return value or []
+
+class EmployeeBulkUpdate(EmployeeUpdate):
+    id: int
 
 # Esquemas de Turno
 class ShiftBase(BaseModel):
@@ -65,6 +79,8 @@ class ShiftBase(BaseModel):
     min_employees: int = 1
     max_employees: int = 1
     cost_multiplier: float = 1.0
+    site: Optional[str] = None
+    department: Optional[str] = None
 
 class ShiftCreate(ShiftBase):
     pass
@@ -78,6 +94,8 @@ class ShiftUpdate(BaseModel):
     min_employees: Optional[int] = None
     max_employees: Optional[int] = None
     cost_multiplier: Optional[float] = None
+    site: Optional[str] = None
+    department: Optional[str] = None
     is_active: Optional[bool] = None
 
 class ShiftResponse(ShiftBase):
@@ -88,6 +106,28 @@ class ShiftResponse(ShiftBase):
     
     class Config:
         from_attributes = True
+    
+    @field_validator("required_skills", mode="before")
+    @classmethod
+    def parse_required_skills(cls, value):
+        return value or []
+
+class ShiftBulkUpdate(ShiftUpdate):
+    id: int
+
+# Esquemas de operaciones masivas
+class BulkRowError(BaseModel):
+    row: int  # posición en la petición, desde 1
+    field: Optional[str] = None
+    message: str
+
+class BulkResult(BaseModel):
+    processed: int
+    succeeded: int
+    errors: List[BulkRowError] = []
+
+class BulkIds(BaseModel):
+    ids: List[int]
 
 # Esquemas de Solver
 class SolverConstraints(BaseModel):
@@ -100,6 +140,8 @@ class SolverConstraints(BaseModel):
 
 class SolverRunCreate(BaseModel):
     constraints: SolverConstraints
+    capture: bool = False  # Guardar entradas del solver para reproducir offline
+    profile: bool = False  # Perfilar la ejecución (requiere PROFILING_ENABLED)
 
 class SolverRunResponse(BaseModel):
     id: int
@@ -110,10 +152,42 @@ class SolverRunResponse(BaseModel):
     objective_value: Optional[float]
     solve_time: Optional[float]
     assignments_count: int
+    phase_timings: Optional[Dict[str, float]] = None
+    solver_stats: Optional[Dict[str, Any]] = None
+    parent_run_id: Optional[str] = None
+    group_by: Optional[str] = None
+    group_key: Optional[str] = None
     created_at: datetime
     
     class Config:
         from_attributes = True
+    
+    @field_validator("phase_timings", "solver_stats", mode="before")
+    @classmethod
+    def parse_json_text(cls, value):
+        # Se guardan como texto JSON en la base de datos
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+class SolverBatchCreate(BaseModel):
+    constraints: SolverConstraints
+    group_by: Literal["site", "department"]
+    groups: Optional[List[Optional[str]]] = None  # solo estos grupos (null = sin grupo)
+    capture: bool = False
+
+class BatchProgress(BaseModel):
+    total: int
+    pending: int
+    running: int
+    completed: int
+    failed: int
+    percent: float  # ejecuciones hijas terminadas
+
+class BatchRunResponse(BaseModel):
+    run: SolverRunResponse
+    progress: BatchProgress
+    children: List[SolverRunResponse] = []
 
 # Esquemas de Asignación
 class AssignmentResponse(BaseModel):
@@ -128,8 +202,113 @@ class AssignmentResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# Esquemas de registro de errores
+class ErrorLogResponse(BaseModel):
+    id: int
+    run_id: Optional[str] = None
+    user_id: Optional[str] = None
+    message: Optional[str] = None
+    stack: Optional[str] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class ErrorLogList(BaseModel):
+    errors: List[ErrorLogResponse] = []
+
 # Esquemas de Reporte
+class EmployeeTotal(BaseModel):
+    employee_id: int
+    employee_name: Optional[str] = None
+    shifts: int
+    hours: float
+    cost: float
+
+class ShiftCoverage(BaseModel):
+    shift_id: int
+    shift_name: Optional[str] = None
+    date: str
+    assigned: int
+    min_employees: int
+    max_employees: int
+
+class ReportSummaryResponse(BaseModel):
+    total_assignments: int
+    total_hours: float
+    total_cost: float
+    required_slots: int
+    covered_slots: int
+    coverage_percentage: float
+    understaffed_shifts: int
+    overstaffed_shifts: int
+    slack_total: int
+    hours_spread: float
+    hours_stddev: float
+    employee_totals: List[EmployeeTotal] = []
+    shift_coverage: List[ShiftCoverage] = []
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+    
+    @field_validator("employee_totals", "shift_coverage", mode="before")
+    @classmethod
+    def parse_json_text(cls, value):
+        if isinstance(value, str):
+            return json.loads(value)
+        return value or []
+
 class ReportData(BaseModel):
     solver_run: SolverRunResponse
     assignments: List[AssignmentResponse]
     metrics: Dict[str, Any]
+
+# Esquemas de comparación de ejecuciones
+class RunDiffSummary(BaseModel):
+    assignments_a: int
+    assignments_b: int
+    unchanged: int
+    added: int
+    removed: int
+    moved: int
+    employees_affected: int
+    cost_delta: float  # costo de B - costo de A
+
+class RunDiff(BaseModel):
+    run_a: str
+    run_b: str
+    summary: RunDiffSummary
+    added: List[Tuple[date, int, int]] = []  # (fecha, empleado, turno)
+    removed: List[Tuple[date, int, int]] = []
+    moved: List[Tuple[date, int, int, int]] = []  # (fecha, empleado, turno en A, turno en B)
+
+# Esquemas del dashboard
+class DashboardRun(BaseModel):
+    run_id: str
+    status: str
+    created_at: datetime
+    solve_time: Optional[float] = None
+    assignments_count: Optional[int] = 0
+    objective_value: Optional[float] = None
+    total_cost: Optional[float] = None
+    coverage_percentage: Optional[float] = None
+
+class CoveragePoint(BaseModel):
+    run_id: str
+    created_at: datetime
+    coverage_percentage: float
+    understaffed_shifts: int
+    total_cost: float
+
+class DashboardSummary(BaseModel):
+    active_employees: int
+    active_shifts: int
+    runs_by_status: Dict[str, int]
+    total_runs: int
+    success_rate: Optional[float] = None  # % de ejecuciones terminadas con éxito
+    average_solve_time: Optional[float] = None  # segundos
+    total_scheduled_cost: float
+    recent_runs: List[DashboardRun] = []
+    coverage_trend: List[CoveragePoint] = []
+    generated_at: datetime
@@ -0,0 +1,126 @@
+"""
+Búsqueda de empleados por prefijo de nombre/email con índice
+
+- SQLite: tabla FTS5 `employee_search` (contenido externo sobre employees,
+  mantenida por triggers) con ranking bm25.
+- PostgreSQL: índices GIN de trigramas (pg_trgm) sobre lower(name) y
+  lower(email), ranking por similitud.
+
+Los triggers e índices se crean junto con la tabla employees (create_all) y en la
+migración 0007. Una migración que recree employees en modo batch debe volver a
+crear los triggers.
+"""
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import DDL, column, event, func, literal, literal_column, or_, select, table
+
+from app.models import Employee
+from app.skills import with_all_skills, with_any_skill
+
+# Filas por defecto y máximo de resultados por página
+SEARCH_PAGE_SIZE = 25
+SEARCH_MAX_PAGE_SIZE = 200
+
+SQLITE_SEARCH_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS employee_search USING fts5(
+        name, email,
+        content='employees', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS employees_search_ai AFTER INSERT ON employees BEGIN
+        INSERT INTO employee_search(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS employees_search_ad AFTER DELETE ON employees BEGIN
+        INSERT INTO employee_search(employee_search, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS employees_search_au AFTER UPDATE OF name, email ON employees BEGIN
+        INSERT INTO employee_search(employee_search, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+        INSERT INTO employee_search(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END""",
+)
+
+POSTGRES_SEARCH_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_employees_name_trgm ON employees USING gin (lower(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_employees_email_trgm ON employees USING gin (lower(email) gin_trgm_ops)",
+)
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Employee.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(Employee.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+# Tabla FTS5 (solo para construir consultas en SQLite)
+employee_search = table("employee_search", column("rowid"), column("name"), column("email"))
+
+def tokens(text: str) -> List[str]:
+    """Palabras del texto buscado (letras y dígitos, en minúsculas)"""
+    return re.findall(r"\w+", text.lower())
+
+def fts_query(text: str) -> str:
+    """Consulta FTS5: cada palabra como prefijo, todas requeridas, en nombre o email"""
+    return "{name email} : (" + " AND ".join(f'"{t}"*' for t in tokens(text)) + ")"
+
+def matching_ranked(dialect: str, text: str):
+    """
+    Subconsulta (id, rank) de empleados que coinciden con el prefijo; menor rank =
+    más relevante.
+    """
+    if dialect == "sqlite":
+        return (
+            select(
+                employee_search.c.rowid.label("id"),
+                literal_column("bm25(employee_search)").label("rank"),
+            )
+            .select_from(employee_search)
+            .where(literal_column("employee_search").op("MATCH")(fts_query(text)))
+            .subquery("matches")
+        )
+
+    prefix = text.lower().strip()
+    name = func.lower(Employee.name)
+    email = func.lower(Employee.email)
+    conditions = [name.startswith(prefix, autoescape=True), email.startswith(prefix, autoescape=True)]
+    # Prefijo de cualquier palabra del nombre (también resuelto por el índice de trigramas)
+    conditions += [name.contains(f" {t}", autoescape=True) for t in tokens(text)]
+    return (
+        select(
+            Employee.id.label("id"),
+            (literal(0.0) - func.greatest(func.similarity(name, prefix), func.similarity(email, prefix))).label("rank"),
+        )
+        .where(or_(*conditions))
+        .subquery("matches")
+    )
+
+def search_employees(
+    dialect: str,
+    text: Optional[str] = None,
+    skills: Optional[Sequence[str]] = None,
+    match_all: bool = False,
+    position: Optional[str] = None,
+    active: Optional[bool] = True,
+) -> Tuple[object, object, list]:
+    """
+    Consultas de búsqueda: (página, total, columnas de la clave de orden).
+    El orden es (relevancia, nombre, id); sin texto se ordena por nombre.
+    """
+    filters = []
+    if active is not None:
+        filters.append(Employee.is_active == active)
+    if position:
+        filters.append(Employee.position == position)
+    if skills:
+        filters.append(with_all_skills(Employee, skills) if match_all else with_any_skill(Employee, skills))
+
+    query = select(Employee)
+    key = [Employee.name, Employee.id]
+    if text and tokens(text):
+        matches = matching_ranked(dialect, text)
+        # El IN evalúa la coincidencia una sola vez (el planificador no la repite por fila)
+        filters.append(Employee.id.in_(select(matches.c.id)))
+        query = query.join(matches, matches.c.id == Employee.id)
+        key = [matches.c.rank, *key]
+
+    count_query = select(func.count()).select_from(Employee).where(*filters)
+    return query.where(*filters), count_query, key
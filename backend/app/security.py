@@ -0,0 +1,200 @@
+"""
+Autenticación: verificación local de los JWT de Supabase y caché de usuarios
+
+Los tokens HS256 se validan con SUPABASE_JWT_SECRET y los asimétricos (RS256,
+ES256) con el JWKS del proyecto, guardado en memoria durante JWKS_CACHE_TTL
+segundos. Solo se consulta a Supabase por red cuando no hay material local para
+el token (kid desconocido tras refrescar el JWKS, firma que no valida con el
+secreto local por rotación, o sin configuración local).
+"""
+import asyncio
+import hashlib
+import os
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+import structlog
+from fastapi import Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db, get_supabase, SUPABASE_URL
+from app.metrics import auth_verifications_total
+from app.models import User
+from app.schemas import UserResponse
+from app.ttl_cache import TTLCache
+
+logger = structlog.get_logger()
+
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL") or (
+    f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None
+)
+JWT_AUDIENCE = os.getenv("JWT_AUDIENCE", "authenticated")
+JWT_LEEWAY = int(os.getenv("JWT_LEEWAY", "30"))  # segundos de tolerancia de reloj
+JWKS_CACHE_TTL = float(os.getenv("JWKS_CACHE_TTL", "600"))
+# Intervalo mínimo entre descargas del JWKS al encontrar un kid desconocido
+JWKS_MIN_REFRESH_INTERVAL = float(os.getenv("JWKS_MIN_REFRESH_INTERVAL", "30"))
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+AUTH_USER_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "1024"))
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+
+class TokenError(Exception):
+    """Token inválido, expirado o no verificable"""
+
+class JWKSCache:
+    """Claves públicas del JWKS por kid, refrescadas al expirar o ante un kid desconocido"""
+
+    def __init__(self, url: Optional[str], ttl: float = JWKS_CACHE_TTL,
+                 min_refresh_interval: float = JWKS_MIN_REFRESH_INTERVAL):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._fetched_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def set_keys(self, keys: list):
+        """Reemplazar las claves (descarga o configuración local)"""
+        self._keys = {key.get("kid"): key for key in keys}
+        self._fetched_at = time.monotonic()
+
+    async def _fetch(self):
+        async with httpx.AsyncClient(timeout=5) as client:
+            response = await client.get(self.url)
+            response.raise_for_status()
+        self.set_keys(response.json().get("keys", []))
+        logger.info(f"JWKS actualizado: {len(self._keys)} claves")
+
+    async def key_for(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        if self._fresh() and kid in self._keys:
+            return self._keys[kid]
+        if not self.url:
+            return self._keys.get(kid)
+
+        async with self._lock:
+            # Refrescar si expiró, o si el kid es nuevo y no se descargó hace poco
+            age = time.monotonic() - self._fetched_at if self._fetched_at is not None else None
+            if age is None or age >= self.ttl or (kid not in self._keys and age >= self.min_refresh_interval):
+                try:
+                    await self._fetch()
+                except Exception as e:
+                    logger.warning(f"No se pudo descargar el JWKS: {e}")
+        return self._keys.get(kid)
+
+    def _fresh(self) -> bool:
+        return self._fetched_at is not None and time.monotonic() - self._fetched_at < self.ttl
+
+jwks = JWKSCache(SUPABASE_JWKS_URL)
+user_cache = TTLCache(AUTH_USER_CACHE_MAX_ENTRIES, AUTH_USER_CACHE_TTL)
+# Claims de tokens validados por red (clave: hash del token)
+remote_cache = TTLCache(AUTH_USER_CACHE_MAX_ENTRIES, AUTH_USER_CACHE_TTL)
+
+async def remote_claims(token: str) -> Dict[str, Any]:
+    """Validar el token contra Supabase por red (respaldo)"""
+    supabase = get_supabase()
+    if supabase is None:
+        raise TokenError("Token inválido")
+    cache_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    cached = remote_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    try:
+        response = await run_in_threadpool(supabase.auth.get_user, token)
+    except Exception as e:
+        raise TokenError(f"Token rechazado por Supabase: {e}")
+    if not response or not response.user:
+        raise TokenError("Token inválido")
+    auth_verifications_total.inc(method="remote")
+    user = response.user
+    claims = {"sub": user.id, "email": user.email, "user_metadata": user.user_metadata or {}}
+    remote_cache.put(cache_key, claims)
+    return claims
+
+async def verify_token(token: str) -> Dict[str, Any]:
+    """Claims del token, verificado localmente cuando es posible"""
+    try:
+        header = jwt.get_unverified_header(token)
+    except JWTError:
+        raise TokenError("Token mal formado")
+
+    algorithm = header.get("alg")
+    key = None
+    if algorithm == "HS256":
+        key = SUPABASE_JWT_SECRET
+    elif algorithm in ASYMMETRIC_ALGORITHMS:
+        key = await jwks.key_for(header.get("kid"))
+    else:
+        raise TokenError(f"Algoritmo no soportado: {algorithm}")
+
+    if key is None:
+        logger.info(f"Sin clave local para el token ({algorithm}, kid={header.get('kid')}): verificación remota")
+        return await remote_claims(token)
+
+    try:
+        claims = jwt.decode(
+            token, key, algorithms=[algorithm], audience=JWT_AUDIENCE,
+            options={"leeway": JWT_LEEWAY}
+        )
+    except ExpiredSignatureError:
+        raise TokenError("Token expirado")
+    except JWTClaimsError as e:
+        raise TokenError(f"Claims inválidos: {e}")
+    except JWTError:
+        # La firma no valida con la clave local: posible rotación del secreto
+        logger.info("Firma no válida con la clave local: verificación remota")
+        return await remote_claims(token)
+
+    auth_verifications_total.inc(method="local")
+    return claims
+
+async def resolve_user(db: AsyncSession, claims: Dict[str, Any]) -> Dict[str, Any]:
+    """Usuario de la base de datos para los claims (creado en el primer acceso), en caché"""
+    user_id = claims.get("sub")
+    if not user_id:
+        raise TokenError("Token sin sujeto")
+
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    user = await db.get(User, user_id)
+    if not user:
+        metadata = claims.get("user_metadata") or {}
+        user = User(id=user_id, email=claims.get("email"), name=metadata.get("name", ""), role="user")
+        db.add(user)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Otra petición lo creó en paralelo
+            await db.rollback()
+            user = await db.get(User, user_id)
+        else:
+            await db.refresh(user)
+
+    data = UserResponse.model_validate(user).model_dump()
+    user_cache.put(user_id, data)
+    return data
+
+bearer = HTTPBearer()
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer),
+    db: AsyncSession = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Dependencia: usuario autenticado del token Bearer
+    """
+    try:
+        claims = await verify_token(credentials.credentials)
+        return await resolve_user(db, claims)
+    except TokenError as e:
+        auth_verifications_total.inc(method="rejected")
+        logger.info(f"Token rechazado: {e}")
+        raise HTTPException(status_code=401, detail="Token inválido")
@@ -0,0 +1,103 @@
+"""
+Índice normalizado de habilidades: tabla `skills` y enlaces employee_skills / shift_skills
+
+Las columnas JSON `Employee.skills` y `Shift.required_skills` siguen siendo la
+fuente para las respuestas; las tablas de enlace se mantienen sincronizadas en
+la misma transacción y permiten consultar elegibilidad con índices y construir
+máscaras de bits para el solver.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.bulk import chunked
+from app.models import Employee, EmployeeSkill, Shift, ShiftSkill, Skill
+
+# Modelo -> (campo JSON, tabla de enlace, columna del dueño en el enlace)
+SKILL_LINKS = {
+    Employee: ("skills", EmployeeSkill, EmployeeSkill.employee_id),
+    Shift: ("required_skills", ShiftSkill, ShiftSkill.shift_id),
+}
+
+def normalize_names(names: Optional[Iterable[str]]) -> List[str]:
+    """Nombres sin espacios sobrantes ni duplicados, en el orden recibido"""
+    seen = {}
+    for name in names or []:
+        name = name.strip()
+        if name:
+            seen.setdefault(name, None)
+    return list(seen)
+
+def skill_ids(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    """Ids de las habilidades por nombre, creando las que no existen (sin commit)"""
+    names = set(names)
+    ids: Dict[str, int] = {}
+    for chunk in chunked(names):
+        ids.update(db.execute(select(Skill.name, Skill.id).where(Skill.name.in_(chunk))).all())
+    missing = sorted(names - ids.keys())
+    for chunk in chunked(missing):
+        db.execute(insert(Skill), [{"name": name} for name in chunk])
+        ids.update(db.execute(select(Skill.name, Skill.id).where(Skill.name.in_(chunk))).all())
+    return ids
+
+def sync_skill_links(db: Session, model, rows: Iterable[Dict[str, Any]]) -> int:
+    """
+    Reemplazar los enlaces de habilidades de las filas que traen el campo de
+    habilidades (cada fila con `id`). Filas sin ese campo no se tocan. Sin commit.
+    """
+    field, link, owner = SKILL_LINKS[model]
+    skills_by_owner = {
+        row["id"]: normalize_names(row[field])
+        for row in rows
+        if field in row
+    }
+    if not skills_by_owner:
+        return 0
+
+    for chunk in chunked(skills_by_owner):
+        db.execute(delete(link).where(owner.in_(chunk)))
+
+    ids = skill_ids(db, {name for names in skills_by_owner.values() for name in names})
+    links = (
+        {owner.key: owner_id, "skill_id": ids[name]}
+        for owner_id, names in skills_by_owner.items()
+        for name in names
+    )
+    inserted = 0
+    for chunk in chunked(links):
+        db.execute(insert(link), chunk)
+        inserted += len(chunk)
+    return inserted
+
+def with_any_skill(model, names: Sequence[str]):
+    """Condición: filas del modelo con al menos una de las habilidades (consulta indexada)"""
+    _, link, owner = SKILL_LINKS[model]
+    return model.id.in_(
+        select(owner).join(Skill, Skill.id == link.skill_id).where(Skill.name.in_(names))
+    )
+
+def with_all_skills(model, names: Sequence[str]):
+    """Condición: filas del modelo con todas las habilidades indicadas"""
+    _, link, owner = SKILL_LINKS[model]
+    names = set(names)
+    return model.id.in_(
+        select(owner)
+        .join(Skill, Skill.id == link.skill_id)
+        .where(Skill.name.in_(names))
+        .group_by(owner)
+        .having(func.count(link.skill_id) == len(names))
+    )
+
+def skill_masks(db: Session, model, bits: Dict[int, int]) -> Dict[int, int]:
+    """
+    Máscara de bits de habilidades por fila. `bits` asigna un bit a cada id de
+    habilidad y se comparte entre empleados y turnos: dos filas comparten alguna
+    habilidad si `mask_a & mask_b` es distinto de cero.
+    """
+    _, link, owner = SKILL_LINKS[model]
+    masks: Dict[int, int] = {}
+    for owner_id, skill_id in db.execute(select(owner, link.skill_id).order_by(link.skill_id)):
+        bit = bits.setdefault(skill_id, 1 << len(bits))
+        masks[owner_id] = masks.get(owner_id, 0) | bit
+    return masks
@@ -0,0 +1,84 @@
+"""
+Captura y lectura de entradas del solver para reproducir ejecuciones offline
+"""
+import base64
+import gzip
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+BUNDLE_FORMAT_VERSION = 1
+
+# Configuración de captura
+SOLVER_CAPTURE_DIR = os.getenv("SOLVER_CAPTURE_DIR", "./solver_captures")
+SOLVER_CAPTURE_ALWAYS = os.getenv("SOLVER_CAPTURE_ALWAYS", "false").lower() == "true"
+SOLVER_CAPTURE_MODEL_PROTO = os.getenv("SOLVER_CAPTURE_MODEL_PROTO", "false").lower() == "true"
+
+def capture_enabled(requested: bool = False) -> bool:
+    """Indica si se debe capturar la ejecución (por petición o globalmente)"""
+    return requested or SOLVER_CAPTURE_ALWAYS
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+def bundle_path(run_id: str, directory: Optional[str] = None) -> str:
+    """Ruta del archivo de captura para una ejecución"""
+    return os.path.join(directory or SOLVER_CAPTURE_DIR, f"{run_id}.json.gz")
+
+def write_bundle(
+    run_id: str,
+    employees: List[Dict[str, Any]],
+    shifts: List[Dict[str, Any]],
+    constraints: Dict[str, Any],
+    parameters: str = "",
+    model_proto: Optional[bytes] = None,
+    directory: Optional[str] = None
+) -> str:
+    """
+    Escribir el paquete de entradas del solver en un archivo comprimido
+    """
+    path = bundle_path(run_id, directory)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    bundle = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "run_id": run_id,
+        "captured_at": datetime.now().isoformat(),
+        "employees": employees,
+        "shifts": shifts,
+        "constraints": constraints,
+        "parameters": parameters,
+        "model_proto": base64.b64encode(model_proto).decode("ascii") if model_proto else None,
+    }
+
+    # Escritura atómica para no dejar capturas a medias
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(bundle, f, default=_json_default)
+    os.replace(tmp_path, path)
+
+    logger.info(f"Captura del solver guardada: {path}")
+    return path
+
+def read_bundle(path: str) -> Dict[str, Any]:
+    """
+    Leer un paquete de captura; decodifica el proto del modelo si existe
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        bundle = json.load(f)
+
+    version = bundle.get("format_version")
+    if version != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Versión de captura no soportada: {version}")
+
+    if bundle.get("model_proto"):
+        bundle["model_proto"] = base64.b64decode(bundle["model_proto"])
+
+    return bundle
@@ -4,6 +4,8 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Any, Tuple
 import json
 
+from app.metrics import PhaseTimer
+
 logger = structlog.get_logger()
 
 class CPSatSolver:
@@ -11,6 +13,8 @@ class CPSatSolver:
         self.model = cp_model.CpModel()
         self.solver = cp_model.CpSolver()
         self.solver.parameters.max_time_in_seconds = 60  # 1 minuto
+        self.timer = PhaseTimer()
+        self.stats: Dict[str, Dict[str, Any]] = {"model": {}, "response": {}}
 
     def solve_shift_scheduling(
         self, employees: List[Dict[str, Any]], shifts: List[Dict[str, Any]], constraints: Dict[str, Any]
@@ -26,104 +30,188 @@ class CPSatSolver:
             if not employees or not shifts:
                 return False, [], {"error": "Faltan empleados o turnos"}
 
-            # Crear variables
-            assignments = {}
-            for emp in employees:
-                for shift in shifts:
-                    for date in dates:
-                        name = f"E{emp['id']}_S{shift['id']}_{date.date()}"
-                        assignments[name] = self.model.NewBoolVar(name)
+            with self.timer.phase("build"):
+                # Crear variables
+                assignments = {}
+                for emp in employees:
+                    for shift in shifts:
+                        for date in dates:
+                            name = f"E{emp['id']}_S{shift['id']}_{date.date()}"
+                            assignments[name] = self.model.NewBoolVar(name)
 
-            logger.info(f"Variables de decisión: {len(assignments)}")
+                logger.info(f"Variables de decisión: {len(assignments)}")
 
-            # Restricción 1: Máx 1 turno por día por empleado
-            for emp in employees:
-                for date in dates:
-                    vars_day = [
-                        assignments[f"E{emp['id']}_S{shift['id']}_{date.date()}"]
-                        for shift in shifts
-                        if f"E{emp['id']}_S{shift['id']}_{date.date()}" in assignments
-                    ]
-                    if vars_day:
-                        self.model.Add(sum(vars_day) <= 1)
-
-            # Restricción 2: Cobertura mínima por turno
-            slack_penalties = []
-            for shift in shifts:
-                for date in dates:
-                    if date.weekday() == shift["day_of_week"]:
-                        vars_shift = [
+                # Restricción 1: Máx 1 turno por día por empleado
+                for emp in employees:
+                    for date in dates:
+                        vars_day = [
                             assignments[f"E{emp['id']}_S{shift['id']}_{date.date()}"]
-                            for emp in employees
+                            for shift in shifts
+                            if f"E{emp['id']}_S{shift['id']}_{date.date()}" in assignments
                         ]
-                        slack = self.model.NewIntVar(0, 10, f"slack_S{shift['id']}_{date.date()}")
-                        self.model.Add(sum(vars_shift) + slack >= shift["min_employees"])
-                        self.model.Add(sum(vars_shift) <= shift["max_employees"])
-                        slack_penalties.append(slack)
+                        if vars_day:
+                            self.model.Add(sum(vars_day) <= 1)
 
-            # Restricción 3: Habilidades requeridas
-            for emp in employees:
-                for shift in shifts:
-                    if not set(shift["required_skills"]).intersection(set(emp["skills"])):
-                        for date in dates:
-                            if f"E{emp['id']}_S{shift['id']}_{date.date()}" in assignments:
-                                self.model.Add(assignments[f"E{emp['id']}_S{shift['id']}_{date.date()}"] == 0)
-
-            # Restricción 4: Descanso mínimo de 12h entre turnos
-            for emp in employees:
-                for i in range(len(dates) - 1):
-                    d1, d2 = dates[i], dates[i + 1]
-                    shifts_emp_day1 = [
-                        assignments[f"E{emp['id']}_S{shift['id']}_{d1.date()}"]
-                        for shift in shifts if f"E{emp['id']}_S{shift['id']}_{d1.date()}" in assignments
-                    ]
-                    shifts_emp_day2 = [
-                        assignments[f"E{emp['id']}_S{shift['id']}_{d2.date()}"]
-                        for shift in shifts if f"E{emp['id']}_S{shift['id']}_{d2.date()}" in assignments
-                    ]
-                    if shifts_emp_day1 and shifts_emp_day2:
-                        self.model.Add(sum(shifts_emp_day1) + sum(shifts_emp_day2) <= 1)
-
-            # Restricción 5: Máx 6 días seguidos
-            for emp in employees:
-                for i in range(len(dates) - 6):
-                    window = dates[i:i+7]
-                    day_vars = [
-                        assignments[f"E{emp['id']}_S{shift['id']}_{d.date()}"]
-                        for shift in shifts for d in window
-                        if f"E{emp['id']}_S{shift['id']}_{d.date()}" in assignments
-                    ]
-                    if day_vars:
-                        self.model.Add(sum(day_vars) <= 6)
-
-            # Función objetivo: minimizar costo + penalización de slack + balance
-            cost_terms = []
-            for emp in employees:
+                # Restricción 2: Cobertura mínima por turno
+                slack_penalties = []
                 for shift in shifts:
                     for date in dates:
-                        key = f"E{emp['id']}_S{shift['id']}_{date.date()}"
-                        if key in assignments:
-                            cost = emp["hourly_rate"] * shift["cost_multiplier"]
-                            cost_terms.append(assignments[key] * cost)
+                        if date.weekday() == shift["day_of_week"]:
+                            vars_shift = [
+                                assignments[f"E{emp['id']}_S{shift['id']}_{date.date()}"]
+                                for emp in employees
+                            ]
+                            slack = self.model.NewIntVar(0, 10, f"slack_S{shift['id']}_{date.date()}")
+                            self.model.Add(sum(vars_shift) + slack >= shift["min_employees"])
+                            self.model.Add(sum(vars_shift) <= shift["max_employees"])
+                            slack_penalties.append(slack)
+
+                # Restricción 3: Habilidades requeridas (intersección por máscara de bits)
+                employee_masks, shift_masks = self._skill_masks(employees, shifts)
+                for emp in employees:
+                    for shift in shifts:
+                        if not employee_masks[emp["id"]] & shift_masks[shift["id"]]:
+                            for date in dates:
+                                if f"E{emp['id']}_S{shift['id']}_{date.date()}" in assignments:
+                                    self.model.Add(assignments[f"E{emp['id']}_S{shift['id']}_{date.date()}"] == 0)
+
+                # Restricción 4: Descanso mínimo de 12h entre turnos
+                for emp in employees:
+                    for i in range(len(dates) - 1):
+                        d1, d2 = dates[i], dates[i + 1]
+                        shifts_emp_day1 = [
+                            assignments[f"E{emp['id']}_S{shift['id']}_{d1.date()}"]
+                            for shift in shifts if f"E{emp['id']}_S{shift['id']}_{d1.date()}" in assignments
+                        ]
+                        shifts_emp_day2 = [
+                            assignments[f"E{emp['id']}_S{shift['id']}_{d2.date()}"]
+                            for shift in shifts if f"E{emp['id']}_S{shift['id']}_{d2.date()}" in assignments
+                        ]
+                        if shifts_emp_day1 and shifts_emp_day2:
+                            self.model.Add(sum(shifts_emp_day1) + sum(shifts_emp_day2) <= 1)
+
+                # Restricción 5: Máx 6 días seguidos
+                for emp in employees:
+                    for i in range(len(dates) - 6):
+                        window = dates[i:i+7]
+                        day_vars = [
+                            assignments[f"E{emp['id']}_S{shift['id']}_{d.date()}"]
+                            for shift in shifts for d in window
+                            if f"E{emp['id']}_S{shift['id']}_{d.date()}" in assignments
+                        ]
+                        if day_vars:
+                            self.model.Add(sum(day_vars) <= 6)
 
-            total_cost = sum(cost_terms)
-            slack_penalty = sum(slack_penalties)
-            self.model.Minimize(total_cost + 10 * slack_penalty)
+                # Función objetivo: minimizar costo + penalización de slack + balance
+                cost_terms = []
+                for emp in employees:
+                    for shift in shifts:
+                        for date in dates:
+                            key = f"E{emp['id']}_S{shift['id']}_{date.date()}"
+                            if key in assignments:
+                                cost = emp["hourly_rate"] * shift["cost_multiplier"]
+                                cost_terms.append(assignments[key] * cost)
+
+                total_cost = sum(cost_terms)
+                slack_penalty = sum(slack_penalties)
+                self.model.Minimize(total_cost + 10 * slack_penalty)
+
+            self.stats["model"] = {
+                "variables": len(self.model.Proto().variables),
+                "constraints": len(self.model.Proto().constraints),
+                "eligible_triples": self._count_eligible(employees, shifts, dates),
+            }
+
+            # Resolver (incluye presolve)
+            with self.timer.phase("solve"):
+                status = self.solver.Solve(self.model)
+            self.stats["response"] = self._response_stats(status)
 
-            # Resolver
-            status = self.solver.Solve(self.model)
             if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-                return True, self._extract(assignments, employees, shifts, dates), {
+                with self.timer.phase("extract"):
+                    result = self._extract(assignments, employees, shifts, dates)
+                return True, result, {
                     "objective": self.solver.ObjectiveValue(),
                     "status": "SUCCESS",
-                    "solve_time": self.solver.WallTime()
+                    "solve_time": self.solver.WallTime(),
+                    "phases": self.timer.phases,
+                    "stats": self.stats
                 }
 
-            return False, [], {"error": "No hay solución factible", "status": "INFEASIBLE"}
+            return False, [], {
+                "error": "No hay solución factible",
+                "status": "INFEASIBLE",
+                "phases": self.timer.phases,
+                "stats": self.stats
+            }
 
         except Exception as e:
             return False, [], {"error": str(e)}
 
+    @staticmethod
+    def _skill_masks(employees, shifts):
+        """
+        Máscaras de habilidades por empleado y turno. Usa `skill_mask` de los datos
+        de referencia; si falta (capturas antiguas) se calcula desde los nombres.
+        """
+        if all("skill_mask" in item for item in [*employees, *shifts]):
+            return (
+                {emp["id"]: emp["skill_mask"] for emp in employees},
+                {shift["id"]: shift["skill_mask"] for shift in shifts},
+            )
+
+        bits = {}
+        def mask(names):
+            value = 0
+            for name in names:
+                value |= bits.setdefault(name, 1 << len(bits))
+            return value
+        return (
+            {emp["id"]: mask(emp["skills"]) for emp in employees},
+            {shift["id"]: mask(shift["required_skills"]) for shift in shifts},
+        )
+
+    def _count_eligible(self, employees, shifts, dates):
+        """Tripletas (empleado, turno, fecha) que cumplen día y habilidades"""
+        dates_by_weekday = {}
+        for date in dates:
+            dates_by_weekday[date.weekday()] = dates_by_weekday.get(date.weekday(), 0) + 1
+
+        employee_masks, shift_masks = self._skill_masks(employees, shifts)
+        eligible = 0
+        for shift in shifts:
+            n_dates = dates_by_weekday.get(shift["day_of_week"], 0)
+            if not n_dates:
+                continue
+            required = shift_masks[shift["id"]]
+            eligible += n_dates * sum(1 for mask in employee_masks.values() if required & mask)
+        return eligible
+
+    def _response_stats(self, status):
+        """Estadísticas de la respuesta de CP-SAT"""
+        stats = {
+            "status": self.solver.StatusName(status),
+            "wall_time": self.solver.WallTime(),
+            "conflicts": self.solver.NumConflicts(),
+            "branches": self.solver.NumBranches(),
+            "best_bound": None,
+            "gap": None,
+        }
+        if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            objective = self.solver.ObjectiveValue()
+            bound = self.solver.BestObjectiveBound()
+            stats["best_bound"] = bound
+            stats["gap"] = abs(objective - bound) / max(1.0, abs(objective))
+        return stats
+
+    def export_model_proto(self) -> bytes:
+        """Serializar el CpModel construido (para capturas y depuración)"""
+        return self.model.Proto().SerializeToString()
+
+    def parameters_text(self) -> str:
+        """Parámetros del CpSolver en formato texto de protobuf"""
+        return str(self.solver.parameters)
+
     def _extract(self, assignments, employees, shifts, dates):
         result = []
         for emp in employees:
@@ -0,0 +1,105 @@
+"""
+Reproducir offline una ejecución capturada del solver
+
+Uso (desde backend/):
+    python -m app.solver.replay solver_captures/<run_id>.json.gz
+    python -m app.solver.replay captura.json.gz --repeat 3 --profile-output replay.prof
+"""
+import argparse
+import cProfile
+import json
+import pstats
+import sys
+import time
+
+from google.protobuf import text_format
+
+from app.solver.capture import read_bundle
+from app.solver.cp_sat_solver import CPSatSolver
+
+def replay_bundle(bundle: dict, time_limit: float = None, workers: int = None, profiler: cProfile.Profile = None) -> dict:
+    """
+    Resolver nuevamente un paquete capturado y devolver tiempos y resultado
+    """
+    solver = CPSatSolver()
+
+    # Restaurar los parámetros originales del CpSolver (Parse no limpia los
+    # valores que CPSatSolver ya fijó y rechaza campos repetidos)
+    if bundle.get("parameters"):
+        solver.solver.parameters.Clear()
+        text_format.Parse(bundle["parameters"], solver.solver.parameters)
+    if time_limit is not None:
+        solver.solver.parameters.max_time_in_seconds = time_limit
+    if workers is not None:
+        solver.solver.parameters.num_workers = workers
+
+    if profiler:
+        profiler.enable()
+    start = time.perf_counter()
+    success, assignments, metrics = solver.solve_shift_scheduling(
+        bundle["employees"], bundle["shifts"], bundle["constraints"]
+    )
+    elapsed = time.perf_counter() - start
+    if profiler:
+        profiler.disable()
+
+    return {
+        "success": success,
+        "assignments": len(assignments),
+        "total_time": elapsed,
+        "solver_wall_time": metrics.get("solve_time"),
+        "metrics": metrics,
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reproducir una captura del solver CP-SAT")
+    parser.add_argument("bundle", help="Archivo .json.gz generado por la captura del solver")
+    parser.add_argument("--repeat", type=int, default=1, help="Número de repeticiones")
+    parser.add_argument("--time-limit", type=float, default=None, help="Sobrescribir max_time_in_seconds")
+    parser.add_argument("--workers", type=int, default=None, help="Sobrescribir num_workers de CP-SAT")
+    parser.add_argument("--no-profile", action="store_true", help="Desactivar cProfile")
+    parser.add_argument("--profile-output", default=None, help="Guardar el perfil en formato pstats")
+    parser.add_argument("--top", type=int, default=25, help="Funciones a mostrar del perfil")
+    parser.add_argument("--dump-proto", default=None, help="Escribir el CpModelProto capturado a un archivo")
+    args = parser.parse_args(argv)
+
+    bundle = read_bundle(args.bundle)
+    print(
+        f"Captura {bundle['run_id']} ({bundle['captured_at']}): "
+        f"{len(bundle['employees'])} empleados, {len(bundle['shifts'])} turnos",
+        file=sys.stderr
+    )
+
+    if args.dump_proto:
+        if not bundle.get("model_proto"):
+            print("La captura no incluye el proto del modelo", file=sys.stderr)
+            return 1
+        with open(args.dump_proto, "wb") as f:
+            f.write(bundle["model_proto"])
+
+    profiler = None if args.no_profile else cProfile.Profile()
+    runs = [
+        replay_bundle(bundle, args.time_limit, args.workers, profiler)
+        for _ in range(args.repeat)
+    ]
+
+    times = [r["total_time"] for r in runs]
+    print(json.dumps({
+        "run_id": bundle["run_id"],
+        "repeat": args.repeat,
+        "min_time": min(times),
+        "max_time": max(times),
+        "mean_time": sum(times) / len(times),
+        "runs": runs,
+    }, indent=2, default=str))
+
+    if profiler:
+        if args.profile_output:
+            profiler.dump_stats(args.profile_output)
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        stats.sort_stats("cumulative").print_stats(args.top)
+
+    return 0 if all(r["success"] for r in runs) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""esquema inicial
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Tablas tal como las creaba Base.metadata.create_all antes de usar Alembic.
+Bases existentes creadas así: `alembic stamp 0001` y luego `alembic upgrade head`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("email", sa.String()),
+        sa.Column("name", sa.String()),
+        sa.Column("role", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "employees",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("email", sa.String()),
+        sa.Column("phone", sa.String()),
+        sa.Column("position", sa.String()),
+        sa.Column("skills", sa.Text()),
+        sa.Column("availability", sa.Text()),
+        sa.Column("preferences", sa.Text()),
+        sa.Column("hourly_rate", sa.Float()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_employees_id", "employees", ["id"])
+    op.create_index("ix_employees_email", "employees", ["email"], unique=True)
+
+    op.create_table(
+        "shifts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("start_time", sa.String()),
+        sa.Column("end_time", sa.String()),
+        sa.Column("day_of_week", sa.Integer()),
+        sa.Column("required_skills", sa.Text()),
+        sa.Column("min_employees", sa.Integer()),
+        sa.Column("max_employees", sa.Integer()),
+        sa.Column("cost_multiplier", sa.Float()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_shifts_id", "shifts", ["id"])
+
+    op.create_table(
+        "solver_runs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("run_id", sa.String()),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("status", sa.String()),
+        sa.Column("start_date", sa.DateTime()),
+        sa.Column("end_date", sa.DateTime()),
+        sa.Column("constraints", sa.Text()),
+        sa.Column("objective_value", sa.Float()),
+        sa.Column("solve_time", sa.Float()),
+        sa.Column("assignments_count", sa.Integer()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_solver_runs_id", "solver_runs", ["id"])
+    op.create_index("ix_solver_runs_run_id", "solver_runs", ["run_id"], unique=True)
+
+    op.create_table(
+        "assignments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("solver_run_id", sa.Integer(), sa.ForeignKey("solver_runs.id")),
+        sa.Column("employee_id", sa.Integer(), sa.ForeignKey("employees.id")),
+        sa.Column("shift_id", sa.Integer(), sa.ForeignKey("shifts.id")),
+        sa.Column("date", sa.DateTime()),
+        sa.Column("status", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_assignments_id", "assignments", ["id"])
+
+    op.create_table(
+        "error_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("run_id", sa.String()),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id")),
+        sa.Column("message", sa.Text()),
+        sa.Column("stack", sa.Text()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_error_logs_id", "error_logs", ["id"])
+    op.create_index("ix_error_logs_run_id", "error_logs", ["run_id"])
+
+def downgrade():
+    op.drop_table("error_logs")
+    op.drop_table("assignments")
+    op.drop_table("solver_runs")
+    op.drop_table("shifts")
+    op.drop_table("employees")
+    op.drop_table("users")
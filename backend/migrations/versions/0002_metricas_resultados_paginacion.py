@@ -0,0 +1,43 @@
+"""métricas del solver, resultados compactos e índices de paginación
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table("solver_runs") as batch_op:
+        batch_op.add_column(sa.Column("phase_timings", sa.Text()))
+        batch_op.add_column(sa.Column("solver_stats", sa.Text()))
+        batch_op.add_column(sa.Column("storage_mode", sa.String(), server_default="rows"))
+        batch_op.add_column(sa.Column("packed_assignments", sa.LargeBinary()))
+
+    op.create_index("ix_employees_active_id", "employees", ["is_active", "id"])
+    op.create_index("ix_employees_active_name_id", "employees", ["is_active", "name", "id"])
+    op.create_index("ix_shifts_active_id", "shifts", ["is_active", "id"])
+    op.create_index("ix_shifts_active_day_id", "shifts", ["is_active", "day_of_week", "id"])
+    op.create_index("ix_shifts_active_name_id", "shifts", ["is_active", "name", "id"])
+    op.create_index("ix_solver_runs_created_id", "solver_runs", ["created_at", "id"])
+    op.create_index("ix_solver_runs_status_created_id", "solver_runs", ["status", "created_at", "id"])
+
+def downgrade():
+    op.drop_index("ix_solver_runs_status_created_id", table_name="solver_runs")
+    op.drop_index("ix_solver_runs_created_id", table_name="solver_runs")
+    op.drop_index("ix_shifts_active_name_id", table_name="shifts")
+    op.drop_index("ix_shifts_active_day_id", table_name="shifts")
+    op.drop_index("ix_shifts_active_id", table_name="shifts")
+    op.drop_index("ix_employees_active_name_id", table_name="employees")
+    op.drop_index("ix_employees_active_id", table_name="employees")
+
+    with op.batch_alter_table("solver_runs") as batch_op:
+        batch_op.drop_column("packed_assignments")
+        batch_op.drop_column("storage_mode")
+        batch_op.drop_column("solver_stats")
+        batch_op.drop_column("phase_timings")
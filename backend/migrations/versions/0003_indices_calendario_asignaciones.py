@@ -0,0 +1,34 @@
+"""índices compuestos de asignaciones para calendario y paginación
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+En PostgreSQL los índices se crean con CONCURRENTLY para no bloquear escrituras
+sobre `assignments`, que es la tabla más grande.
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_assignments_run_id", ["solver_run_id", "id"]),
+    ("ix_assignments_run_date_id", ["solver_run_id", "date", "id"]),
+    ("ix_assignments_run_employee_date", ["solver_run_id", "employee_id", "date"]),
+)
+
+def upgrade():
+    if op.get_context().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, columns in INDEXES:
+                op.create_index(name, "assignments", columns, postgresql_concurrently=True)
+    else:
+        for name, columns in INDEXES:
+            op.create_index(name, "assignments", columns)
+
+def downgrade():
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name="assignments")
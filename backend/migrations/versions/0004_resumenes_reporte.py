@@ -0,0 +1,44 @@
+"""resúmenes de reporte precalculados por ejecución
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+Las ejecuciones existentes no se recalculan aquí: su resumen se genera en la
+primera lectura del reporte.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "report_summaries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("solver_run_id", sa.Integer(), sa.ForeignKey("solver_runs.id")),
+        sa.Column("total_assignments", sa.Integer()),
+        sa.Column("total_hours", sa.Float()),
+        sa.Column("total_cost", sa.Float()),
+        sa.Column("required_slots", sa.Integer()),
+        sa.Column("covered_slots", sa.Integer()),
+        sa.Column("coverage_percentage", sa.Float()),
+        sa.Column("understaffed_shifts", sa.Integer()),
+        sa.Column("overstaffed_shifts", sa.Integer()),
+        sa.Column("slack_total", sa.Integer()),
+        sa.Column("hours_spread", sa.Float()),
+        sa.Column("hours_stddev", sa.Float()),
+        sa.Column("employee_totals", sa.Text()),
+        sa.Column("shift_coverage", sa.Text()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_report_summaries_id", "report_summaries", ["id"])
+    op.create_index("ix_report_summaries_solver_run_id", "report_summaries", ["solver_run_id"], unique=True)
+
+def downgrade():
+    op.drop_index("ix_report_summaries_solver_run_id", table_name="report_summaries")
+    op.drop_index("ix_report_summaries_id", table_name="report_summaries")
+    op.drop_table("report_summaries")
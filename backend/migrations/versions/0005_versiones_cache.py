@@ -0,0 +1,25 @@
+"""versiones de cachés en proceso (invalidación entre workers)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    cache_versions = op.create_table(
+        "cache_versions",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.bulk_insert(cache_versions, [{"name": "reference_data", "version": 0}])
+
+def downgrade():
+    op.drop_table("cache_versions")
@@ -0,0 +1,156 @@
+"""columnas JSON nativas e índice normalizado de habilidades
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+Convierte `skills`/`required_skills` (texto separado por comas) y
+`availability`/`preferences` (JSON o repr de Python) a columnas JSON (JSONB en
+PostgreSQL) y llena las tablas skills, employee_skills y shift_skills.
+"""
+import ast
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+JSON_TYPE = sa.JSON(none_as_null=True).with_variant(postgresql.JSONB(none_as_null=True), "postgresql")
+
+LIST_COLUMNS = {"employees": ("skills",), "shifts": ("required_skills",)}
+DICT_COLUMNS = {"employees": ("availability", "preferences"), "shifts": ()}
+LINK_TABLES = {"employees": ("employee_skills", "employee_id"), "shifts": ("shift_skills", "shift_id")}
+
+def _parse_list(value):
+    if not value:
+        return []
+    try:
+        parsed = json.loads(value)
+        if isinstance(parsed, list):
+            return parsed
+    except ValueError:
+        pass
+    return [item for item in value.split(",") if item]
+
+def _parse_dict(value):
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return ast.literal_eval(value)
+
+def _unique(names):
+    return list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+
+def _convert_rows(bind, table):
+    """Reescribir el texto como JSON válido y devolver las habilidades por fila"""
+    columns = LIST_COLUMNS[table] + DICT_COLUMNS[table]
+    rows = bind.execute(sa.text(f"SELECT id, {', '.join(columns)} FROM {table}")).mappings().all()
+    skills_by_id = {}
+    updates = []
+    for row in rows:
+        values = {"id": row["id"]}
+        for column in LIST_COLUMNS[table]:
+            names = _unique(_parse_list(row[column]))
+            skills_by_id[row["id"]] = names
+            values[column] = json.dumps(names)
+        for column in DICT_COLUMNS[table]:
+            parsed = _parse_dict(row[column])
+            values[column] = json.dumps(parsed) if parsed is not None else None
+        updates.append(values)
+    if updates:
+        assignments = ", ".join(f"{column} = :{column}" for column in columns)
+        bind.execute(sa.text(f"UPDATE {table} SET {assignments} WHERE id = :id"), updates)
+    return skills_by_id
+
+def upgrade():
+    op.create_table(
+        "skills",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_skills_id", "skills", ["id"])
+    op.create_index("ix_skills_name", "skills", ["name"], unique=True)
+
+    op.create_table(
+        "employee_skills",
+        sa.Column("employee_id", sa.Integer(), sa.ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("skill_id", sa.Integer(), sa.ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True),
+    )
+    op.create_index("ix_employee_skills_skill_employee", "employee_skills", ["skill_id", "employee_id"])
+
+    op.create_table(
+        "shift_skills",
+        sa.Column("shift_id", sa.Integer(), sa.ForeignKey("shifts.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("skill_id", sa.Integer(), sa.ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True),
+    )
+    op.create_index("ix_shift_skills_skill_shift", "shift_skills", ["skill_id", "shift_id"])
+
+    # Datos: texto -> JSON y enlaces de habilidades
+    bind = op.get_bind()
+    skills_by_table = {table: _convert_rows(bind, table) for table in LIST_COLUMNS}
+
+    names = sorted({name for skills in skills_by_table.values() for names in skills.values() for name in names})
+    if names:
+        bind.execute(sa.text("INSERT INTO skills (name) VALUES (:name)"), [{"name": name} for name in names])
+    skill_ids = dict(bind.execute(sa.text("SELECT name, id FROM skills")).all())
+
+    for table, skills in skills_by_table.items():
+        link_table, owner = LINK_TABLES[table]
+        links = [
+            {"owner": owner_id, "skill_id": skill_ids[name]}
+            for owner_id, names in skills.items()
+            for name in names
+        ]
+        if links:
+            bind.execute(sa.text(f"INSERT INTO {link_table} ({owner}, skill_id) VALUES (:owner, :skill_id)"), links)
+
+    # Tipos de columna (en SQLite el modo batch recrea la tabla conservando el texto JSON)
+    for table in LIST_COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            for column in LIST_COLUMNS[table] + DICT_COLUMNS[table]:
+                batch_op.alter_column(
+                    column,
+                    existing_type=sa.Text(),
+                    type_=JSON_TYPE,
+                    postgresql_using=f"{column}::jsonb",
+                )
+
+def downgrade():
+    for table in LIST_COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            for column in LIST_COLUMNS[table] + DICT_COLUMNS[table]:
+                batch_op.alter_column(
+                    column,
+                    existing_type=JSON_TYPE,
+                    type_=sa.Text(),
+                    postgresql_using=f"{column}::text",
+                )
+
+    # Listas de vuelta a texto separado por comas
+    bind = op.get_bind()
+    for table, columns in LIST_COLUMNS.items():
+        for column in columns:
+            rows = bind.execute(sa.text(f"SELECT id, {column} FROM {table}")).all()
+            updates = [
+                {"id": row_id, "value": ",".join(json.loads(value)) or None}
+                for row_id, value in rows
+                if value
+            ]
+            if updates:
+                bind.execute(sa.text(f"UPDATE {table} SET {column} = :value WHERE id = :id"), updates)
+
+    op.drop_index("ix_shift_skills_skill_shift", table_name="shift_skills")
+    op.drop_table("shift_skills")
+    op.drop_index("ix_employee_skills_skill_employee", table_name="employee_skills")
+    op.drop_table("employee_skills")
+    op.drop_index("ix_skills_name", table_name="skills")
+    op.drop_index("ix_skills_id", table_name="skills")
+    op.drop_table("skills")
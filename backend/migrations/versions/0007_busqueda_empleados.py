@@ -0,0 +1,66 @@
+"""búsqueda de empleados: FTS5 en SQLite, trigramas en PostgreSQL
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+SQLITE_UPGRADE = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS employee_search USING fts5(
+        name, email,
+        content='employees', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS employees_search_ai AFTER INSERT ON employees BEGIN
+        INSERT INTO employee_search(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS employees_search_ad AFTER DELETE ON employees BEGIN
+        INSERT INTO employee_search(employee_search, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS employees_search_au AFTER UPDATE OF name, email ON employees BEGIN
+        INSERT INTO employee_search(employee_search, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+        INSERT INTO employee_search(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END""",
+    # Indexar los empleados existentes
+    "INSERT INTO employee_search(employee_search) VALUES ('rebuild')",
+)
+
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER IF EXISTS employees_search_au",
+    "DROP TRIGGER IF EXISTS employees_search_ad",
+    "DROP TRIGGER IF EXISTS employees_search_ai",
+    "DROP TABLE IF EXISTS employee_search",
+)
+
+POSTGRES_UPGRADE = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_employees_name_trgm ON employees USING gin (lower(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_employees_email_trgm ON employees USING gin (lower(email) gin_trgm_ops)",
+)
+
+POSTGRES_DOWNGRADE = (
+    "DROP INDEX IF EXISTS ix_employees_email_trgm",
+    "DROP INDEX IF EXISTS ix_employees_name_trgm",
+)
+
+def upgrade():
+    op.create_index(
+        "ix_employees_active_position_name_id", "employees", ["is_active", "position", "name", "id"]
+    )
+    dialect = op.get_bind().dialect.name
+    statements = {"sqlite": SQLITE_UPGRADE, "postgresql": POSTGRES_UPGRADE}.get(dialect, ())
+    for statement in statements:
+        op.execute(statement)
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    statements = {"sqlite": SQLITE_DOWNGRADE, "postgresql": POSTGRES_DOWNGRADE}.get(dialect, ())
+    for statement in statements:
+        op.execute(statement)
+    op.drop_index("ix_employees_active_position_name_id", table_name="employees")
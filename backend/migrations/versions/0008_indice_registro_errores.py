@@ -0,0 +1,18 @@
+"""índice de error_logs por ejecución y fecha (lectura local paginada)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index("ix_error_logs_run_created_id", "error_logs", ["run_id", "created_at", "id"])
+
+def downgrade():
+    op.drop_index("ix_error_logs_run_created_id", table_name="error_logs")
@@ -0,0 +1,43 @@
+"""optimización por lotes: sede/departamento y ejecuciones hijas
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # ADD COLUMN simple: en SQLite no recrea employees (conserva los triggers de búsqueda)
+    for table in ("employees", "shifts"):
+        op.add_column(table, sa.Column("site", sa.String()))
+        op.add_column(table, sa.Column("department", sa.String()))
+
+    with op.batch_alter_table("solver_runs") as batch_op:
+        batch_op.add_column(sa.Column("parent_run_id", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("group_by", sa.String()))
+        batch_op.add_column(sa.Column("group_key", sa.String()))
+        batch_op.create_foreign_key(
+            "fk_solver_runs_parent_run_id", "solver_runs", ["parent_run_id"], ["run_id"]
+        )
+
+    op.create_index("ix_solver_runs_parent_created_id", "solver_runs", ["parent_run_id", "created_at", "id"])
+
+def downgrade():
+    op.drop_index("ix_solver_runs_parent_created_id", table_name="solver_runs")
+
+    with op.batch_alter_table("solver_runs") as batch_op:
+        batch_op.drop_constraint("fk_solver_runs_parent_run_id", type_="foreignkey")
+        batch_op.drop_column("group_key")
+        batch_op.drop_column("group_by")
+        batch_op.drop_column("parent_run_id")
+
+    # DROP COLUMN directo (SQLite >= 3.35) para no recrear employees
+    for table in ("shifts", "employees"):
+        op.drop_column(table, "department")
+        op.drop_column(table, "site")
@@ -0,0 +1,99 @@
+"""
+Configuración de las pruebas: base SQLite temporal y cliente de la API
+
+Las variables de entorno se fijan antes de importar la aplicación, porque
+app.database y el resto de módulos leen la configuración al importarse.
+"""
+import os
+import tempfile
+
+_TMP_DIR = tempfile.mkdtemp(prefix="turnos-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["DB_CREATE_ALL"] = "true"
+os.environ["SOLVER_CAPTURE_DIR"] = os.path.join(_TMP_DIR, "solver_captures")
+os.environ["PRINT_CACHE_DIR"] = os.path.join(_TMP_DIR, "print_cache")
+os.environ["PROFILE_DIR"] = os.path.join(_TMP_DIR, "profiles")
+# Sin Supabase real: la verificación de tokens usa solo claves locales
+for name in ("SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY", "SUPABASE_JWT_SECRET", "SUPABASE_JWKS_URL"):
+    os.environ.pop(name, None)
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import dashboard, http_cache, refdata, security
+from app.database import Base, SessionLocal, engine
+from app.main import app
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    """Esquema vacío y cachés de proceso limpias en cada prueba"""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    refdata.cache.invalidate()
+    http_cache.cache.clear()
+    dashboard.invalidate()
+    security.user_cache.clear()
+    security.remote_cache.clear()
+    yield
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+def make_employees(count: int):
+    return [
+        {
+            "name": f"Empleado {i}",
+            "email": f"empleado{i}@example.com",
+            "position": ("cajero", "supervisor")[i % 2],
+            "skills": ["caja"] if i % 2 == 0 else ["caja", "supervision"],
+            "hourly_rate": 5 + i % 3,
+        }
+        for i in range(count)
+    ]
+
+def make_shifts(count: int):
+    return [
+        {
+            "name": f"Turno {i}",
+            "start_time": ("08:00", "16:00")[i % 2],
+            "end_time": ("16:00", "23:00")[i % 2],
+            "day_of_week": (i // 2) % 7,
+            "required_skills": ["caja"],
+            "min_employees": 1,
+            "max_employees": 2,
+        }
+        for i in range(count)
+    ]
+
+@pytest.fixture
+def seed(client):
+    """Crear empleados y turnos con las importaciones masivas"""
+    def _seed(employees: int = 4, shifts: int = 4):
+        for path, rows in (("/api/employees/bulk", make_employees(employees)), ("/api/shifts/bulk", make_shifts(shifts))):
+            response = client.post(path, json=rows)
+            assert response.status_code == 200, response.text
+    return _seed
+
+@pytest.fixture
+def solve(client):
+    """Lanzar una ejecución del solver (TestClient corre la tarea de fondo antes de responder)"""
+    def _solve(days: int = 3, **options):
+        payload = {
+            "constraints": {"start_date": "2026-01-05T00:00:00", "end_date": f"2026-01-{5 + days:02d}T00:00:00"},
+            **options,
+        }
+        response = client.post("/api/solver/solve", json=payload)
+        assert response.status_code == 200, response.text
+        return client.get(f"/api/solver/runs/{response.json()['run_id']}").json()
+    return _solve
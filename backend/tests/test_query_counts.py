@@ -0,0 +1,77 @@
+"""
+Regresión de consultas N+1: los listados y el reporte de una ejecución deben
+costar un número fijo de consultas, sin importar cuántas filas devuelven
+"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import http_cache
+from app.database import async_engine, engine
+
+@contextmanager
+def count_queries():
+    counter = {"count": 0}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter["count"] += 1
+
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+def _queries(client, path: str) -> int:
+    # Sin respuestas en caché: medir siempre la lectura desde la base de datos
+    http_cache.cache.clear()
+    with count_queries() as counter:
+        response = client.get(path)
+    assert response.status_code == 200, response.text
+    return counter["count"]
+
+@pytest.mark.parametrize("path", [
+    "/api/solver/runs/{run_id}/assignments",
+    "/api/solver/runs/{run_id}/assignments?limit=1000",
+    "/api/reports/{run_id}",
+])
+def test_run_endpoints_use_constant_queries(client, seed, solve, path):
+    seed(employees=4, shifts=4)
+    small = solve(days=2)
+    seed_more = client.post("/api/employees/bulk", json=[
+        {"name": f"Extra {i}", "email": f"extra{i}@example.com", "skills": ["caja"], "hourly_rate": 5}
+        for i in range(12)
+    ])
+    assert seed_more.status_code == 200
+    large = solve(days=7)
+    assert large["assignments_count"] > 3 * small["assignments_count"] > 0
+
+    assert _queries(client, path.format(run_id=small["run_id"])) == _queries(client, path.format(run_id=large["run_id"]))
+
+@pytest.mark.parametrize("path", [
+    "/api/employees/?active_only=false",
+    "/api/shifts/?active_only=false",
+    "/api/solver/runs",
+])
+def test_list_endpoints_use_constant_queries(client, seed, solve, path):
+    seed(employees=2, shifts=2)
+    solve(days=1)
+    small = _queries(client, path)
+
+    seed_more = client.post("/api/employees/bulk", json=[
+        {"name": f"Extra {i}", "email": f"extra{i}@example.com", "skills": ["caja"], "hourly_rate": 5}
+        for i in range(20)
+    ])
+    assert seed_more.status_code == 200
+    client.post("/api/shifts/bulk", json=[
+        {"name": f"Extra {i}", "start_time": "08:00", "end_time": "16:00", "day_of_week": i % 7, "min_employees": 1, "max_employees": 2}
+        for i in range(20)
+    ])
+    for _ in range(5):
+        solve(days=1)
+
+    assert _queries(client, path) == small
@@ -0,0 +1,19 @@
+from app.solver import capture
+from app.solver.replay import main, replay_bundle
+
+def test_captured_run_replays(seed, solve):
+    seed()
+    run = solve(capture=True)
+    assert run["status"] == "completed"
+
+    bundle = capture.read_bundle(capture.bundle_path(run["run_id"]))
+    assert "max_time_in_seconds: 60" in bundle["parameters"]
+
+    result = replay_bundle(bundle)
+    assert result["success"]
+    assert result["assignments"] == run["assignments_count"]
+
+def test_replay_cli_overrides_parameters(seed, solve):
+    seed()
+    run = solve(capture=True)
+    assert main([capture.bundle_path(run["run_id"]), "--no-profile", "--time-limit", "5", "--workers", "1"]) == 0
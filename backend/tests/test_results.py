@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+from app.database import SessionLocal
+from app.models import Assignment, SolverRun
+from app.results import STORAGE_PACKED, compact_old_runs, compact_run, unpack_triples
+
+def _age_run(db, run_id: str, days: int = 60):
+    db.query(SolverRun).filter(SolverRun.run_id == run_id).update(
+        {SolverRun.created_at: datetime.now() - timedelta(days=days)}
+    )
+    db.commit()
+
+def test_concurrent_compaction_keeps_first_blob(seed, solve, db):
+    seed()
+    run = solve()
+    assert run["assignments_count"] > 0
+    _age_run(db, run["run_id"])
+
+    # Segundo compactador con la ejecución leída antes de que el primero termine
+    other = SessionLocal()
+    try:
+        stale = other.query(SolverRun).filter(SolverRun.run_id == run["run_id"]).one()
+        assert compact_old_runs(db) == 1
+        assert not compact_run(other, stale)
+        other.commit()
+    finally:
+        other.close()
+
+    db.expire_all()
+    stored = db.query(SolverRun).filter(SolverRun.run_id == run["run_id"]).one()
+    assert stored.storage_mode == STORAGE_PACKED
+    assert len(unpack_triples(stored.packed_assignments)) == run["assignments_count"]
+    assert db.query(Assignment).filter(Assignment.solver_run_id == stored.id).count() == 0
@@ -0,0 +1,5 @@
+def test_stored_phase_timings_include_persist(seed, solve):
+    seed()
+    run = solve()
+    assert run["status"] == "completed"
+    assert set(run["phase_timings"]) >= {"load", "build", "solve", "extract", "persist"}
@@ -1,6 +1,16 @@
 import { useEffect, useState } from 'react'
 import { Users, Clock, Calculator, TrendingUp, Sparkles } from 'lucide-react'
-// import { api } from '../services/api'
+import { dashboardService } from '../services/api'
+
+interface DashboardRun {
+  run_id: string
+  status: string
+  created_at: string
+  solve_time?: number
+  assignments_count?: number
+  total_cost?: number
+  coverage_percentage?: number
+}
 
 interface DashboardStats {
   totalEmployees: number
@@ -9,6 +19,13 @@ interface DashboardStats {
   successRate: number
 }
 
+const STATUS_STYLES: Record<string, { label: string; className: string }> = {
+  completed: { label: 'Completado', className: 'bg-green-100 text-green-800' },
+  running: { label: 'En proceso', className: 'bg-blue-100 text-blue-800' },
+  pending: { label: 'Pendiente', className: 'bg-yellow-100 text-yellow-800' },
+  failed: { label: 'Fallido', className: 'bg-red-100 text-red-800' },
+}
+
 export function Dashboard() {
   const [stats, setStats] = useState<DashboardStats>({
     totalEmployees: 0,
@@ -16,18 +33,21 @@ export function Dashboard() {
     recentRuns: 0,
     successRate: 0
   })
+  const [recentRuns, setRecentRuns] = useState<DashboardRun[]>([])
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
     const fetchStats = async () => {
       try {
-        // Simular datos por ahora - en producción vendrían del backend
+        // Un solo resumen agregado (en caché en el backend) en lugar de los listados completos
+        const { data } = await dashboardService.getSummary({ recent: 5 })
         setStats({
-          totalEmployees: 25,
-          totalShifts: 8,
-          recentRuns: 12,
-          successRate: 85.5
+          totalEmployees: data.active_employees,
+          totalShifts: data.active_shifts,
+          recentRuns: data.total_runs,
+          successRate: data.success_rate ?? 0
         })
+        setRecentRuns(data.recent_runs)
       } catch (error) {
         console.error('Error cargando estadísticas:', error)
       } finally {
@@ -164,24 +184,26 @@ export function Dashboard() {
         <div className="card">
           <h3 className="text-lg font-semibold text-gray-900 mb-4">Optimización Reciente</h3>
           <div className="space-y-3">
-            <div className="flex justify-between items-center p-3 bg-gray-50 rounded-lg">
-              <div>
-                <p className="font-medium text-gray-900">Optimización #001</p>
-                <p className="text-sm text-gray-600">Hace 2 horas</p>
-              </div>
-              <span className="px-2 py-1 bg-green-100 text-green-800 text-xs rounded-full">
-                Completado
-              </span>
-            </div>
-            <div className="flex justify-between items-center p-3 bg-gray-50 rounded-lg">
-              <div>
-                <p className="font-medium text-gray-900">Optimización #002</p>
-                <p className="text-sm text-gray-600">Hace 1 día</p>
-              </div>
-              <span className="px-2 py-1 bg-blue-100 text-blue-800 text-xs rounded-full">
-                En proceso
-              </span>
-            </div>
+            {recentRuns.length === 0 && (
+              <p className="text-sm text-gray-600">Aún no hay optimizaciones</p>
+            )}
+            {recentRuns.map((run) => {
+              const status = STATUS_STYLES[run.status] ?? { label: run.status, className: 'bg-gray-100 text-gray-800' }
+              return (
+                <div key={run.run_id} className="flex justify-between items-center p-3 bg-gray-50 rounded-lg">
+                  <div>
+                    <p className="font-medium text-gray-900">Optimización {run.run_id.slice(0, 8)}</p>
+                    <p className="text-sm text-gray-600">
+                      {new Date(run.created_at).toLocaleString()}
+                      {run.coverage_percentage != null && ` · ${run.coverage_percentage}% cobertura`}
+                    </p>
+                  </div>
+                  <span className={`px-2 py-1 ${status.className} text-xs rounded-full`}>
+                    {status.label}
+                  </span>
+                </div>
+              )
+            })}
           </div>
         </div>
       </div>
@@ -36,6 +36,15 @@ interface ReportData {
     objective_value: number
     coverage_percentage: number
     status: string
+    total_hours: number
+    total_cost: number
+    required_slots: number
+    covered_slots: number
+    understaffed_shifts: number
+    overstaffed_shifts: number
+    slack_total: number
+    hours_spread: number
+    hours_stddev: number
   }
 }
 
@@ -33,30 +33,56 @@ api.interceptors.response.use(
 
 // Servicios específicos
 export const employeeService = {
-  getAll: () => api.get('/api/employees'),
+  getAll: (params?: Record<string, any>) => api.get('/api/employees', { params }),
+  search: (params: Record<string, any>) => api.get('/api/employees/search', { params }),
   getById: (id: number) => api.get(`/api/employees/${id}`),
   create: (data: any) => api.post('/api/employees', data),
   update: (id: number, data: any) => api.put(`/api/employees/${id}`, data),
   delete: (id: number) => api.delete(`/api/employees/${id}`),
+  bulkImport: (rows: any[] | FormData, atomic = false) =>
+    api.post('/api/employees/bulk', rows, { params: { atomic } }),
+  bulkUpdate: (rows: any[], atomic = false) =>
+    api.patch('/api/employees/bulk', rows, { params: { atomic } }),
+  bulkDeactivate: (ids: number[]) => api.post('/api/employees/bulk/deactivate', { ids }),
 }
 
 export const shiftService = {
-  getAll: () => api.get('/api/shifts'),
+  getAll: (params?: Record<string, any>) => api.get('/api/shifts', { params }),
   getById: (id: number) => api.get(`/api/shifts/${id}`),
   create: (data: any) => api.post('/api/shifts', data),
   update: (id: number, data: any) => api.put(`/api/shifts/${id}`, data),
   delete: (id: number) => api.delete(`/api/shifts/${id}`),
+  bulkImport: (rows: any[] | FormData, atomic = false) =>
+    api.post('/api/shifts/bulk', rows, { params: { atomic } }),
+  bulkUpdate: (rows: any[], atomic = false) =>
+    api.patch('/api/shifts/bulk', rows, { params: { atomic } }),
+  bulkDeactivate: (ids: number[]) => api.post('/api/shifts/bulk/deactivate', { ids }),
 }
 
 export const solverService = {
   solve: (constraints: any) => api.post('/api/solver/solve', constraints),
-  getRuns: () => api.get('/api/solver/runs'),
+  solveBatch: (data: { constraints: any; group_by: 'site' | 'department'; groups?: (string | null)[] }) =>
+    api.post('/api/solver/batch', data),
+  getBatch: (runId: string) => api.get(`/api/solver/batch/${runId}`),
+  getRuns: (params?: Record<string, any>) => api.get('/api/solver/runs', { params }),
   getRun: (runId: string) => api.get(`/api/solver/runs/${runId}`),
-  getAssignments: (runId: string) => api.get(`/api/solver/runs/${runId}/assignments`),
+  getAssignments: (runId: string, params?: Record<string, any>) =>
+    api.get(`/api/solver/runs/${runId}/assignments`, { params }),
   getErrors: (runId: string) => api.get(`/api/solver/runs/${runId}/errors`),
+  diffRuns: (runId: string, otherRunId: string, params?: { employee_id?: number; summary_only?: boolean }) =>
+    api.get(`/api/solver/runs/${runId}/diff/${otherRunId}`, { params }),
 }
 
 export const reportService = {
   getReport: (runId: string) => api.get(`/api/reports/${runId}`),
-  getPrintView: (runId: string) => api.get(`/api/reports/${runId}/printview`),
+  getSummary: (runId: string) => api.get(`/api/reports/${runId}/summary`),
+  getPrintView: (runId: string) =>
+    api.get(`/api/reports/${runId}/printview`, { responseType: 'text' }),
+  exportRun: (runId: string, format: 'csv' | 'ndjson' | 'parquet' = 'csv') =>
+    api.get(`/api/reports/${runId}/export`, { params: { format }, responseType: 'blob' }),
+}
+
+export const dashboardService = {
+  getSummary: (params?: { recent?: number; trend?: number }) =>
+    api.get('/api/dashboard/summary', { params }),
 }